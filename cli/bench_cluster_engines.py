@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# bench_cluster_engines.py
+"""
+CLI 工具：比较聚类引擎的耗时和召回。
+
+用替身服务的数据生成器造 activities，并给标题加上随机的文件名 / 模块名，
+模拟长时间窗口里大量不同、但共享常见词的标题。以第一个精确引擎的结果为基准，
+召回 = 引擎得到的同 cluster 成员对数 / 基准的同 cluster 成员对数
+（minhash / tfidf 只会拆分、不会错误合并基准的 cluster，因此这个比值就是成员对的召回）。
+
+Usage:
+    python cli/bench_cluster_engines.py --activities 20000
+    python cli/bench_cluster_engines.py --activities 200000 --engines minhash --bands 16
+    python cli/bench_cluster_engines.py --activities 200000 --engines tfidf --min-cosine 0.2
+    python cli/bench_cluster_engines.py --activities 5000 --engines union_find,minhash,agglomerative
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 将 src 目录添加到路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import to_activities
+from mcagent.behavior_miner import CLUSTER_ENGINES, _extract_features, _get_cluster_engine
+from mcagent.minhash import MinHashParams
+from mcagent.standin_server import generate_activities
+from mcagent.tfidf import TfidfParams
+
+_MODULES = ["main", "utils", "api", "cache", "miner", "server", "client", "models", "views", "config"]
+_EXTENSIONS = [".py", ".ts", ".md", ".json"]
+
+
+def make_activities(count: int, distinct: int, seed: int):
+    """生成 count 条 activities，标题后附加从 distinct 个文件名中随机选的一个。"""
+    rng = random.Random(seed)
+    names = [f"{rng.choice(_MODULES)}_{k}{rng.choice(_EXTENSIONS)}" for k in range(distinct)]
+    activities = generate_activities(count, days=90, seed=seed)
+    for activity in activities:
+        activity["title"] = f"{activity['title']} {rng.choice(names)}"
+    return to_activities(activities)
+
+
+def _pair_count(clusters) -> int:
+    return sum(len(members) * (len(members) - 1) // 2 for members in clusters.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较聚类引擎的耗时和召回")
+    parser.add_argument("--activities", type=int, default=20000, help="activities 条数（默认：20000）")
+    parser.add_argument("--distinct", type=int, default=5000, help="不同文件名的个数（默认：5000）")
+    parser.add_argument("--engines", default="union_find,minhash,tfidf",
+                        help=f"逗号分隔的引擎列表，第一个作为召回基准（可选：{', '.join(CLUSTER_ENGINES)}）")
+    parser.add_argument("--similarity-threshold", type=float, default=0.6, help="聚类相似度阈值（默认：0.6）")
+    parser.add_argument("--num-perm", type=int, default=MinHashParams().num_perm, help="minhash 签名长度")
+    parser.add_argument("--bands", type=int, default=MinHashParams().bands, help="minhash LSH 分段数")
+    parser.add_argument("--min-cosine", type=float, default=TfidfParams().min_cosine, help="tfidf 余弦相似度阈值")
+    parser.add_argument("--chunk-size", type=int, default=TfidfParams().chunk_size, help="tfidf 每块的行数")
+    parser.add_argument("--max-neighbors", type=int, default=TfidfParams().max_neighbors, help="tfidf 每行最多保留的近邻数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认：0）")
+    args = parser.parse_args()
+
+    minhash = MinHashParams(num_perm=args.num_perm, bands=args.bands)
+    tfidf = TfidfParams(min_cosine=args.min_cosine, chunk_size=args.chunk_size, max_neighbors=args.max_neighbors)
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+
+    activities = make_activities(args.activities, args.distinct, args.seed)
+    started = time.perf_counter()
+    features = _extract_features(activities)
+    print(f"{len(activities)} activities，特征提取 {time.perf_counter() - started:.2f}s")
+    print(f"minhash: num_perm={minhash.num_perm} bands={minhash.bands} "
+          f"(Jaccard 分界点约 {minhash.threshold:.2f})")
+    print(f"tfidf: min_cosine={tfidf.min_cosine} chunk_size={tfidf.chunk_size} "
+          f"max_neighbors={tfidf.max_neighbors}\n")
+
+    baseline_pairs = None
+    print(f"{'engine':<15}{'seconds':>10}{'clusters':>10}{'recall':>10}")
+    for name in engines:
+        engine = _get_cluster_engine(name, minhash, tfidf)
+        started = time.perf_counter()
+        clusters = engine(features, args.similarity_threshold)
+        elapsed = time.perf_counter() - started
+
+        pairs = _pair_count(clusters)
+        if baseline_pairs is None:
+            baseline_pairs = pairs
+        recall = pairs / baseline_pairs if baseline_pairs else 1.0
+        print(f"{name:<15}{elapsed:>10.2f}{len(clusters):>10}{recall:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
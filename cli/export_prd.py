@@ -9,6 +9,7 @@ Usage:
     python cli/export_prd.py --candidate candidate_0 --out exports/ --format json --verbose
 """
 import argparse
+import logging
 import sys
 import json
 from pathlib import Path
@@ -20,6 +21,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from mcagent.behavior_miner import mine_behaviors
 from mcagent.evidence_pack import create_evidence_pack
 from mcagent.prd_generator import generate_prd
+from mcagent.telemetry import configure_logging, dump_spans, span
 
 
 def export_prd(
@@ -94,6 +96,17 @@ def export_prd(
     filepath = output_path / filename
 
     # 保存文件
+    with span("export", candidate_id=candidate_id, format=format):
+        _write_prd(prd, filepath, format)
+
+    if verbose:
+        print(f"[成功] PRD 已保存到: {filepath}")
+
+    return str(filepath)
+
+
+def _write_prd(prd: dict, filepath: Path, format: str) -> None:
+    """按格式把 PRD 写入文件"""
     if format == "json":
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(prd, f, ensure_ascii=False, indent=2)
@@ -126,11 +139,6 @@ def export_prd(
     else:
         raise ValueError(f"不支持的格式: {format}")
 
-    if verbose:
-        print(f"[成功] PRD 已保存到: {filepath}")
-
-    return str(filepath)
-
 
 def main():
     """主函数"""
@@ -194,7 +202,14 @@ def main():
         help="列出所有可用的 candidates",
     )
 
+    parser.add_argument(
+        "--spans-output",
+        type=str,
+        help="把各阶段耗时（span）保存为 JSON（默认读取环境变量 MCAGENT_SPANS_FILE）",
+    )
+
     args = parser.parse_args()
+    configure_logging(logging.INFO)
 
     try:
         # 如果需要列出所有 candidates
@@ -246,6 +261,8 @@ def main():
             import traceback
             traceback.print_exc()
         return 1
+    finally:
+        dump_spans(args.spans_output)
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ from typing import Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from mcagent.context_wrapper import get_minecontext_summary
+from mcagent.telemetry import configure_logging, dump_spans
 
 
 def safe_get_context_field(data: dict, field: str):
@@ -34,6 +35,7 @@ def run_command(cmd: str, timeout: int = 300):
 
 
 def main():
+    configure_logging()
     # 从命令行参数读取命令，如果没有参数则使用默认命令
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
@@ -116,4 +118,6 @@ def main():
     if code != 0:
         print(f"检测到命令失败，已包含 MineContext 上下文和 LLM 分析")
     print(f"命令 '{cmd}' 退出码: {code}")
+    # 设置了 MCAGENT_SPANS_FILE 时保存各阶段耗时
+    dump_spans()
 
@@ -7,8 +7,12 @@ Usage:
     python cli/mine_behaviors.py --days 7 --top-n 5
     python cli/mine_behaviors.py --days 3 --top-n 10 --no-cache
     python cli/mine_behaviors.py --days 30 --clear-cache
+    python cli/mine_behaviors.py --days 30 --spans-output spans.json
+    python cli/mine_behaviors.py --days 90 --engine minhash --minhash-bands 16
+    python cli/mine_behaviors.py --days 90 --engine tfidf --tfidf-min-cosine 0.2
 """
 import argparse
+import logging
 import sys
 import json
 from pathlib import Path
@@ -16,8 +20,11 @@ from pathlib import Path
 # 将 src 目录添加到路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from mcagent.behavior_miner import mine_behaviors
+from mcagent.behavior_miner import CLUSTER_ENGINES, DEFAULT_CLUSTER_ENGINE, mine_behaviors
 from mcagent.context_wrapper import clear_cache
+from mcagent.minhash import MinHashParams
+from mcagent.tfidf import TfidfParams
+from mcagent.telemetry import configure_logging, dump_spans
 
 
 def main():
@@ -52,6 +59,36 @@ def main():
         default=0.6,
         help="聚类相似度阈值（默认：0.6）"
     )
+    parser.add_argument(
+        "--engine",
+        choices=list(CLUSTER_ENGINES),
+        default=DEFAULT_CLUSTER_ENGINE,
+        help=f"聚类引擎（默认：{DEFAULT_CLUSTER_ENGINE}；超大规模的时间窗口可用近似的 minhash / tfidf，tfidf 需要 numpy 和 scipy）"
+    )
+    parser.add_argument(
+        "--minhash-perms",
+        type=int,
+        default=MinHashParams().num_perm,
+        help=f"minhash 签名长度，越大越准确、越慢（默认：{MinHashParams().num_perm}）"
+    )
+    parser.add_argument(
+        "--minhash-bands",
+        type=int,
+        default=MinHashParams().bands,
+        help=f"minhash LSH 分段数，越多召回越高、越慢（默认：{MinHashParams().bands}）"
+    )
+    parser.add_argument(
+        "--tfidf-min-cosine",
+        type=float,
+        default=TfidfParams().min_cosine,
+        help=f"tfidf 候选近邻的余弦相似度阈值，越低召回越高、越慢（默认：{TfidfParams().min_cosine}）"
+    )
+    parser.add_argument(
+        "--tfidf-max-neighbors",
+        type=int,
+        default=TfidfParams().max_neighbors,
+        help=f"tfidf 每条记录最多保留的近邻数（默认：{TfidfParams().max_neighbors}）"
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -62,8 +99,14 @@ def main():
         action="store_true",
         help="显示详细信息"
     )
+    parser.add_argument(
+        "--spans-output",
+        type=str,
+        help="把各阶段耗时（span）保存为 JSON（默认读取环境变量 MCAGENT_SPANS_FILE）"
+    )
 
     args = parser.parse_args()
+    configure_logging(logging.DEBUG if args.verbose else logging.INFO)
 
     # 清除缓存
     if args.clear_cache:
@@ -80,7 +123,10 @@ def main():
             days=args.days,
             top_n=args.top_n,
             use_cache=not args.no_cache,
-            similarity_threshold=args.similarity_threshold
+            similarity_threshold=args.similarity_threshold,
+            engine=args.engine,
+            minhash=MinHashParams(num_perm=args.minhash_perms, bands=args.minhash_bands),
+            tfidf=TfidfParams(min_cosine=args.tfidf_min_cosine, max_neighbors=args.tfidf_max_neighbors),
         )
 
         # 输出结果
@@ -100,7 +146,7 @@ def main():
                 print(f"  持续：{time_range['duration_days']} 天")
 
             if cluster['sample_activity_ids']:
-                print(f"  示例 Activity ID：{', '.join(cluster['sample_activity_ids'])}")
+                print(f"  示例 Activity ID：{', '.join(map(str, cluster['sample_activity_ids']))}")
 
             print(f"  候选 ID：{cluster['candidate_id']}")
             print()
@@ -128,6 +174,8 @@ def main():
             import traceback
             traceback.print_exc()
         return 1
+    finally:
+        dump_spans(args.spans_output)
 
 
 if __name__ == "__main__":
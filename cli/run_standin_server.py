@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# run_standin_server.py
+"""
+CLI 工具：启动本地 MineContext 替身服务，用于离线开发和压测。
+
+Usage:
+    python cli/run_standin_server.py --port 1733 --activities 5000 --days 30
+    python cli/run_standin_server.py --latency 0.2 --error-rate 0.1 --timeout-rate 0.05
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 将 src 目录添加到路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.standin_server import StandinServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="启动本地 MineContext 替身服务（/api/debug/{reports,todos,activities,tips}）"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认：127.0.0.1）")
+    parser.add_argument("--port", type=int, default=1733, help="监听端口（默认：1733，与 MineContext 相同）")
+    parser.add_argument("--activities", type=int, default=1000, help="生成的 activities 条数（默认：1000）")
+    parser.add_argument("--days", type=float, default=7, help="activities 的时间跨度（天，默认：7）")
+    parser.add_argument("--todos", type=int, default=10, help="生成的 todos 条数（默认：10）")
+    parser.add_argument("--tips", type=int, default=5, help="生成的 tips 条数（默认：5）")
+    parser.add_argument("--reports", type=int, default=3, help="生成的 reports 条数（默认：3）")
+    parser.add_argument("--lang", choices=["zh", "en", "mixed"], default="mixed", help="数据语言（默认：mixed）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="额外随机延迟的上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率（0-1）")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="模拟超时的概率（0-1）")
+    parser.add_argument("--timeout-seconds", type=float, default=30.0, help="模拟超时时挂起的秒数（默认：30）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认：0）")
+
+    args = parser.parse_args()
+
+    server = StandinServer(
+        host=args.host,
+        port=args.port,
+        activities=args.activities,
+        days=args.days,
+        todos=args.todos,
+        tips=args.tips,
+        reports=args.reports,
+        lang=args.lang,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        seed=args.seed,
+    )
+    print(f"[INFO] MineContext 替身服务已启动: {server.url}")
+    print(f"[INFO] activities: {args.activities} 条 / {args.days} 天，按 Ctrl+C 退出")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] 用户中断")
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ MineContext 的 MCP Server：
 3. get_behavior_evidence - 获取指定候选的证据包
 """
 
+import asyncio
+import atexit
 import sys
 from pathlib import Path
 from typing import Optional, Literal, Dict, Any, List
@@ -18,34 +20,86 @@ from mcp.server.fastmcp import FastMCP
 # 添加 src 到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from mcagent.context_wrapper import get_minecontext_summary, get_activities
-from mcagent.behavior_miner import mine_behaviors
+from mcagent.context_wrapper import get_minecontext_summary_async, get_activities, get_cache_revision
+from mcagent.behavior_miner import generate_behavior_clusters
 from mcagent.evidence_pack import create_evidence_pack
 from mcagent.exporter import export_candidate_3piece
+from mcagent.memory_cache import TTLCache
+from mcagent.activity import Activity, to_activities
+from mcagent.telemetry import configure_logging, dump_spans
 
 # 建议用英文名字，便于在 TRAE 里识别
 mcp = FastMCP("minecontext-server")
 
+# 进程内缓存：server 是长驻进程，连续的工具调用直接复用内存中的结果。
+# key 中包含 get_cache_revision()，本地缓存数据变化（包括其他进程写入）后自动失效。
+MEMORY_CACHE_TTL = 300.0
+_ACTIVITY_CACHE = TTLCache(maxsize=8, ttl=MEMORY_CACHE_TTL)
+_CLUSTER_CACHE = TTLCache(maxsize=32, ttl=MEMORY_CACHE_TTL)
+_EVIDENCE_CACHE = TTLCache(maxsize=128, ttl=MEMORY_CACHE_TTL)
+# 屏幕上下文摘要默认允许的陈旧时间（秒）：Agent 高频调用时直接返回上一次的摘要并在后台刷新
+SUMMARY_MAX_STALENESS = 30.0
+
+
+def _invalidate_memory_caches() -> None:
+    """清空所有进程内缓存。"""
+    _ACTIVITY_CACHE.clear()
+    _CLUSTER_CACHE.clear()
+    _EVIDENCE_CACHE.clear()
+
+
+def _cached_activities(days: int, use_cache: bool = True) -> List[Activity]:
+    """
+    获取 activities（已转换成 Activity），命中内存缓存时不再读盘/请求 MineContext。
+
+    use_cache=False 时强制重新获取，并清空依赖旧数据的内存缓存。
+    """
+    if not use_cache:
+        activities = to_activities(get_activities(days=days, use_cache=False))
+        _invalidate_memory_caches()
+        _ACTIVITY_CACHE.set((days, get_cache_revision()), activities)
+        return activities
+
+    key = (days, get_cache_revision())
+    return _ACTIVITY_CACHE.get_or_set(
+        key, lambda: to_activities(get_activities(days=days, use_cache=True))
+    )
+
+
+def _cached_clusters(days: int, top_n: int, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """挖掘行为候选，相同参数和数据版本下复用上一次的结果。"""
+    activities = _cached_activities(days, use_cache=use_cache)
+    key = (days, top_n, get_cache_revision())
+    return _CLUSTER_CACHE.get_or_set(
+        key,
+        lambda: generate_behavior_clusters(activities=activities, top_n=top_n) if activities else [],
+    )
+
 
 @mcp.tool()
-def minecontext_screen_context(
+async def minecontext_screen_context(
     task_type: Optional[Literal["debug_error", "implement_feature", "refactor", "unknown"]] = "unknown",
     detail_level: Optional[Literal["low", "medium", "high"]] = "medium",
+    max_staleness: Optional[float] = SUMMARY_MAX_STALENESS,
 ) -> Dict[str, Any]:
     """
     MCP 工具：返回 MineContext 的压缩屏幕/活动上下文摘要 JSON。
     如果 MineContext 不可用，wrapper 会返回 status="error" 的结构化错误。
+
+    max_staleness 秒内的上一次摘要会直接返回（同时后台刷新），
+    meta.age_seconds 表示摘要的新鲜程度；传 0 强制同步获取最新摘要。
     """
-    summary = get_minecontext_summary(
+    summary = await get_minecontext_summary_async(
         task_type=task_type or "unknown",
         detail_level=detail_level or "medium",
+        max_staleness=max_staleness,
     )
     # FastMCP 支持直接返回 dict，会自动做 JSON 序列化
     return summary
 
 
 @mcp.tool()
-def list_behavior_candidates(
+async def list_behavior_candidates(
     days: int = 30,
     top_n: int = 10,
     use_cache: bool = True,
@@ -75,8 +129,8 @@ def list_behavior_candidates(
         }
     """
     try:
-        # 获取行为候选
-        clusters = mine_behaviors(days=days, top_n=top_n, use_cache=use_cache)
+        # 获取行为候选（聚类是 CPU 密集型计算，放到线程池，避免阻塞事件循环）
+        clusters = await asyncio.to_thread(_cached_clusters, days, top_n, use_cache)
 
         return {
             "status": "ok",
@@ -105,7 +159,7 @@ def list_behavior_candidates(
 
 
 @mcp.tool()
-def get_behavior_evidence(
+async def get_behavior_evidence(
     candidate_id: str,
     days: int = 30,
     min_examples: int = 3,
@@ -128,7 +182,7 @@ def get_behavior_evidence(
     """
     try:
         # 1. 获取所有候选
-        clusters = mine_behaviors(days=days, top_n=50, use_cache=True)
+        clusters = await asyncio.to_thread(_cached_clusters, days, 50)
 
         # 2. 找到指定的 candidate
         candidate = None
@@ -151,11 +205,14 @@ def get_behavior_evidence(
             }
 
         # 3. 获取 activities（用于生成证据包）
-        activities = get_activities(days=days, use_cache=True)
+        activities = await asyncio.to_thread(_cached_activities, days)
 
         # 4. 生成证据包
-        evidence_pack = create_evidence_pack(
-            candidate, activities, min_examples=min_examples
+        evidence_key = (candidate_id, days, min_examples, get_cache_revision())
+        evidence_pack = await asyncio.to_thread(
+            _EVIDENCE_CACHE.get_or_set,
+            evidence_key,
+            lambda: create_evidence_pack(candidate, activities, min_examples=min_examples),
         )
 
         return {
@@ -180,7 +237,7 @@ def get_behavior_evidence(
 
 
 @mcp.tool()
-def export_behavior_bundle(
+async def export_behavior_bundle(
     candidate_id: str,
     output_dir: str = "exports",
     days: int = 30,
@@ -211,12 +268,17 @@ def export_behavior_bundle(
     """
     try:
         # 调用导出函数（verbose=False，避免在MCP中输出过多信息）
-        exported_files = export_candidate_3piece(
-            candidate_id=candidate_id,
-            output_dir=output_dir,
-            days=days,
-            verbose=False,
-        )
+        def _export() -> Dict[str, str]:
+            return export_candidate_3piece(
+                candidate_id=candidate_id,
+                output_dir=output_dir,
+                days=days,
+                verbose=False,
+                clusters=_cached_clusters(days=days, top_n=10),
+                activities=_cached_activities(days),
+            )
+
+        exported_files = await asyncio.to_thread(_export)
 
         return {
             "status": "ok",
@@ -239,5 +301,9 @@ def export_behavior_bundle(
 
 
 if __name__ == "__main__":
+    # stdio 模式下 stdout 是协议通道，日志只输出到 stderr
+    configure_logging()
+    # 设置了 MCAGENT_SPANS_FILE 时，退出前保存各阶段耗时
+    atexit.register(dump_spans)
     # 以 stdio 模式运行 MCP server
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,246 @@
+# activity.py
+"""
+Activity 记录类型
+
+MineContext 返回的 activity 是 dict，时间是 ISO 字符串。挖掘、证据包等模块
+在热循环中反复解析时间、反复 lower() 标题。Activity 在入库（ingestion）时
+一次性完成这些工作：
+
+- 使用 __slots__，比 dict 更省内存
+- start_ts / end_ts 是预先解析好的 epoch 秒（int），排序和计算时长不再解析字符串
+- title_lower 预先计算
+- metadata（JSON 字符串）在第一次访问时才解析，结果缓存在记录上
+- count 是这条记录代表的原始 activity 条数（入库时折叠的近似重复记录会累加到这里）
+
+需要输出 JSON 时用 to_dict() 转换回 dict。
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# 直接映射到 slot 的字段，其余字段保存在 extra 中
+_FIELDS = ("id", "title", "content", "start_time", "end_time", "metadata", "count")
+
+# metadata 尚未解析的标记
+_UNPARSED = object()
+
+
+def parse_epoch(time_str: Optional[str]) -> Optional[int]:
+    """
+    把 ISO 时间字符串解析成 epoch 秒。
+
+    naive 时间按本地时区处理；缺失或无法解析时返回 None。
+    """
+    if not time_str or not isinstance(time_str, str):
+        return None
+    try:
+        return int(datetime.fromisoformat(time_str.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return None
+
+
+class Activity:
+    """
+    一条 MineContext activity
+
+    Attributes:
+        id: activity ID
+        title: 原始标题（可能为 None）
+        title_lower: 小写标题（标题缺失时为空字符串）
+        content: 正文（缺失时为空字符串）
+        start_time / end_time: 原始时间字符串
+        start_ts / end_ts: 解析后的 epoch 秒，无法解析时为 None
+        metadata_raw: 原始 metadata 字段（MineContext 中是 JSON 字符串）
+        metadata: 解析后的 metadata dict（第一次访问时解析并缓存）
+        count: 代表的原始 activity 条数（默认 1）
+        extra: 其他未单独建模的字段
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "title_lower",
+        "content",
+        "start_time",
+        "end_time",
+        "start_ts",
+        "end_ts",
+        "metadata_raw",
+        "_metadata",
+        "count",
+        "extra",
+        "_present",
+    )
+
+    def __init__(
+        self,
+        id: Any = None,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        metadata: Any = None,
+        extra: Optional[Dict[str, Any]] = None,
+        count: int = 1,
+    ):
+        self.id = id
+        self.title = title
+        self.title_lower = (title or "").lower()
+        self.content = content or ""
+        self.start_time = start_time
+        self.end_time = end_time
+        self.start_ts = parse_epoch(start_time)
+        self.end_ts = parse_epoch(end_time)
+        self.metadata_raw = metadata
+        self._metadata = _UNPARSED
+        self.count = count
+        self.extra = extra
+        # from_dict 记录输入中出现过的标准字段，直接构造时为 None
+        self._present: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], parse_metadata: bool = False) -> "Activity":
+        """
+        从 MineContext 返回的 dict 构建 Activity。
+
+        Args:
+            data: activity dict
+            parse_metadata: 是否立即解析 metadata（默认延迟到第一次访问）
+        """
+        extra = {k: v for k, v in data.items() if k not in _FIELDS}
+        content = data.get("content")
+        count = data.get("count")
+        # slot 中保存不了的原值（例如 content 为 None）放进 extra，to_dict 时原样输出
+        if "content" in data and not isinstance(content, str):
+            extra["content"] = content
+        if "count" in data and not isinstance(count, int):
+            extra["count"] = count
+        activity = cls(
+            id=data.get("id"),
+            title=data.get("title"),
+            content=content,
+            start_time=data.get("start_time"),
+            end_time=data.get("end_time"),
+            metadata=data.get("metadata"),
+            extra=extra or None,
+            count=count if isinstance(count, int) else 1,
+        )
+        activity._present = tuple(k for k in _FIELDS if k in data)
+        if parse_metadata:
+            activity.parse_metadata()
+        return activity
+
+    def parse_metadata(self) -> Dict[str, Any]:
+        """
+        解析 metadata 并缓存结果，重复调用不会再次 json.loads。
+
+        metadata 为 JSON 字符串时解析；已经是 dict 时直接使用；
+        缺失、解析失败或不是 JSON 对象时返回空 dict。
+        """
+        if self._metadata is _UNPARSED:
+            raw = self.metadata_raw
+            parsed: Any = raw
+            if isinstance(raw, str):
+                try:
+                    parsed = json.loads(raw)
+                except ValueError:
+                    parsed = None
+            self._metadata = parsed if isinstance(parsed, dict) else {}
+        return self._metadata
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """解析后的 metadata（延迟解析）。"""
+        return self.parse_metadata()
+
+    @property
+    def focus_areas(self) -> List[str]:
+        """metadata 中的 focus_areas（优先 extracted_insights 下的值）。"""
+        meta = self.metadata
+        extracted = meta.get("extracted_insights") or {}
+        return extracted.get("focus_areas") or meta.get("focus_areas") or []
+
+    @property
+    def key_entities(self) -> List[str]:
+        """metadata 中的 key_entities（优先 extracted_insights 下的值）。"""
+        meta = self.metadata
+        extracted = meta.get("extracted_insights") or {}
+        return extracted.get("key_entities") or meta.get("key_entities") or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换回 dict（用于 JSON 输出）。
+
+        from_dict 构建的记录输出输入中出现过的全部字段（包括值为 None 或空字符串的），
+        只省略输入中没有的字段；直接构造的记录省略值为 None 的标准字段和空 content。
+        count 不为 1 时总是输出。
+        """
+        fields = (
+            ("id", self.id),
+            ("title", self.title),
+            ("content", self.content),
+            ("start_time", self.start_time),
+            ("end_time", self.end_time),
+            ("metadata", self.metadata_raw),
+            ("count", self.count),
+        )
+        present = self._present
+        if present is None:
+            present = tuple(key for key, value in fields if value is not None and value != "" and key != "count")
+        data: Dict[str, Any] = {key: value for key, value in fields if key in present}
+        if self.count != 1:
+            data["count"] = self.count
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def sort_ts(self) -> Optional[int]:
+        """排序用时间：优先 end_ts，其次 start_ts。"""
+        return self.end_ts if self.end_ts is not None else self.start_ts
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """兼容 dict 的读取方式，供尚未迁移的调用方使用。"""
+        if key == "metadata":
+            value = self.metadata_raw
+        elif key in _FIELDS:
+            value = getattr(self, key)
+        else:
+            value = (self.extra or {}).get(key)
+        return default if value is None else value
+
+    def __repr__(self) -> str:
+        return f"Activity(id={self.id!r}, title={self.title!r}, end_time={self.end_time!r})"
+
+
+ActivityLike = Union[Activity, Dict[str, Any]]
+
+
+def to_activities(items: Iterable[ActivityLike], parse_metadata: bool = False) -> List[Activity]:
+    """
+    把 dict 列表转换成 Activity 列表（已经是 Activity 的直接复用）。
+
+    非 dict / Activity 的元素会被跳过。
+
+    Args:
+        items: dict 或 Activity 列表
+        parse_metadata: 是否在转换时批量解析 metadata
+            （已知后续每条都会读取 metadata 时使用，否则保持延迟解析）
+    """
+    activities = []
+    for item in items:
+        if isinstance(item, Activity):
+            activity = item
+        elif isinstance(item, dict):
+            activity = Activity.from_dict(item)
+        else:
+            continue
+        if parse_metadata:
+            activity.parse_metadata()
+        activities.append(activity)
+    return activities
+
+
+def activities_to_dicts(activities: Iterable[Activity]) -> List[Dict[str, Any]]:
+    """把 Activity 列表转换回 dict 列表（用于 JSON 输出）。"""
+    return [activity.to_dict() for activity in activities]
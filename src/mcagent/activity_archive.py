@@ -0,0 +1,430 @@
+# activity_archive.py
+"""
+按天分段的 activities 归档，查询最近 N 天时只打开 N 个分段。
+
+SQLite 和按天的缓存文件都把全部历史放在一起：历史越长，单个库 / 文件越大。
+归档把 activities 按 end_time（缺失时用 start_time）所在的本地日期切成不可变的分段：
+
+    data/archive/
+        manifest.json                             分段清单 + 同步状态 + revision
+        activities_20251225_20251225.r12.mcb      一天一个分段（.mcb 二进制格式）
+        activities_20251101_20251130.r30.mcb      压缩后的整月分段
+
+- 分段文件写入后不再修改：某一天有新数据时合并旧分段和新记录（按 id 去重，新版本为准），
+  写出新的分段文件，再原子替换 manifest，最后删除旧文件
+- 查询时根据 manifest 只打开和时间窗口相交的分段，加载时间不随总历史增长
+- RetentionPolicy 控制旧分段：超过 compact_after_days 的按天分段合并成按月分段，
+  超过 max_days 的分段直接删除
+- manifest 的修改在 .archive.lock 文件锁内完成，CLI、MCP server 等多个进程可以共享同一个归档
+"""
+import json
+import logging
+import math
+import pathlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .activity_store import _record_id, _to_epoch
+    from .cache_codec import BinaryActivityCache, encode_binary_cache
+    from .file_lock import FileLock, atomic_write_bytes
+    from .telemetry import span
+except ImportError:
+    from activity_store import _record_id, _to_epoch
+    from cache_codec import BinaryActivityCache, encode_binary_cache
+    from file_lock import FileLock, atomic_write_bytes
+    from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".archive.lock"
+MANIFEST_VERSION = 1
+# 分段的日期格式（文件名和 manifest 中都使用）
+DAY_FORMAT = "%Y%m%d"
+# 读取时分段被其他进程替换（旧文件已删除）后重新读取 manifest 的次数
+READ_RETRIES = 3
+
+
+def _day_of(ts: float) -> str:
+    """epoch 秒所在的本地日期（YYYYMMDD）。"""
+    return datetime.fromtimestamp(ts).strftime(DAY_FORMAT)
+
+
+def _day_start(day: str) -> datetime:
+    """YYYYMMDD 当天 0 点（本地时间）。"""
+    return datetime.strptime(day, DAY_FORMAT)
+
+
+def _sort_key(item: Tuple[float, Dict[str, Any]]) -> Tuple[float, str]:
+    ts, activity = item
+    return ts, _record_id(activity)
+
+
+class RetentionPolicy:
+    """
+    旧分段的保留策略
+
+    Args:
+        max_days: 保留最近多少天的分段，更早的整段删除；None 表示不过期
+        compact_after_days: 早于多少天的按天分段合并成按月分段；None 表示不压缩
+    """
+
+    def __init__(self, max_days: Optional[int] = None, compact_after_days: Optional[int] = None):
+        if max_days is not None and max_days < 1:
+            raise ValueError("max_days 至少为 1")
+        if compact_after_days is not None and compact_after_days < 1:
+            raise ValueError("compact_after_days 至少为 1")
+        self.max_days = max_days
+        self.compact_after_days = compact_after_days
+
+    def __repr__(self) -> str:
+        return f"RetentionPolicy(max_days={self.max_days}, compact_after_days={self.compact_after_days})"
+
+
+class ActivityArchive:
+    """
+    按天分段的 activities 归档
+
+    接口和 ActivityStore 的 activities 部分一致（upsert_activities / query_activities /
+    watermark / get_state / set_state / revision / clear），context_wrapper 可以直接替换使用。
+    """
+
+    def __init__(
+        self,
+        root: str,
+        retention: Optional[RetentionPolicy] = None,
+        lock_timeout: float = 30.0,
+    ):
+        """
+        初始化
+
+        Args:
+            root: 归档目录（不存在时在第一次写入时创建）
+            retention: 保留策略，每次写入后应用；None 表示全部保留
+            lock_timeout: 等待其他进程释放归档锁的最长时间（秒）
+        """
+        self.root = pathlib.Path(root)
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.retention = retention
+        self.lock_timeout = lock_timeout
+
+    @property
+    def location(self) -> pathlib.Path:
+        """用于日志和存在性检查的路径。"""
+        return self.manifest_path
+
+    # ---------- manifest ----------
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """读取 manifest，不存在时返回空清单。"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {"version": MANIFEST_VERSION, "revision": 0, "state": {}, "segments": []}
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"不支持的归档版本: {manifest.get('version')}")
+        return manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        manifest["segments"].sort(key=lambda entry: entry["last_day"], reverse=True)
+        data = json.dumps(manifest, ensure_ascii=False, indent=2)
+        atomic_write_bytes(self.manifest_path, data.encode("utf-8"))
+
+    def _lock(self) -> FileLock:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self.root / LOCK_NAME), timeout=self.lock_timeout)
+
+    # ---------- 分段 ----------
+
+    def _read_segment(self, entry: Dict[str, Any]) -> List[Tuple[float, Dict[str, Any]]]:
+        """读取分段内全部记录，返回 [(end_ts, activity)]。"""
+        with BinaryActivityCache(str(self.root / entry["file"])) as cache:
+            return [(cache.end_ts(index), cache[index]) for index in range(len(cache))]
+
+    def _write_segment(
+        self,
+        first_day: str,
+        last_day: str,
+        revision: int,
+        records: Iterable[Tuple[float, Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """把记录写成一个新的分段文件（最新的在前），返回它的 manifest 条目。"""
+        ordered = sorted(records, key=_sort_key, reverse=True)
+        activities = [activity for _, activity in ordered]
+        filename = f"activities_{first_day}_{last_day}.r{revision}.mcb"
+        meta = {"first_day": first_day, "last_day": last_day, "revision": revision}
+        atomic_write_bytes(self.root / filename, encode_binary_cache(meta, activities))
+
+        newest_ts, newest = ordered[0]
+        return {
+            "file": filename,
+            "first_day": first_day,
+            "last_day": last_day,
+            "count": len(ordered),
+            "min_ts": ordered[-1][0],
+            "max_ts": newest_ts,
+            "newest": {"end_time": newest.get("end_time") or newest.get("start_time"), "id": newest.get("id")},
+        }
+
+    def _remove_files(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """manifest 替换之后删除不再引用的分段文件。"""
+        for entry in entries:
+            try:
+                (self.root / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Windows 上其他进程可能还映射着旧文件，下次清理时再删
+                logger.warning(f"删除旧分段失败: {entry['file']}（{e}）")
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """返回 manifest 中的分段条目，最新的在前。"""
+        return self._read_manifest()["segments"]
+
+    def select_segments(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        manifest: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        返回和时间窗口相交的分段条目（最新的在前），只比较 manifest 中的日期和时间范围。
+
+        Args:
+            start: 窗口起点（包含）
+            end: 窗口终点（包含），默认不限制
+        """
+        if manifest is None:
+            manifest = self._read_manifest()
+        start_ts = start.timestamp()
+        end_ts = end.timestamp() if end is not None else math.inf
+        return [
+            entry for entry in manifest["segments"]
+            if entry["max_ts"] >= start_ts and entry["min_ts"] <= end_ts
+        ]
+
+    # ---------- activities ----------
+
+    def upsert_activities(self, activities: List[Dict[str, Any]]) -> int:
+        """
+        写入 activities，只重写涉及到的分段；id 相同的记录以新版本为准。
+
+        时间无法解析的记录无法归入某一天，会被跳过。写入后按 retention 策略处理旧分段。
+
+        Returns:
+            写入的记录数
+        """
+        incoming: Dict[str, Dict[str, Tuple[float, Dict[str, Any]]]] = {}
+        skipped = 0
+        for activity in activities:
+            if not isinstance(activity, dict):
+                continue
+            ts = _to_epoch(activity.get("end_time") or activity.get("start_time"))
+            if ts is None:
+                skipped += 1
+                continue
+            incoming.setdefault(_day_of(ts), {})[_record_id(activity)] = (ts, activity)
+        if skipped:
+            logger.debug(f"跳过 {skipped} 条时间无法解析的 activities")
+        if not incoming:
+            return 0
+
+        written = sum(len(records) for records in incoming.values())
+        with span("archive.write") as s, self._lock():
+            manifest = self._read_manifest()
+            revision = manifest["revision"] + 1
+
+            # 每一天归入覆盖它的已有分段（可能是压缩后的整月分段），没有时新建按天分段
+            targets: Dict[Tuple[str, str], Dict[str, Tuple[float, Dict[str, Any]]]] = {}
+            existing = {(entry["first_day"], entry["last_day"]): entry for entry in manifest["segments"]}
+            for day, records in incoming.items():
+                key = next(
+                    (k for k in existing if k[0] <= day <= k[1]),
+                    (day, day),
+                )
+                targets.setdefault(key, {}).update(records)
+
+            replaced, added = [], []
+            for (first_day, last_day), records in sorted(targets.items()):
+                old = existing.get((first_day, last_day))
+                merged: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+                if old is not None:
+                    for ts, activity in self._read_segment(old):
+                        merged[_record_id(activity)] = (ts, activity)
+                    if all(merged.get(record_id, (None, None))[1] == record[1]
+                           for record_id, record in records.items()):
+                        # 内容没有变化，不重写
+                        continue
+                merged.update(records)
+                added.append(self._write_segment(first_day, last_day, revision, merged.values()))
+                if old is not None:
+                    replaced.append(old)
+
+            if added:
+                kept = [entry for entry in manifest["segments"] if entry not in replaced]
+                manifest["segments"] = kept + added
+                manifest["revision"] = revision
+                self._write_manifest(manifest)
+                self._remove_files(replaced)
+            s.count("items", written)
+            s.count("segments", len(added))
+
+        if self.retention is not None:
+            self.apply_retention()
+        return written
+
+    def query_activities(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        按时间窗口查询 activities，只打开和窗口相交的分段，最新的在前。
+
+        Args:
+            start: 窗口起点（包含）
+            end: 窗口终点（包含），默认不限制
+        """
+        for attempt in range(READ_RETRIES):
+            selected = self.select_segments(start, end)
+            try:
+                with span("archive.query") as s:
+                    activities: List[Dict[str, Any]] = []
+                    # 分段之间的日期不重叠且各自按时间倒序，依次拼接即为整体倒序
+                    for entry in selected:
+                        with BinaryActivityCache(str(self.root / entry["file"])) as cache:
+                            activities.extend(cache.iter_window(start, end))
+                    s.count("segments", len(selected))
+                    s.count("items", len(activities))
+                return activities
+            except FileNotFoundError:
+                # 读取期间其他进程替换了分段，重新读取 manifest
+                if attempt == READ_RETRIES - 1:
+                    raise
+        return []
+
+    def watermark(self) -> Optional[Dict[str, Any]]:
+        """返回已归档的最新一条 activity 的 end_time / id，归档为空时返回 None。"""
+        segments = self.segments()
+        if not segments:
+            return None
+        return max(segments, key=lambda entry: entry["max_ts"])["newest"]
+
+    def count_activities(self) -> int:
+        """返回已归档的 activities 总数。"""
+        return sum(entry["count"] for entry in self.segments())
+
+    # ---------- 保留策略 ----------
+
+    def expire(self, before: datetime) -> int:
+        """
+        删除最新记录早于 before 的分段（整段删除），返回删除的记录数。
+
+        同步状态中的 window_start（已覆盖的窗口起点）早于 before 时前移到 before，
+        避免之后把已经不完整的窗口当作缓存命中。
+        """
+        before_ts = before.timestamp()
+        with self._lock():
+            manifest = self._read_manifest()
+            expired = [entry for entry in manifest["segments"] if entry["max_ts"] < before_ts]
+            if not expired:
+                return 0
+            manifest["segments"] = [entry for entry in manifest["segments"] if entry not in expired]
+            manifest["revision"] += 1
+            covered = manifest["state"].get("window_start")
+            if covered and datetime.fromisoformat(covered) < before:
+                manifest["state"]["window_start"] = before.isoformat()
+            self._write_manifest(manifest)
+            self._remove_files(expired)
+
+        removed = sum(entry["count"] for entry in expired)
+        logger.info(f"归档过期: 删除 {len(expired)} 个分段（{removed} 条）")
+        return removed
+
+    def compact(self, before: datetime) -> int:
+        """
+        把整段早于 before 的分段按月合并成一个分段，返回合并掉的分段数。
+
+        合并后的分段覆盖参与合并的第一天到最后一天；之后这些日期的新记录写入该分段。
+        """
+        cutoff = before.strftime(DAY_FORMAT)
+        with self._lock():
+            manifest = self._read_manifest()
+            months: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in manifest["segments"]:
+                if entry["last_day"] < cutoff and entry["first_day"][:6] == entry["last_day"][:6]:
+                    months.setdefault(entry["first_day"][:6], []).append(entry)
+            months = {month: entries for month, entries in months.items() if len(entries) > 1}
+            if not months:
+                return 0
+
+            revision = manifest["revision"] + 1
+            replaced, added = [], []
+            for month, entries in sorted(months.items()):
+                records: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+                for entry in entries:
+                    for ts, activity in self._read_segment(entry):
+                        records[_record_id(activity)] = (ts, activity)
+                first_day = min(entry["first_day"] for entry in entries)
+                last_day = max(entry["last_day"] for entry in entries)
+                added.append(self._write_segment(first_day, last_day, revision, records.values()))
+                replaced.extend(entries)
+
+            manifest["segments"] = [entry for entry in manifest["segments"] if entry not in replaced] + added
+            manifest["revision"] = revision
+            self._write_manifest(manifest)
+            self._remove_files(replaced)
+
+        logger.info(f"归档压缩: {len(replaced)} 个分段合并为 {len(added)} 个")
+        return len(replaced)
+
+    def apply_retention(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        按 retention 策略过期和压缩旧分段。
+
+        Returns:
+            {"expired": 删除的记录数, "compacted": 合并掉的分段数}
+        """
+        result = {"expired": 0, "compacted": 0}
+        if self.retention is None:
+            return result
+        today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.retention.max_days is not None:
+            result["expired"] = self.expire(today - timedelta(days=self.retention.max_days))
+        if self.retention.compact_after_days is not None:
+            result["compacted"] = self.compact(today - timedelta(days=self.retention.compact_after_days))
+        return result
+
+    # ---------- 同步状态 ----------
+
+    def revision(self) -> int:
+        """返回 activities 的数据版本号，任何进程写入、过期或压缩分段都会让它变化。"""
+        return int(self._read_manifest()["revision"])
+
+    def get_state(self, key: str) -> Optional[str]:
+        """读取同步状态（如 fetch_time / window_start）。"""
+        return self._read_manifest()["state"].get(key)
+
+    def set_state(self, **values: Any) -> None:
+        """批量写入同步状态，值为 None 的 key 会被删除。"""
+        with self._lock():
+            manifest = self._read_manifest()
+            for key, value in values.items():
+                if value is None:
+                    manifest["state"].pop(key, None)
+                else:
+                    manifest["state"][key] = str(value)
+            self._write_manifest(manifest)
+
+    def clear(self) -> None:
+        """删除所有分段和同步状态（revision 继续递增）。"""
+        with self._lock():
+            manifest = self._read_manifest()
+            removed = manifest["segments"]
+            manifest["segments"] = []
+            manifest["state"] = {}
+            manifest["revision"] += 1
+            self._write_manifest(manifest)
+            self._remove_files(removed)
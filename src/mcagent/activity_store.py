@@ -0,0 +1,274 @@
+# activity_store.py
+"""
+基于 SQLite 的本地存储，保存从 MineContext 拉取的 activities / todos / tips。
+
+相比按天一个 JSON 文件的缓存：
+1. activities 按 end_time（解析成 epoch 秒）建索引，按时间窗口查询只读取窗口内的行
+2. id 是主键，重复写入自动去重（以最新版本为准）
+3. 使用 WAL 模式 + busy timeout，CLI、MCP server 等多个进程可以安全共享同一个库
+"""
+import json
+import pathlib
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# 支持的普通记录表（activities 有单独的时间列，单独处理）
+RECORD_TABLES = {
+    "todos": "end_time",
+    "tips": "created_at",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    id TEXT PRIMARY KEY,
+    start_time TEXT,
+    end_time TEXT,
+    end_ts REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activities_end_ts ON activities(end_ts);
+
+CREATE TABLE IF NOT EXISTS todos (
+    id TEXT PRIMARY KEY,
+    end_time TEXT,
+    payload TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tips (
+    id TEXT PRIMARY KEY,
+    created_at TEXT,
+    payload TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_epoch(time_str: Optional[str]) -> Optional[float]:
+    """把 ISO 时间字符串转换成 epoch 秒；naive 时间按本地时区处理，无法解析返回 None。"""
+    if not time_str:
+        return None
+    try:
+        return datetime.fromisoformat(time_str.replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_id(record: Dict[str, Any]) -> str:
+    """记录的主键：优先使用 id，没有 id 时由标题和时间拼出稳定的键。"""
+    record_id = record.get("id")
+    if record_id is not None:
+        return str(record_id)
+    return "~" + json.dumps(
+        [record.get("title"), record.get("content"), record.get("start_time"), record.get("end_time")],
+        ensure_ascii=False,
+    )
+
+
+class ActivityStore:
+    """
+    MineContext 数据的 SQLite 存储。
+
+    每次操作都使用独立连接，因此同一个实例可以在多个线程中使用；
+    跨进程的并发写入由 SQLite 的锁 + busy timeout 保证。
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        """
+        初始化
+
+        Args:
+            db_path: 数据库文件路径（父目录不存在时自动创建）
+            timeout: 等待其他进程释放写锁的最长时间（秒）
+        """
+        self.db_path = pathlib.Path(db_path)
+        self.timeout = timeout
+        self._initialized = False
+
+    @property
+    def location(self) -> pathlib.Path:
+        """用于日志和存在性检查的路径。"""
+        return self.db_path
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在退出时提交/回滚、关闭。首次使用时建表。"""
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- activities ----------
+
+    def upsert_activities(self, activities: List[Dict[str, Any]]) -> int:
+        """
+        写入 activities，id 相同的记录会被覆盖。
+
+        Returns:
+            写入的记录数
+        """
+        rows = []
+        for activity in activities:
+            if not isinstance(activity, dict):
+                continue
+            end_time = activity.get("end_time") or activity.get("start_time")
+            rows.append((
+                _record_id(activity),
+                activity.get("start_time"),
+                activity.get("end_time"),
+                _to_epoch(end_time),
+                json.dumps(activity, ensure_ascii=False),
+            ))
+        if not rows:
+            return 0
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO activities (id, start_time, end_time, end_ts, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._bump_revision(conn)
+        return len(rows)
+
+    def query_activities(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        按时间窗口查询 activities（走 end_ts 索引），最新的在前。
+
+        Args:
+            start: 窗口起点（包含）
+            end: 窗口终点（包含），默认不限制
+        """
+        sql = "SELECT payload FROM activities WHERE end_ts >= ?"
+        params: List[Any] = [start.timestamp()]
+        if end is not None:
+            sql += " AND end_ts <= ?"
+            params.append(end.timestamp())
+        sql += " ORDER BY end_ts DESC"
+
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+    def watermark(self) -> Optional[Dict[str, Any]]:
+        """返回已存储的最新一条 activity 的 end_time / id，库为空时返回 None。"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT end_time, start_time, id FROM activities "
+                "WHERE end_ts IS NOT NULL ORDER BY end_ts DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return {"end_time": row[0] or row[1], "id": row[2]}
+
+    def count_activities(self) -> int:
+        """返回已存储的 activities 总数。"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def prune_activities(self, before: datetime) -> int:
+        """删除 end_time 早于 before 的 activities，返回删除的条数。"""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM activities WHERE end_ts < ?", (before.timestamp(),))
+            if cursor.rowcount:
+                self._bump_revision(conn)
+            return cursor.rowcount
+
+    # ---------- todos / tips ----------
+
+    def upsert_records(self, kind: str, records: List[Dict[str, Any]]) -> int:
+        """
+        写入 todos 或 tips。
+
+        Args:
+            kind: "todos" 或 "tips"
+            records: 记录列表
+        """
+        time_column = RECORD_TABLES[kind]
+        rows = [
+            (_record_id(record), record.get(time_column), json.dumps(record, ensure_ascii=False))
+            for record in records
+            if isinstance(record, dict)
+        ]
+        if not rows:
+            return 0
+
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {kind} (id, {time_column}, payload) VALUES (?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def query_records(self, kind: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按时间倒序读取 todos 或 tips。"""
+        time_column = RECORD_TABLES[kind]
+        sql = f"SELECT payload FROM {kind} ORDER BY {time_column} DESC"
+        params: List[Any] = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+    # ---------- 同步状态 ----------
+
+    @staticmethod
+    def _bump_revision(conn: sqlite3.Connection) -> None:
+        """activities 每次变化时递增 revision（与数据修改在同一事务内）。"""
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def revision(self) -> int:
+        """
+        返回 activities 的数据版本号。
+
+        任何进程写入或删除 activities 都会让它变化，内存缓存可以据此判断是否失效。
+        """
+        value = self.get_state("revision")
+        return int(value) if value else 0
+
+    def get_state(self, key: str) -> Optional[str]:
+        """读取同步状态（如 fetch_time / window_start）。"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, **values: Any) -> None:
+        """批量写入同步状态，值为 None 的 key 会被删除。"""
+        with self._connect() as conn:
+            for key, value in values.items():
+                if value is None:
+                    conn.execute("DELETE FROM sync_state WHERE key = ?", (key,))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                        (key, str(value)),
+                    )
+
+    def clear(self) -> None:
+        """清空所有表（保留数据库文件，避免其他进程持有连接时删除失败）。"""
+        with self._connect() as conn:
+            for table in ("activities", "todos", "tips"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM sync_state WHERE key != 'revision'")
+            self._bump_revision(conn)
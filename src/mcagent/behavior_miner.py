@@ -2,13 +2,43 @@
 """
 从 activities 中提取行为模式，生成候选 clusters。
 """
+import copy
+import functools
+import heapq
 import json
+import logging
 import re
 from collections import defaultdict, Counter
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
+try:
+    from .activity import Activity, ActivityLike, to_activities
+    from .fingerprint import fingerprint_records
+    from .ingest import dedupe_activities
+    from .memory_cache import TTLCache
+    from .minhash import MinHasher, MinHashParams, lsh_candidate_pairs
+    from .telemetry import span
+    from .tfidf import TfidfParams, build_tfidf_matrix, cosine_neighbor_pairs, require_sparse
+except ImportError:
+    from activity import Activity, ActivityLike, to_activities
+    from fingerprint import fingerprint_records
+    from ingest import dedupe_activities
+    from memory_cache import TTLCache
+    from minhash import MinHasher, MinHashParams, lsh_candidate_pairs
+    from telemetry import span
+    from tfidf import TfidfParams, build_tfidf_matrix, cosine_neighbor_pairs, require_sparse
+
+logger = logging.getLogger(__name__)
+
+# 聚类结果缓存：key 为 (activities 指纹, top_n, similarity_threshold, dedupe, engine, 引擎参数)。
+# 轮询时 activities 通常没有变化，指纹相同就直接复用上一次的结果。
+_CLUSTER_MEMO = TTLCache(maxsize=16, ttl=3600.0)
+# 默认的聚类引擎（可选值见 CLUSTER_ENGINES）
+DEFAULT_CLUSTER_ENGINE = "union_find"
+# 子串规则的倒排索引使用的字符 n-gram 长度
+_NGRAM = 3
+
 
 def _extract_keywords(text: str, top_k: int = 3) -> List[str]:
     """
@@ -68,17 +98,41 @@ def _extract_keywords(text: str, top_k: int = 3) -> List[str]:
     return unique_keywords[:top_k]
 
 
-def _calculate_similarity(activity1: Dict[str, Any], activity2: Dict[str, Any]) -> float:
+class _ActivityFeatures:
     """
-    计算两个 activity 的相似度（0-1之间）。
+    聚类用的 activity 特征，每条 activity 只提取一次。
+
+    Attributes:
+        title_lower: 小写标题（标题缺失时为空字符串）
+        tokens: 小写标题按空白切分的词集合
+        keywords: 正文中提取的关键词（保持 _extract_keywords 的顺序，生成 cluster 标题时使用）
+        keyword_set: keywords 的集合（计算相似度时使用）
+    """
+
+    __slots__ = ("title_lower", "tokens", "keywords", "keyword_set")
+
+    def __init__(self, activity: Activity):
+        self.title_lower = activity.title_lower
+        self.tokens = frozenset(self.title_lower.split())
+        self.keywords = tuple(_extract_keywords(activity.content))
+        self.keyword_set = frozenset(self.keywords)
+
+
+def _extract_features(activities: List[Activity]) -> List[_ActivityFeatures]:
+    """提取每条 activity 的聚类特征，下标与 activities 一一对应。"""
+    return [_ActivityFeatures(activity) for activity in activities]
+
+
+def _feature_similarity(features1: _ActivityFeatures, features2: _ActivityFeatures) -> float:
+    """
+    计算两组预先提取的特征的相似度（0-1之间）。
 
     基于以下特征：
     1. 标题相似度
     2. 关键词重叠度
-    3. 时间接近度
     """
-    title1 = (activity1.get("title") or "").lower()
-    title2 = (activity2.get("title") or "").lower()
+    title1 = features1.title_lower
+    title2 = features2.title_lower
 
     if not title1 or not title2:
         return 0.0
@@ -89,15 +143,12 @@ def _calculate_similarity(activity1: Dict[str, Any], activity2: Dict[str, Any])
         title_similarity = 1.0
     elif title1 in title2 or title2 in title1:
         title_similarity = 0.8
-    elif len(set(title1.split()) & set(title2.split())) > 0:
+    elif not features1.tokens.isdisjoint(features2.tokens):
         title_similarity = 0.6
 
     # 2. 关键词相似度
-    content1 = activity1.get("content") or ""
-    content2 = activity2.get("content") or ""
-
-    keywords1 = set(_extract_keywords(content1))
-    keywords2 = set(_extract_keywords(content2))
+    keywords1 = features1.keyword_set
+    keywords2 = features2.keyword_set
 
     if keywords1 and keywords2:
         common_keywords = keywords1 & keywords2
@@ -111,19 +162,35 @@ def _calculate_similarity(activity1: Dict[str, Any], activity2: Dict[str, Any])
     return similarity
 
 
-def _cluster_activities(activities: List[Dict[str, Any]], similarity_threshold: float = 0.6) -> Dict[int, List[Dict[str, Any]]]:
+def _calculate_similarity(activity1: Activity, activity2: Activity) -> float:
     """
-    对 activities 进行聚类。
+    计算两个 activity 的相似度（0-1之间）。
+
+    每次调用都会重新提取特征，只适合单独比较；聚类时先用 _extract_features
+    一次性提取，再调用 _feature_similarity。
+    """
+    return _feature_similarity(_ActivityFeatures(activity1), _ActivityFeatures(activity2))
+
+
+def _cluster_agglomerative(features: List[_ActivityFeatures], similarity_threshold: float = 0.6) -> Dict[int, List[int]]:
+    """
+    对 activities 进行聚类（原始实现，保留作对照）。
 
     使用简单的凝聚聚类方法：
     1. 初始时每个 activity 是一个 cluster
     2. 合并相似度高于阈值的 cluster
+
+    每次合并后都从头重新比较所有 cluster 对，并重新计算成员之间的相似度，
+    复杂度高于 O(n³)，只适合少量 activities。
+
+    Returns:
+        {cluster id: 成员下标列表}
     """
-    if not activities:
+    if not features:
         return {}
 
     # 初始化：每个 activity 是一个 cluster
-    clusters = {i: [activity] for i, activity in enumerate(activities)}
+    clusters = {i: [i] for i in range(len(features))}
     merged = True
 
     # 重复合并直到没有可以合并的 cluster
@@ -141,9 +208,9 @@ def _cluster_activities(activities: List[Dict[str, Any]], similarity_threshold:
 
                 # 计算两个 cluster 的相似度（取最大相似度）
                 max_similarity = 0.0
-                for act1 in cluster1:
-                    for act2 in cluster2:
-                        similarity = _calculate_similarity(act1, act2)
+                for index1 in cluster1:
+                    for index2 in cluster2:
+                        similarity = _feature_similarity(features[index1], features[index2])
                         max_similarity = max(max_similarity, similarity)
 
                 # 如果相似度高于阈值，合并 cluster
@@ -161,19 +228,431 @@ def _cluster_activities(activities: List[Dict[str, Any]], similarity_threshold:
     return clusters
 
 
-def _generate_cluster_title(activities: List[Dict[str, Any]]) -> str:
+class _UnionFind:
+    """并查集：合并时总是以较小的下标为根。"""
+
+    __slots__ = ("parent",)
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a < root_b:
+            self.parent[root_b] = root_a
+        elif root_b < root_a:
+            self.parent[root_a] = root_b
+
+
+def _title_ngrams(title: str, n: int = _NGRAM) -> Set[str]:
+    """标题的字符 n-gram 集合（长度不足 n 时为空）。"""
+    return {title[k:k + n] for k in range(len(title) - n + 1)}
+
+
+def _containment_groups(titles: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    找出互相包含（子串关系）的不同标题。
+
+    子串的每个字符 n-gram 都出现在包含它的标题中，因此用 n-gram 倒排索引取交集得到
+    候选标题，再用 in 确认；短于 n 的标题没有 n-gram，直接扫描所有标题。
+
+    Returns:
+        {标题: 与它有包含关系的其他标题列表}（对称）
+    """
+    distinct = sorted(set(titles))
+    postings: Dict[str, Set[str]] = defaultdict(set)
+    grams_by_title = {}
+    for title in distinct:
+        grams = _title_ngrams(title)
+        grams_by_title[title] = grams
+        for gram in grams:
+            postings[gram].add(title)
+
+    related: Dict[str, List[str]] = defaultdict(list)
+    for title in distinct:
+        grams = grams_by_title[title]
+        if grams:
+            # 从最短的倒排列表开始取交集
+            ordered = sorted((postings[gram] for gram in grams), key=len)
+            candidates = set(ordered[0])
+            for posting in ordered[1:]:
+                candidates &= posting
+                if len(candidates) <= 1:
+                    break
+        else:
+            candidates = distinct
+        for other in candidates:
+            if other != title and title in other:
+                related[title].append(other)
+                related[other].append(title)
+    return related
+
+
+def _candidate_pairs(features: List[_ActivityFeatures]) -> Iterator[Tuple[int, int]]:
+    """
+    生成可能相似的 activity 对 (j, i)，j < i，每对只生成一次。
+
+    相似度大于 0 的两条 activity 都有标题，并且满足以下之一：
+    1. 标题相同或一方包含另一方（子串规则，见 _containment_groups）
+    2. 标题有共同的词
+    3. 有共同的关键词
+
+    按下标顺序扫描，每条 activity 只和倒排索引中已经出现过的 activity 组成候选对，
+    不共享任何特征的 activity 对不会被比较。
+    """
+    related_titles = _containment_groups(f.title_lower for f in features if f.title_lower)
+    by_title: Dict[str, List[int]] = defaultdict(list)
+    by_token: Dict[str, List[int]] = defaultdict(list)
+    by_keyword: Dict[str, List[int]] = defaultdict(list)
+
+    for i, feature in enumerate(features):
+        title = feature.title_lower
+        if not title:
+            continue
+
+        candidates = set(by_title.get(title, ()))
+        for other in related_titles.get(title, ()):
+            candidates.update(by_title.get(other, ()))
+        for token in feature.tokens:
+            candidates.update(by_token.get(token, ()))
+        for keyword in feature.keyword_set:
+            candidates.update(by_keyword.get(keyword, ()))
+
+        for j in sorted(candidates):
+            yield j, i
+
+        by_title[title].append(i)
+        for token in feature.tokens:
+            by_token[token].append(i)
+        for keyword in feature.keyword_set:
+            by_keyword[keyword].append(i)
+
+
+def _group_features(features: List[_ActivityFeatures]) -> Tuple[List[_ActivityFeatures], List[List[int]]]:
+    """
+    把特征完全相同（小写标题和关键词集合都相同）的 activity 分成一组。
+
+    同一组的 activity 与任何其他 activity 的相似度都相同，只需要比较一次。
+
+    Returns:
+        (每组的代表特征, 每组的成员下标列表)，组按第一个成员的下标排列，组内下标升序
+    """
+    group_ids: Dict[Tuple[str, frozenset], int] = {}
+    representatives: List[_ActivityFeatures] = []
+    members: List[List[int]] = []
+    for index, feature in enumerate(features):
+        key = (feature.title_lower, feature.keyword_set)
+        group = group_ids.get(key)
+        if group is None:
+            group = group_ids[key] = len(representatives)
+            representatives.append(feature)
+            members.append([])
+        members[group].append(index)
+    return representatives, members
+
+
+def _order_like_agglomerative(
+    root: int,
+    neighbors: Dict[int, List[int]],
+    members: List[List[int]],
+    group_of: List[int],
+) -> List[int]:
+    """
+    按原始凝聚聚类的合并顺序排列一个连通分量的成员。
+
+    原始实现每次合并的都是下标最小的 cluster 和与它相连的、下标最小的 cluster，
+    因此成员顺序等价于从最小下标出发、每次取边界上下标最小的节点的遍历。
+
+    图是按组给出的：neighbors 是组之间的边（组和自身相似时包含自身）。访问一个成员后，
+    相邻组的所有成员都进入边界，因此每组只需要展开一次。
+
+    Args:
+        root: 分量中最小的组下标
+        neighbors: {组下标: 相邻的组下标列表}
+        members: 每组的成员下标列表
+        group_of: 每个成员所在的组下标
+    """
+    order = []
+    visited = set()
+    expanded = set()
+    frontier = [members[root][0]]
+    while frontier:
+        index = heapq.heappop(frontier)
+        if index in visited:
+            continue
+        visited.add(index)
+        order.append(index)
+        for group in neighbors.get(group_of[index], ()):
+            if group not in expanded:
+                expanded.add(group)
+                for member in members[group]:
+                    if member not in visited:
+                        heapq.heappush(frontier, member)
+    return order
+
+
+def _link_groups(
+    features: List[_ActivityFeatures],
+    similarity_threshold: float,
+    candidate_pairs: Callable[[List[_ActivityFeatures]], Iterable[Tuple[int, int]]],
+) -> Dict[int, List[int]]:
+    """
+    把特征相同的 activity 分组，对候选组对计算相似度，按单链接合并成连通分量。
+
+    Args:
+        features: 每条 activity 的特征
+        similarity_threshold: 相似度阈值
+        candidate_pairs: 根据每组的代表特征生成候选组对 (g, h)，g < h
+
+    Returns:
+        {cluster id: 成员下标列表}，cluster id 是成员中最小的下标，按 cluster id 升序
+    """
+    if not features:
+        return {}
+
+    n = len(features)
+    if similarity_threshold <= 0:
+        # 相似度不小于 0，所有 activity 都在同一个 cluster
+        return {0: list(range(n))}
+
+    representatives, members = _group_features(features)
+    group_of = [0] * n
+    for group, group_members in enumerate(members):
+        for index in group_members:
+            group_of[index] = group
+
+    union_find = _UnionFind(len(representatives))
+    neighbors: Dict[int, List[int]] = defaultdict(list)
+    for group, feature in enumerate(representatives):
+        if _feature_similarity(feature, feature) >= similarity_threshold:
+            neighbors[group].append(group)
+    for g, h in candidate_pairs(representatives):
+        if _feature_similarity(representatives[g], representatives[h]) >= similarity_threshold:
+            union_find.union(g, h)
+            neighbors[g].append(h)
+            neighbors[h].append(g)
+
+    clusters: Dict[int, List[int]] = {}
+    for group in range(len(representatives)):
+        if union_find.find(group) != group:
+            continue
+        if group in neighbors:
+            clusters[members[group][0]] = _order_like_agglomerative(group, neighbors, members, group_of)
+        else:
+            # 孤立且与自身不相似的组：每个成员单独成为一个 cluster
+            for index in members[group]:
+                clusters[index] = [index]
+    return dict(sorted(clusters.items()))
+
+
+def _cluster_union_find(features: List[_ActivityFeatures], similarity_threshold: float = 0.6) -> Dict[int, List[int]]:
+    """
+    对 activities 进行聚类（并查集实现）。
+
+    原始实现的合并规则是单链接：两个 cluster 中任意一对成员的相似度达到阈值就合并，
+    最终结果就是"相似度 >= 阈值"的边构成的图的连通分量。这里先把特征相同的 activity
+    分组（见 _group_features），只对共享特征的候选组对（见 _candidate_pairs）计算一次
+    相似度，用并查集合并连通分量，结果（cluster id、成员及其顺序）与原始实现完全一致。
+
+    Returns:
+        {cluster id: 成员下标列表}
+    """
+    return _link_groups(features, similarity_threshold, _candidate_pairs)
+
+
+def _shingles(feature: _ActivityFeatures, size: int) -> Set[str]:
+    """
+    MinHash 使用的 shingle：标题的字符 shingle + 正文关键词。
+
+    正文只取关键词（与相似度计算使用的特征一致），避免长正文稀释标题的 Jaccard 相似度。
+    没有标题的 activity 相似度恒为 0，返回空集合，不参与分桶。
+    """
+    title = feature.title_lower
+    if not title:
+        return set()
+    shingles = {title[k:k + size] for k in range(len(title) - size + 1)} or {title}
+    shingles.update("\0" + keyword.lower() for keyword in feature.keyword_set)
+    return shingles
+
+
+def _cluster_minhash(
+    features: List[_ActivityFeatures],
+    similarity_threshold: float = 0.6,
+    params: Optional[MinHashParams] = None,
+) -> Dict[int, List[int]]:
+    """
+    对 activities 进行近似聚类（MinHash + LSH 实现）。
+
+    候选组对来自 LSH 分桶（见 minhash.lsh_candidate_pairs），仍然用 _feature_similarity
+    确认是否达到阈值，因此不会产生错误的合并；但相似度达到阈值、shingle 的 Jaccard
+    相似度却较低的组对（例如只共享 "-" 这样的常见词的中英文标题）可能落不进同一个桶，
+    得到的 cluster 可能比精确引擎拆得更细。
+    召回和速度通过 MinHashParams 调节。
+
+    Args:
+        features: 每条 activity 的特征
+        similarity_threshold: 相似度阈值
+        params: MinHash / LSH 参数（默认 MinHashParams()）
+
+    Returns:
+        {cluster id: 成员下标列表}
+    """
+    params = params or MinHashParams()
+    hasher = MinHasher(params)
+
+    def candidate_pairs(representatives: List[_ActivityFeatures]) -> Iterable[Tuple[int, int]]:
+        signatures = [hasher.signature(_shingles(feature, params.shingle_size)) for feature in representatives]
+        return lsh_candidate_pairs(signatures, params)
+
+    return _link_groups(features, similarity_threshold, candidate_pairs)
+
+
+def _tfidf_terms(feature: _ActivityFeatures, ngram_size: int) -> List[str]:
+    """
+    TF-IDF 使用的词项：标题词 + 标题字符 n-gram + 正文关键词（加前缀区分来源）。
+
+    没有标题的 activity 相似度恒为 0，返回空列表（全零行）。
+    """
+    title = feature.title_lower
+    if not title:
+        return []
+    terms = ["w:" + token for token in feature.tokens]
+    terms.extend("c:" + title[k:k + ngram_size] for k in range(len(title) - ngram_size + 1))
+    terms.extend("k:" + keyword.lower() for keyword in feature.keyword_set)
+    return terms
+
+
+def _cluster_tfidf(
+    features: List[_ActivityFeatures],
+    similarity_threshold: float = 0.6,
+    params: Optional[TfidfParams] = None,
+) -> Dict[int, List[int]]:
+    """
+    对 activities 进行近似聚类（稀疏 TF-IDF 实现，依赖 numpy / scipy）。
+
+    一次性把每组的词项构建成稀疏 TF-IDF 矩阵，分块计算余弦相似度达到
+    params.min_cosine 的近邻（每组最多 params.max_neighbors 个）作为候选组对
+    （见 tfidf.cosine_neighbor_pairs），再用 _feature_similarity 确认是否达到阈值。
+    与 minhash 引擎一样不会错误合并，余弦相似度低于 min_cosine 或不在前
+    max_neighbors 个近邻中的组对会被漏掉；min_cosine 越低、max_neighbors 越大，
+    召回越高、越慢。
+
+    Args:
+        features: 每条 activity 的特征
+        similarity_threshold: 相似度阈值
+        params: TF-IDF 参数（默认 TfidfParams()）
+
+    Returns:
+        {cluster id: 成员下标列表}
+    """
+    params = params or TfidfParams()
+
+    def candidate_pairs(representatives: List[_ActivityFeatures]) -> Iterable[Tuple[int, int]]:
+        matrix = build_tfidf_matrix([_tfidf_terms(feature, params.ngram_size) for feature in representatives])
+        return cosine_neighbor_pairs(matrix, params.min_cosine, params.chunk_size, params.max_neighbors)
+
+    return _link_groups(features, similarity_threshold, candidate_pairs)
+
+
+# 可选的聚类引擎：输入预先提取的特征，输出 {cluster id: 成员下标列表}
+# union_find / agglomerative 结果相同，性能不同；minhash / tfidf 是近似引擎，用于超大规模的时间窗口
+CLUSTER_ENGINES = {
+    "union_find": _cluster_union_find,
+    "agglomerative": _cluster_agglomerative,
+    "minhash": _cluster_minhash,
+    "tfidf": _cluster_tfidf,
+}
+
+
+def _engine_params(
+    engine: str,
+    minhash: Optional[MinHashParams] = None,
+    tfidf: Optional[TfidfParams] = None,
+) -> Optional[Tuple]:
+    """取 engine 使用的参数（其他引擎的参数被忽略）。"""
+    return {"minhash": minhash, "tfidf": tfidf}.get(engine)
+
+
+def _get_cluster_engine(
+    engine: str,
+    minhash: Optional[MinHashParams] = None,
+    tfidf: Optional[TfidfParams] = None,
+):
+    """
+    按名称取聚类引擎，未知名称时抛出 ValueError；tfidf 引擎缺少 numpy / scipy 时抛出 ImportError。
+
+    minhash / tfidf 引擎使用给定的参数（None 时使用默认参数）。
+    """
+    try:
+        cluster_engine = CLUSTER_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"未知的聚类引擎: {engine}（可选: {', '.join(CLUSTER_ENGINES)}）") from None
+    if engine == "tfidf":
+        require_sparse()
+    params = _engine_params(engine, minhash, tfidf)
+    if params is not None:
+        return functools.partial(cluster_engine, params=params)
+    return cluster_engine
+
+
+def _cluster_activities(
+    activities: List[Activity],
+    similarity_threshold: float = 0.6,
+    engine: str = DEFAULT_CLUSTER_ENGINE,
+    features: Optional[List[_ActivityFeatures]] = None,
+    minhash: Optional[MinHashParams] = None,
+    tfidf: Optional[TfidfParams] = None,
+) -> Dict[int, List[Activity]]:
+    """
+    对 activities 进行聚类。
+
+    Args:
+        activities: Activity 列表
+        similarity_threshold: 相似度阈值
+        engine: 聚类引擎（见 CLUSTER_ENGINES）
+        features: 预先提取的特征（None 时在这里提取）
+        minhash: minhash 引擎的参数（None 时使用默认参数）
+        tfidf: tfidf 引擎的参数（None 时使用默认参数）
+
+    Returns:
+        {cluster id: 成员列表}，cluster id 是成员中最小的下标
+    """
+    if features is None:
+        features = _extract_features(activities)
+    clusters = _get_cluster_engine(engine, minhash, tfidf)(features, similarity_threshold)
+    return {
+        cluster_id: [activities[index] for index in members]
+        for cluster_id, members in clusters.items()
+    }
+
+
+def _generate_cluster_title(
+    activities: List[Activity],
+    features: Optional[List[_ActivityFeatures]] = None,
+) -> str:
     """
     为 cluster 生成标题。
 
     策略：
     1. 找出最常见的标题
     2. 如果没有，找最常见的关键词
+
+    Args:
+        activities: cluster 成员
+        features: 与 activities 一一对应的预先提取的特征（None 时重新提取关键词）
     """
     if not activities:
         return "Unknown"
 
     # 1. 统计标题
-    titles = [act.get("title") or "" for act in activities]
+    titles = [act.title or "" for act in activities]
     title_counts = Counter(titles)
     most_common_title = title_counts.most_common(1)[0][0]
 
@@ -182,10 +661,12 @@ def _generate_cluster_title(activities: List[Dict[str, Any]]) -> str:
 
     # 2. 统计关键词
     all_keywords = []
-    for act in activities:
-        content = act.get("content") or ""
-        keywords = _extract_keywords(content)
-        all_keywords.extend(keywords)
+    if features is not None:
+        for feature in features:
+            all_keywords.extend(feature.keywords)
+    else:
+        for act in activities:
+            all_keywords.extend(_extract_keywords(act.content))
 
     if all_keywords:
         keyword_counts = Counter(all_keywords)
@@ -195,10 +676,12 @@ def _generate_cluster_title(activities: List[Dict[str, Any]]) -> str:
     return "Mixed Activities"
 
 
-def _calculate_time_range(activities: List[Dict[str, Any]]) -> Dict[str, str]:
+def _calculate_time_range(activities: List[Activity]) -> Dict[str, Any]:
     """
     计算 cluster 的时间范围。
 
+    使用入库时预解析的 start_ts / end_ts 比较，输出原始时间字符串。
+
     Returns:
         {
             "start": "最早开始时间",
@@ -209,39 +692,25 @@ def _calculate_time_range(activities: List[Dict[str, Any]]) -> Dict[str, str]:
     if not activities:
         return {"start": None, "end": None, "duration_days": 0}
 
-    all_start_times = []
-    all_end_times = []
+    starts = [(act.start_ts, act.start_time) for act in activities if act.start_ts is not None]
+    ends = [(act.end_ts, act.end_time) for act in activities if act.end_ts is not None]
 
-    for act in activities:
-        start_time = act.get("start_time")
-        end_time = act.get("end_time")
-
-        if start_time:
-            all_start_times.append(start_time)
-        if end_time:
-            all_end_times.append(end_time)
-
-    if not all_start_times and not all_end_times:
+    if not starts and not ends:
         return {"start": None, "end": None, "duration_days": 0}
 
     # 如果没有 start_time，使用 end_time 作为 start_time
-    if not all_start_times:
-        all_start_times = all_end_times[:]
+    if not starts:
+        starts = ends[:]
 
     # 如果没有 end_time，使用 start_time 作为 end_time
-    if not all_end_times:
-        all_end_times = all_start_times[:]
+    if not ends:
+        ends = starts[:]
 
-    start_time = min(all_start_times)
-    end_time = max(all_end_times)
+    start_ts, start_time = min(starts, key=lambda item: item[0])
+    end_ts, end_time = max(ends, key=lambda item: item[0])
 
     # 计算持续天数
-    try:
-        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-        end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-        duration_days = (end_dt - start_dt).days + 1
-    except:
-        duration_days = 1
+    duration_days = (end_ts - start_ts) // 86400 + 1
 
     return {
         "start": start_time,
@@ -251,71 +720,113 @@ def _calculate_time_range(activities: List[Dict[str, Any]]) -> Dict[str, str]:
 
 
 def generate_behavior_clusters(
-    activities: List[Dict[str, Any]],
+    activities: List[ActivityLike],
     top_n: int = 5,
-    similarity_threshold: float = 0.6
+    similarity_threshold: float = 0.6,
+    dedupe: bool = True,
+    engine: str = DEFAULT_CLUSTER_ENGINE,
+    minhash: Optional[MinHashParams] = None,
+    tfidf: Optional[TfidfParams] = None,
 ) -> List[Dict[str, Any]]:
     """
     从 activities 生成行为候选 clusters。
 
     Args:
-        activities: activities 列表
+        activities: activities 列表（dict 或 Activity，dict 会在这里转换一次）
         top_n: 返回前 N 个 clusters
         similarity_threshold: 聚类相似度阈值
+        dedupe: 聚类前是否按 id 去重并折叠连续的近似重复（见 ingest.dedupe_activities）
+        engine: 聚类引擎（见 CLUSTER_ENGINES，默认并查集实现；超大规模的时间窗口可用近似的 minhash / tfidf 引擎）
+        minhash: minhash 引擎的参数（MinHashParams，调节召回和速度；其他引擎忽略）
+        tfidf: tfidf 引擎的参数（TfidfParams，调节召回和速度；其他引擎忽略）
 
     Returns:
         候选 clusters 列表，每个 cluster 包含：
         - candidate_id: 候选ID
         - title: 标题
-        - freq: 出现频率（次数）
+        - freq: 出现频率（次数，折叠的记录按 count 计）
         - time_range: 时间范围
         - sample_activity_ids: 示例 activity ID 列表（1-2 条）
     """
+    with span("filter.activities") as s:
+        activities = to_activities(activities)
+        s.count("items", len(activities))
     if not activities:
-        print("[WARN] activities 列表为空")
+        logger.warning("activities 列表为空")
         return []
 
-    print(f"[INFO] 开始聚类分析，共 {len(activities)} 个 activities...")
+    _get_cluster_engine(engine, minhash, tfidf)
 
-    # 1. 聚类
-    clusters = _cluster_activities(activities, similarity_threshold)
-    print(f"[INFO] 生成 {len(clusters)} 个 clusters")
+    memo_key = (
+        fingerprint_records(activities), top_n, similarity_threshold, dedupe,
+        engine, _engine_params(engine, minhash, tfidf),
+    )
+    memo = _CLUSTER_MEMO.get(memo_key)
+    if memo is not None:
+        logger.info(f"activities 未变化，复用上一次的 {len(memo)} 个 clusters")
+        return copy.deepcopy(memo)
+
+    if dedupe:
+        with span("ingest") as s:
+            s.count("input", len(activities))
+            activities = dedupe_activities(activities)
+            s.count("items", len(activities))
+
+    logger.info(f"开始聚类分析，共 {len(activities)} 个 activities...")
+
+    # 1. 提取特征（每条 activity 只提取一次）
+    with span("features") as s:
+        features = _extract_features(activities)
+        s.count("items", len(features))
+
+    # 2. 聚类
+    with span("cluster", threshold=similarity_threshold, engine=engine) as s:
+        clusters = _cluster_activities(
+            activities, similarity_threshold, engine, features=features, minhash=minhash, tfidf=tfidf
+        )
+        s.count("items", len(activities))
+        s.count("clusters", len(clusters))
+    logger.info(f"生成 {len(clusters)} 个 clusters")
 
-    # 2. 为每个 cluster 生成信息
+    # 3. 为每个 cluster 生成信息（同一个 Activity 对象的特征相同，按对象查找）
+    features_by_activity = {id(act): feature for act, feature in zip(activities, features)}
     cluster_infos = []
     for cluster_id, cluster_activities in clusters.items():
         # 按时间排序（最新的在前）
         cluster_activities.sort(
-            key=lambda x: x.get("end_time") or x.get("start_time") or "",
+            key=lambda x: x.sort_ts if x.sort_ts is not None else float("-inf"),
             reverse=True
         )
 
         # 生成 cluster 信息
         cluster_info = {
             "candidate_id": f"candidate_{cluster_id}",
-            "title": _generate_cluster_title(cluster_activities),
-            "freq": len(cluster_activities),
+            "title": _generate_cluster_title(
+                cluster_activities, [features_by_activity[id(act)] for act in cluster_activities]
+            ),
+            "freq": sum(act.count for act in cluster_activities),
             "time_range": _calculate_time_range(cluster_activities),
             "sample_activity_ids": [
-                act.get("id") for act in cluster_activities[:2] if act.get("id")
+                act.id for act in cluster_activities[:2] if act.id
             ],
             "activities": cluster_activities  # 包含所有 activities，便于调试
         }
 
         cluster_infos.append(cluster_info)
 
-    # 3. 按频率排序，取前 N 个
+    # 4. 按频率排序，取前 N 个
     cluster_infos.sort(key=lambda x: x["freq"], reverse=True)
     top_clusters = cluster_infos[:top_n]
 
-    # 4. 移除调试信息（activities 字段）
+    # 5. 移除调试信息（activities 字段）
     for cluster in top_clusters:
         del cluster["activities"]
 
-    print(f"[INFO] 返回 Top {len(top_clusters)} clusters:")
+    logger.info(f"返回 Top {len(top_clusters)} clusters:")
     for cluster in top_clusters:
-        print(f"  - {cluster['title']}: {cluster['freq']} 次")
+        logger.info(f"  - {cluster['title']}: {cluster['freq']} 次")
 
+    _CLUSTER_MEMO.set(memo_key, copy.deepcopy(top_clusters))
     return top_clusters
 
 
@@ -323,7 +834,10 @@ def mine_behaviors(
     days: int = 7,
     top_n: int = 5,
     use_cache: bool = True,
-    similarity_threshold: float = 0.6
+    similarity_threshold: float = 0.6,
+    engine: str = DEFAULT_CLUSTER_ENGINE,
+    minhash: Optional[MinHashParams] = None,
+    tfidf: Optional[TfidfParams] = None,
 ) -> List[Dict[str, Any]]:
     """
     主函数：挖掘指定天数内的行为模式。
@@ -333,6 +847,9 @@ def mine_behaviors(
         top_n: 返回前 N 个 clusters
         use_cache: 是否使用缓存
         similarity_threshold: 聚类相似度阈值
+        engine: 聚类引擎（见 CLUSTER_ENGINES）
+        minhash: minhash 引擎的参数（见 generate_behavior_clusters）
+        tfidf: tfidf 引擎的参数（见 generate_behavior_clusters）
 
     Returns:
         候选 clusters 列表
@@ -343,25 +860,30 @@ def mine_behaviors(
     except ImportError:
         from context_wrapper import get_activities
 
-    # 获取 activities
-    activities = get_activities(days=days, use_cache=use_cache)
-
-    if not activities:
-        print(f"[WARN] 未获取到 {days} 天内的 activities")
-        return []
-
-    # 生成 clusters
-    clusters = generate_behavior_clusters(
-        activities=activities,
-        top_n=top_n,
-        similarity_threshold=similarity_threshold
-    )
+    with span("mine", days=days, top_n=top_n, engine=engine):
+        # 获取 activities
+        activities = get_activities(days=days, use_cache=use_cache)
+
+        if not activities:
+            logger.warning(f"未获取到 {days} 天内的 activities")
+            return []
+
+        # 生成 clusters（入库时一次性转换成 Activity）
+        clusters = generate_behavior_clusters(
+            activities=to_activities(activities),
+            top_n=top_n,
+            similarity_threshold=similarity_threshold,
+            engine=engine,
+            minhash=minhash,
+            tfidf=tfidf,
+        )
 
-    return clusters
+        return clusters
 
 
 if __name__ == "__main__":
     # 测试
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     clusters = mine_behaviors(days=7, top_n=5)
     print("\n=== 最终结果 ===")
     print(json.dumps(clusters, ensure_ascii=False, indent=2))
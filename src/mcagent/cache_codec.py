@@ -0,0 +1,206 @@
+# cache_codec.py
+"""
+activities 缓存的紧凑二进制格式（.mcb），支持 mmap 按需读取。
+
+布局（小端序，各段按 8 字节对齐）：
+
+    magic       b"MCB1"
+    u32         header 长度
+    header      JSON：元信息（fetch_time / days / window_start / watermark / source）+ count
+    f64[n]      end_ts 列：每条记录的 end_time（缺失时用 start_time）epoch 秒，无法解析为 NaN
+    u64[n+1]    记录偏移表（相对 records 段起点）
+    records     每条记录一段紧凑 JSON（UTF-8）
+
+时间窗口过滤只扫描 end_ts 列，只有命中的记录才会被解码成 dict，
+因此加载 10 万条的缓存时不会一次性构建全部 Python 对象。
+"""
+import json
+import math
+import mmap
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+MAGIC = b"MCB1"
+_ALIGN = 8
+
+
+def _pad(length: int) -> int:
+    """返回补齐到 8 字节边界需要的字节数。"""
+    return (-length) % _ALIGN
+
+
+def _end_ts(activity: Dict[str, Any]) -> float:
+    """activity 的 end_time（缺失时用 start_time）转 epoch 秒，无法解析时为 NaN。"""
+    time_str = activity.get("end_time") or activity.get("start_time")
+    if not time_str:
+        return math.nan
+    try:
+        return datetime.fromisoformat(time_str.replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def encode_binary_cache(meta: Dict[str, Any], activities: List[Dict[str, Any]]) -> bytes:
+    """
+    把缓存元信息和 activities 编码成 .mcb 字节串。
+
+    Args:
+        meta: 缓存元信息（不包含 activities）
+        activities: activities 列表
+
+    Returns:
+        编码后的字节串
+    """
+    count = len(activities)
+    header = json.dumps(dict(meta, count=count), ensure_ascii=False).encode("utf-8")
+
+    blobs = [
+        json.dumps(activity, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for activity in activities
+    ]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    parts = [MAGIC, struct.pack("<I", len(header)), header]
+    parts.append(b"\0" * _pad(len(MAGIC) + 4 + len(header)))
+    parts.append(struct.pack(f"<{count}d", *(_end_ts(a) for a in activities)))
+    parts.append(struct.pack(f"<{count + 1}Q", *offsets))
+    parts.extend(blobs)
+    return b"".join(parts)
+
+
+class BinaryActivityCache:
+    """
+    通过 mmap 只读访问 .mcb 缓存
+
+    header 和 end_ts 列在打开时读取；记录只在被访问时解码。
+    使用完毕后需要 close()（或使用 with 语句），Windows 上映射中的文件无法被替换。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开缓存文件
+
+        Args:
+            path: .mcb 文件路径
+
+        Raises:
+            ValueError: 文件不是有效的 .mcb 格式
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise ValueError(f"无效的二进制缓存文件: {path}")
+
+        try:
+            self._parse_layout()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_layout(self) -> None:
+        """解析 header 并定位各段。"""
+        mm = self._mmap
+        if mm[:4] != MAGIC:
+            raise ValueError(f"无效的二进制缓存文件: {self.path}")
+
+        (header_len,) = struct.unpack_from("<I", mm, 4)
+        header_end = 8 + header_len
+        self.meta: Dict[str, Any] = json.loads(mm[8:header_end].decode("utf-8"))
+        self._count = int(self.meta.pop("count"))
+
+        ts_start = header_end + _pad(header_end)
+        offsets_start = ts_start + 8 * self._count
+        self._records_start = offsets_start + 8 * (self._count + 1)
+
+        view = memoryview(mm)
+        self._views = [view]
+        self._end_ts = view[ts_start:offsets_start].cast("d")
+        self._offsets = view[offsets_start:self._records_start].cast("Q")
+        self._views.extend([self._end_ts, self._offsets])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = self._records_start + self._offsets[index]
+        end = self._records_start + self._offsets[index + 1]
+        return json.loads(self._mmap[start:end].decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self._count):
+            yield self[index]
+
+    def end_ts(self, index: int) -> Optional[float]:
+        """返回第 index 条记录的 end_ts，无法解析时返回 None（不解码记录本身）。"""
+        value = self._end_ts[index]
+        return None if math.isnan(value) else value
+
+    def iter_window(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按时间窗口遍历记录，只解码落在窗口内的记录。
+
+        Args:
+            start: 窗口起点（包含），None 表示不限制
+            end: 窗口终点（包含），None 表示不限制
+        """
+        start_ts = start.timestamp() if start is not None else -math.inf
+        end_ts = end.timestamp() if end is not None else math.inf
+        for index in range(self._count):
+            value = self._end_ts[index]
+            # NaN 的比较结果总是 False，时间无法解析的记录会被跳过
+            if start_ts <= value <= end_ts:
+                yield self[index]
+
+    def close(self) -> None:
+        """释放 memoryview、mmap 和文件句柄。"""
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "BinaryActivityCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_binary_cache(
+    path: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    读取 .mcb 缓存，返回和 JSON 缓存相同结构的 dict。
+
+    Args:
+        path: .mcb 文件路径
+        start: 只解码不早于该时间的记录（默认全部）
+        end: 只解码不晚于该时间的记录（默认全部）
+
+    Returns:
+        {**meta, "activities": [...]}
+    """
+    with BinaryActivityCache(path) as cache:
+        if start is None and end is None:
+            activities = list(cache)
+        else:
+            activities = list(cache.iter_window(start, end))
+        return dict(cache.meta, activities=activities)
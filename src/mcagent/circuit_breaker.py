@@ -0,0 +1,114 @@
+# circuit_breaker.py
+"""
+MineContext 服务的熔断器。
+
+MineContext 未启动时，每次调用都要等满连接超时才会降级。熔断器在连续失败
+达到阈值后打开，之后的调用直接失败（由调用方返回结构化错误或缓存数据），
+每隔 recovery_timeout 秒放行一次半开探测：探测成功则恢复，失败则继续熔断。
+
+状态：
+    closed     正常放行，统计连续失败次数
+    open       直接拒绝，直到冷却时间结束
+    half_open  冷却结束后只放行一个探测请求，其余请求继续拒绝
+"""
+import threading
+import time
+from typing import Callable
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """熔断器打开时抛出；继承 ConnectionError，现有的连接失败处理逻辑可以直接复用。"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"MineContext 暂不可用（熔断中），{retry_after:.0f} 秒后重试探测")
+
+
+class CircuitBreaker:
+    """
+    线程安全的熔断器
+
+    调用方在请求前调用 before_call()，请求结束后根据结果调用
+    record_success() 或 record_failure()。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化
+
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            recovery_timeout: 打开后多久放行一次半开探测（秒）；
+                探测请求超过这个时间仍未报告结果时，允许新的探测
+            clock: 时间函数（测试时可替换）
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """当前状态（open 状态冷却结束后在下一次 before_call 时才切换到 half_open）。"""
+        with self._lock:
+            return self._state
+
+    def retry_after(self) -> float:
+        """距离下一次允许探测还有多少秒，closed 状态下为 0。"""
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> float:
+        if self._state == CLOSED:
+            return 0.0
+        since = self._opened_at if self._state == OPEN else self._probe_at
+        return max(0.0, since + self.recovery_timeout - self._clock())
+
+    def before_call(self) -> None:
+        """
+        请求前检查是否放行。
+
+        Raises:
+            CircuitOpenError: 熔断中，或半开状态下已有探测请求在进行
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._retry_after_locked() > 0:
+                raise CircuitOpenError(self._retry_after_locked())
+            # 冷却结束（或上一个探测超时未报告），放行一个探测请求
+            self._state = HALF_OPEN
+            self._probe_at = self._clock()
+
+    def record_success(self) -> None:
+        """请求成功（服务可达），恢复到 closed 状态。"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """请求失败（服务不可达）；半开探测失败或连续失败达到阈值时打开熔断器。"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def reset(self) -> None:
+        """手动恢复到 closed 状态。"""
+        self.record_success()
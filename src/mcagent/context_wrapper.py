@@ -1,15 +1,121 @@
 # minecontext_wrapper.py
+import asyncio
+import copy
 import json
+import logging
 import requests
-from typing import Any, Dict, List, Optional
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import pathlib
 import os
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:  # 可选依赖：未安装时异步 API 退化为线程池调用同步版本
+    httpx = None
+
+try:
+    from .activity import Activity
+    from .activity_archive import ActivityArchive, RetentionPolicy
+    from .activity_store import ActivityStore
+    from .cache_codec import encode_binary_cache, read_binary_cache
+    from .circuit_breaker import CircuitBreaker, CircuitOpenError
+    from .file_lock import FileLock, LockTimeout, atomic_write_bytes
+    from .fingerprint import combine_fingerprints, fingerprint_sections
+    from .json_stream import JSONArrayStream
+    from .request_policy import RequestBudget, RequestPolicy
+    from .telemetry import record_span, span
+except ImportError:
+    from activity import Activity
+    from activity_archive import ActivityArchive, RetentionPolicy
+    from activity_store import ActivityStore
+    from cache_codec import encode_binary_cache, read_binary_cache
+    from circuit_breaker import CircuitBreaker, CircuitOpenError
+    from file_lock import FileLock, LockTimeout, atomic_write_bytes
+    from fingerprint import combine_fingerprints, fingerprint_sections
+    from json_stream import JSONArrayStream
+    from request_policy import RequestBudget, RequestPolicy
+    from telemetry import record_span, span
+
+logger = logging.getLogger(__name__)
 
 # MineContext API 配置
 MINECONTEXT_BASE_URL = "http://127.0.0.1:1733"
 CONTEXTS_ENDPOINT = "/contexts"
 CACHE_DIR = "data"
+# 缓存后端：
+# - "sqlite"（默认）：data/minecontext.db
+# - "json"：按天的 cache_activities_YYYYMMDD.json
+# - "binary"：按天的 cache_activities_YYYYMMDD.mcb（紧凑二进制格式，mmap 按需读取）
+# - "archive"：data/archive/ 下按 activity 日期分段的归档，查询最近 N 天只打开 N 个分段
+CACHE_BACKEND = "sqlite"
+CACHE_FILE_EXTENSIONS = {"json": ".json", "binary": ".mcb"}
+CACHE_DB_NAME = "minecontext.db"
+# 使用存储对象（而不是缓存文件）的后端
+STORE_BACKENDS = ("sqlite", "archive")
+CACHE_ARCHIVE_DIR = "archive"
+# 归档的保留策略：30 天前的按天分段合并成按月分段，不过期
+ARCHIVE_RETENTION = RetentionPolicy(max_days=None, compact_after_days=30)
+SAMPLES_PATH = "samples/sample_activities.json"
+API_ENDPOINTS = {
+    "reports": "/api/debug/reports",
+    "todos": "/api/debug/todos",
+    "activities": "/api/debug/activities",
+    "tips": "/api/debug/tips",
+}
+# 摘要的抓取计划：只请求 compress_home_context 用得到的 section
+# （reports 不参与压缩，摘要从不抓取）；section 按 API_ENDPOINTS 的顺序书写
+SUMMARY_SECTIONS = ("todos", "activities", "tips")
+TASK_FETCH_PLANS = {
+    # 排查错误：关注最近在做什么和手头的待办
+    "debug_error": ("todos", "activities"),
+    "implement_feature": SUMMARY_SECTIONS,
+    "refactor": SUMMARY_SECTIONS,
+    "unknown": SUMMARY_SECTIONS,
+}
+# detail_level 为 low 时只需要待办
+LOW_DETAIL_SECTIONS = ("todos",)
+# get_activities 分页拉取时每页的条数
+ACTIVITY_PAGE_SIZE = 200
+# 流式解析 activities 响应时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+# 共享 Session 的连接池大小（至少覆盖并发请求的端点数）
+HTTP_POOL_SIZE = 8
+# 熔断器：连续 N 次请求 MineContext 不可达后熔断，之后每隔 M 秒放行一次探测
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RECOVERY_TIMEOUT = 30.0
+# 请求策略：同一次调用的请求共享整体预算，单个请求的超时随剩余预算缩短，
+# 连接失败 / 超时 / 429 / 5xx 带抖动重试
+# - 摘要：整体 5 秒，单个请求最多 2.5 秒（第一次失败后仍有时间重试）
+# - 分页拉取 activities：整体 120 秒，单页最多 30 秒
+SUMMARY_REQUEST_POLICY = RequestPolicy(total_deadline=5.0, request_timeout=2.5, max_attempts=3)
+ACTIVITY_REQUEST_POLICY = RequestPolicy(total_deadline=120.0, request_timeout=30.0, max_attempts=3)
+# 跨进程的拉取锁（data/.fetch.lock）：同一时间只有一个进程从 MineContext 拉取 activities，
+# 其他进程等它写完缓存后直接读取；等待超过 FETCH_LOCK_TIMEOUT 秒时不再等待，各自拉取
+FETCH_LOCK_NAME = ".fetch.lock"
+FETCH_LOCK_TIMEOUT = 120.0
+
+_STORE: Optional[ActivityStore] = None
+_ARCHIVE: Optional[ActivityArchive] = None
+_SESSION: Optional[requests.Session] = None
+_FETCH_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_SESSION_LOCK = threading.Lock()
+# 异步 API 使用的 httpx.AsyncClient，按事件循环缓存
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_BREAKER = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RECOVERY_TIMEOUT)
+# 最近一次成功的摘要（stale-while-revalidate）：(task_type, detail_level) -> (生成时间, summary)
+_SUMMARY_CACHE: Dict[Any, Any] = {}
+_SUMMARY_REFRESHING: set = set()
+_SUMMARY_LOCK = threading.Lock()
+# 每个抓取计划上一次压缩的 (数据指纹, 压缩结果)：数据没变化时跳过保存和压缩
+_COMPRESSED_MEMO: Dict[Tuple[str, ...], tuple] = {}
+# 进程内正在进行的 get_activities 拉取（single-flight）：(days, use_cache, sync) -> _Flight
+_FLIGHTS: Dict[Tuple[int, bool, bool], "_Flight"] = {}
+_FLIGHTS_LOCK = threading.Lock()
 
 def _get_section(raw: Dict[str, Any], name: str) -> Dict[str, Any]:
     """安全地拿到 data 下面的某个子块，比如 todos / activities / tips。"""
@@ -48,18 +154,10 @@ def _build_recent_activity(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     # 按结束时间排序，取最新一条
     latest = sorted(records, key=lambda r: r.get("end_time") or "")[-1]
 
-    meta_raw = latest.get("metadata")
-    focus_areas: List[str] = []
-    key_entities: List[str] = []
-
-    if isinstance(meta_raw, str):
-        try:
-            meta = json.loads(meta_raw)
-            extracted = (meta.get("extracted_insights") or {})  # 里面嵌套了 key_entities / focus_areas
-            focus_areas = extracted.get("focus_areas") or meta.get("focus_areas") or []
-            key_entities = extracted.get("key_entities") or []
-        except Exception:
-            pass
+    # metadata 是 JSON 字符串，由 Activity 延迟解析（只解析被选中的这一条）
+    activity = Activity.from_dict(latest)
+    focus_areas: List[str] = activity.focus_areas
+    key_entities: List[str] = activity.key_entities
 
     # 摘要内容控制长度
     content = latest.get("content") or ""
@@ -112,9 +210,47 @@ def _ensure_cache_dir():
     pathlib.Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
 
 def _get_cache_path(date: datetime) -> pathlib.Path:
-    """获取指定日期的缓存文件路径。"""
+    """获取指定日期的缓存文件路径（扩展名由文件缓存后端决定）。"""
     date_str = date.strftime("%Y%m%d")
-    return pathlib.Path(CACHE_DIR) / f"cache_activities_{date_str}.json"
+    extension = CACHE_FILE_EXTENSIONS.get(CACHE_BACKEND, ".json")
+    return pathlib.Path(CACHE_DIR) / f"cache_activities_{date_str}{extension}"
+
+def _read_cache_file(
+    cache_path: pathlib.Path,
+    window_start: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    读取文件缓存，返回 {fetch_time, days, ..., "activities": [...]}。
+
+    二进制格式通过 mmap 读取，只解码 window_start 之后的记录；
+    JSON 格式整体解析后再按窗口过滤。
+    """
+    if cache_path.suffix == CACHE_FILE_EXTENSIONS["binary"]:
+        return read_binary_cache(str(cache_path), start=window_start)
+
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        cached_data = json.load(f)
+    if window_start is not None:
+        cached_data["activities"] = [
+            activity
+            for activity in cached_data.get("activities", [])
+            if (_parse_activity_time(activity) or datetime.min) >= window_start
+        ]
+    return cached_data
+
+def _write_cache_file(cache_path: pathlib.Path, cache_data: Dict[str, Any]) -> None:
+    """
+    按扩展名以 JSON 或二进制格式写入文件缓存。
+
+    先写临时文件再替换，其他进程读缓存时不会读到写了一半的文件。
+    """
+    if cache_path.suffix == CACHE_FILE_EXTENSIONS["binary"]:
+        meta = {k: v for k, v in cache_data.items() if k != "activities"}
+        atomic_write_bytes(cache_path, encode_binary_cache(meta, cache_data.get("activities", [])))
+        return
+
+    data = json.dumps(cache_data, ensure_ascii=False, indent=2)
+    atomic_write_bytes(cache_path, data.encode("utf-8"))
 
 def _is_cache_valid(cache_path: pathlib.Path, days: int) -> bool:
     """
@@ -129,165 +265,816 @@ def _is_cache_valid(cache_path: pathlib.Path, days: int) -> bool:
 
     return file_mtime >= cutoff_time
 
-def get_activities(days: int = 7, use_cache: bool = True) -> List[Dict[str, Any]]:
+def _parse_activity_time(activity: Dict[str, Any]) -> Optional[datetime]:
     """
-    获取指定天数内的所有 activities，支持分页/limit处理。
+    解析 activity 的时间（优先 end_time，其次 start_time）。
 
-    策略：
-    1. 如果启用缓存且缓存有效，优先使用缓存
-    2. 否则尝试从 MineContext API 获取
-    3. 如果 MineContext 不可用，fallback 到 samples/sample_activities.json
+    带时区的时间统一转换为本地 naive datetime，便于和 datetime.now() 比较；
+    缺失、不是字符串（例如 epoch 整数）或无法解析时返回 None。
+    """
+    time_str = activity.get("end_time") or activity.get("start_time")
+    if not time_str or not isinstance(time_str, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
 
-    Args:
-        days: 获取多少天内的数据（默认7天）
-        use_cache: 是否使用本地缓存（默认启用）
+class _ActivityPager:
+    """
+    activities 分页的状态机，同步和异步的分页迭代器共用。
 
-    Returns:
-        activities 列表
+    params() 给出下一页的请求参数；consume() 处理一页响应，
+    返回落在时间窗口内的记录，并根据停止条件设置 done。
     """
-    _ensure_cache_dir()
-    cache_path = _get_cache_path(datetime.now())
 
-    # 如果启用缓存且缓存有效，直接读取缓存
-    if use_cache and _is_cache_valid(cache_path, days):
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-                print(f"[INFO] 使用缓存: {cache_path}")
-                return cached_data.get("activities", [])
-        except Exception as e:
-            print(f"[WARN] 读取缓存失败: {e}，将重新获取数据")
+    def __init__(
+        self,
+        days: int,
+        page_size: int,
+        max_pages: Optional[int] = None,
+        since: Optional[datetime] = None,
+    ):
+        self.end_time = datetime.now()
+        self.start_time = self.end_time - timedelta(days=days)
+        if since is not None and since > self.start_time:
+            self.start_time = since
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.offset = 0
+        self.pages = 0
+        self.previous_first_id = None
+        self.done = max_pages is not None and max_pages <= 0
 
-    # 从 MineContext API 获取数据
-    print(f"[INFO] 从 MineContext API 获取数据...")
-    all_activities = []
-    minecontext_available = False
+    def params(self) -> Dict[str, Any]:
+        return {"limit": self.page_size, "offset": self.offset}
 
-    try:
-        # 计算时间范围
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=days)
-
-        # 调用 API 获取 activities
-        # 注意：这里使用现有的 fetch_latest_context，但增加 limit 参数
-        # 实际可能需要根据 API 支持情况调整分页策略
-        raw_data = fetch_latest_context(
-            limit=1000,  # 设置较大的 limit 以获取足够数据
-            timeout=30.0
-        )
+    def start_page(self, first_id: Any) -> bool:
+        """
+        开始处理新的一页。
+
+        Returns:
+            False 表示这一页和上一页重复（服务端不支持 offset），应停止处理
+        """
+        self.pages += 1
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            self.done = True
+        if self.pages > 1 and first_id is not None and first_id == self.previous_first_id:
+            # 服务端不支持 offset，继续请求只会拿到重复数据
+            self.done = True
+            return False
+        self.previous_first_id = first_id
+        return True
+
+    def classify(self, activity_time: Optional[datetime]) -> Optional[bool]:
+        """
+        判断一条记录是否落在时间窗口内。
 
-        activities_section = _get_section(raw_data, "activities")
-        records = activities_section.get("records") or []
+        Returns:
+            True 保留；False 早于窗口起点（之后的页只会更旧）；None 跳过
+        """
+        if activity_time is None:
+            # 时间解析失败，跳过该 activity
+            return None
+        if activity_time < self.start_time:
+            return False
+        if activity_time <= self.end_time:
+            return True
+        return None
+
+    def finish_page(self, count: int, reached_window_start: bool) -> None:
+        """一页处理完毕，根据条数和是否越过窗口起点决定是否停止。"""
+        if count == 0 or reached_window_start or count < self.page_size:
+            self.done = True
+        self.offset += count
+
+    def consume(self, response_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """处理已经完整解析的一页响应，返回时间窗口内的记录。"""
+        section = _parse_section_payload("activities", response_data)
+        if section is None:
+            raise ValueError("MineContext activities 接口返回了非 0 的 code")
 
-        # 过滤在指定时间范围内的 activities
+        records = section.get("records") or []
+        first_id = records[0].get("id") if records and isinstance(records[0], dict) else None
+        if not self.start_page(first_id):
+            return []
+
+        in_window = []
+        reached_window_start = False
         for activity in records:
             if not isinstance(activity, dict):
                 continue
+            verdict = self.classify(_parse_activity_time(activity))
+            if verdict:
+                in_window.append(activity)
+            elif verdict is False:
+                reached_window_start = True
+
+        self.finish_page(len(records), reached_window_start)
+        return in_window
+
+    def stream_page(self) -> "_StreamingPage":
+        """以流式方式处理下一页响应。"""
+        return _StreamingPage(self)
+
+class _StreamingPage:
+    """
+    流式处理一页 activities 响应。
+
+    边下载边逐条解码 data.activities 中的元素并立即按时间窗口过滤，
+    窗口外的记录解码后马上丢弃，内存中不会同时存在整页响应。
+    """
+
+    def __init__(self, pager: _ActivityPager):
+        self.pager = pager
+        self.parser = JSONArrayStream(("data", "activities"))
+        self.count = 0
+        self.in_window: List[Dict[str, Any]] = []
+        self.reached_window_start = False
+        # 和上一页重复时停止读取剩余的响应
+        self.stopped = False
+        # 收到的字节数和解码耗时（用于 span 统计）
+        self.received = 0
+        self.parse_seconds = 0.0
+
+    def feed(self, chunk: bytes) -> None:
+        started = time.perf_counter()
+        self.received += len(chunk)
+        self._take(self.parser.feed(chunk))
+        self.parse_seconds += time.perf_counter() - started
 
-            activity_time_str = activity.get("end_time") or activity.get("start_time")
-            if not activity_time_str:
+    def _take(self, records: List[Any]) -> None:
+        for activity in records:
+            if self.stopped:
+                return
+            if self.count == 0:
+                first_id = activity.get("id") if isinstance(activity, dict) else None
+                if not self.pager.start_page(first_id):
+                    self.stopped = True
+                    return
+            self.count += 1
+            if not isinstance(activity, dict):
                 continue
+            verdict = self.pager.classify(_parse_activity_time(activity))
+            if verdict:
+                self.in_window.append(activity)
+            elif verdict is False:
+                self.reached_window_start = True
 
-            try:
-                # 解析时间字符串
-                activity_time = datetime.fromisoformat(activity_time_str.replace('Z', '+00:00'))
-
-                # 检查是否在指定时间范围内
-                if start_time <= activity_time <= end_time:
-                    all_activities.append(activity)
-            except Exception:
-                # 时间解析失败，跳过该 activity
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        响应读取完毕，返回时间窗口内的记录。
+
+        Raises:
+            ValueError: 响应不完整、code 不为 0 或缺少 data
+        """
+        if self.stopped:
+            return []
+        started = time.perf_counter()
+        self._take(self.parser.close())
+        self.parse_seconds += time.perf_counter() - started
+        if self.parser.fields.get("code") != 0 or "data" not in self.parser.root_keys:
+            raise ValueError("MineContext activities 接口返回了非 0 的 code")
+        if self.count == 0 and not self.pager.start_page(None):
+            return []
+        self.pager.finish_page(self.count, self.reached_window_start)
+        return self.in_window
+
+def _record_page_spans(
+    started: float,
+    parse_seconds: float,
+    received: int,
+    in_window: List[Dict[str, Any]],
+) -> None:
+    """记录一页的请求/下载耗时（fetch.page）和解码过滤耗时（parse.activities）。"""
+    elapsed = time.perf_counter() - started
+    record_span("fetch.page", max(0.0, elapsed - parse_seconds), pages=1, bytes=received)
+    record_span("parse.activities", parse_seconds, items=len(in_window))
+
+def _resolve_policy(
+    default: RequestPolicy,
+    policy: Optional[RequestPolicy],
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> RequestPolicy:
+    """在策略上应用显式传入的单个请求超时和整体截止时间。"""
+    policy = policy or default
+    changes: Dict[str, Any] = {}
+    if timeout is not None:
+        changes["request_timeout"] = timeout
+    if deadline is not None:
+        changes["total_deadline"] = deadline
+    return policy.replace(**changes) if changes else policy
+
+def _open_activity_page(params: Dict[str, Any], timeout: float, stream: bool) -> requests.Response:
+    """请求一页 activities，返回状态码正常的响应（响应体由调用方读取）。"""
+    resp = _get_session().get(
+        f"{MINECONTEXT_BASE_URL}{API_ENDPOINTS['activities']}",
+        params=params,
+        timeout=timeout,
+        stream=stream,
+    )
+    try:
+        resp.raise_for_status()
+    except Exception:
+        resp.close()
+        raise
+    return resp
+
+def iter_activity_pages(
+    days: int = 7,
+    page_size: int = ACTIVITY_PAGE_SIZE,
+    timeout: Optional[float] = None,
+    max_pages: Optional[int] = None,
+    since: Optional[datetime] = None,
+    stream: bool = True,
+    policy: Optional[RequestPolicy] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    分页遍历 /api/debug/activities，逐页产出时间窗口内的 activities。
+
+    MineContext 按时间倒序返回 activities，因此一旦某页出现早于窗口起点的记录，
+    之后的页只会更旧，可以立即停止。内存中同时只保留一页数据。
+
+    停止条件：
+    1. 返回空页或不足 page_size 条（已到末尾）
+    2. 出现早于窗口起点（或 since）的记录
+    3. 服务端忽略 offset，返回了和上一页相同的数据
+    4. 达到 max_pages
+
+    Args:
+        days: 时间窗口（天）
+        page_size: 每页条数
+        timeout: 单个请求的超时上限（秒），默认使用策略中的值
+        max_pages: 最多请求多少页（默认不限制）
+        since: 增量同步的水位时间，只拉取不早于该时间的记录
+            （与水位时间相同的记录也会返回，由调用方按 id 去重）
+        stream: 是否流式解析响应（默认启用）：边下载边逐条解码记录，
+            窗口外的记录同样完整解码，只是解码后按时间过滤并立即丢弃；
+            只有窗口内的记录被保留和返回，之后才由调用方转换成 Activity
+        policy: 请求策略，默认 ACTIVITY_REQUEST_POLICY；所有页共享整体预算，
+            请求失败（连接失败 / 超时 / 429 / 5xx）时按策略重试。
+            已经开始读取的响应体中途出错时不重试
+
+    Yields:
+        每页中落在时间窗口内的 activities
+
+    Raises:
+        CircuitOpenError: MineContext 处于熔断状态，不会发出请求
+        DeadlineExceeded: 整体预算用完
+    """
+    _BREAKER.before_call()
+    budget = _resolve_policy(ACTIVITY_REQUEST_POLICY, policy, timeout).start()
+    pager = _ActivityPager(days, page_size, max_pages=max_pages, since=since)
+    while not pager.done:
+        started = time.perf_counter()
+        params = pager.params()
+        try:
+            resp = budget.call(lambda t: _open_activity_page(params, t, stream))
+        except Exception as e:
+            _record_request_error(e)
+            raise
+        _BREAKER.record_success()
+        with resp:
+            if stream:
+                page = pager.stream_page()
+                for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    page.feed(chunk)
+                    if page.stopped:
+                        break
+                in_window = page.close()
+                parse_seconds, received = page.parse_seconds, page.received
+            else:
+                parse_started = time.perf_counter()
+                in_window = pager.consume(resp.json())
+                parse_seconds, received = time.perf_counter() - parse_started, len(resp.content)
+        _record_page_spans(started, parse_seconds, received, in_window)
+        if in_window:
+            yield in_window
+
+def _activity_key(activity: Dict[str, Any]) -> Any:
+    """activity 的去重键：优先 id，没有 id 时退化为 (title, start_time, end_time)。"""
+    activity_id = activity.get("id")
+    if activity_id is not None:
+        return ("id", activity_id)
+    return ("fields", activity.get("title"), activity.get("start_time"), activity.get("end_time"))
+
+def _activity_watermark(activities: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """返回已存储 activities 中最新一条的 end_time / id，作为增量同步的水位。"""
+    newest = None
+    newest_time = None
+    for activity in activities:
+        activity_time = _parse_activity_time(activity)
+        if activity_time is not None and (newest_time is None or activity_time > newest_time):
+            newest, newest_time = activity, activity_time
+    if newest is None:
+        return None
+    return {
+        "end_time": newest.get("end_time") or newest.get("start_time"),
+        "id": newest.get("id"),
+    }
+
+def _merge_activities(
+    existing: List[Dict[str, Any]],
+    incoming: List[Dict[str, Any]],
+    window_start: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    合并本地已有 activities 和新拉取的增量 activities。
+
+    - 按 _activity_key 去重，同一条记录以新拉取的版本为准
+    - 丢弃早于窗口起点的记录
+    - 按时间排序（最新的在前）
+    """
+    with span("filter.window") as s:
+        merged: Dict[Any, Dict[str, Any]] = {}
+        for activity in list(existing) + list(incoming):
+            activity_time = _parse_activity_time(activity)
+            if activity_time is None or activity_time < window_start:
                 continue
+            merged[_activity_key(activity)] = activity
 
-        # 按时间排序（最新的在前）
-        all_activities.sort(
+        s.count("input", len(existing) + len(incoming))
+        s.count("items", len(merged))
+        return sorted(
+            merged.values(),
             key=lambda x: x.get("end_time") or x.get("start_time") or "",
-            reverse=True
+            reverse=True,
+        )
+
+def _get_store() -> ActivityStore:
+    """懒加载 SQLite 存储（CACHE_DIR 变化时重新创建）。"""
+    global _STORE
+    db_path = pathlib.Path(CACHE_DIR) / CACHE_DB_NAME
+    if _STORE is None or _STORE.db_path != db_path:
+        _STORE = ActivityStore(str(db_path))
+    return _STORE
+
+def _get_archive() -> ActivityArchive:
+    """懒加载按天分段的归档（CACHE_DIR 变化时重新创建）。"""
+    global _ARCHIVE
+    root = pathlib.Path(CACHE_DIR) / CACHE_ARCHIVE_DIR
+    if _ARCHIVE is None or _ARCHIVE.root != root:
+        _ARCHIVE = ActivityArchive(str(root), retention=ARCHIVE_RETENTION)
+    _ARCHIVE.retention = ARCHIVE_RETENTION
+    return _ARCHIVE
+
+def _get_activity_store():
+    """activities 的存储：archive 后端返回 ActivityArchive，否则返回 SQLite 的 ActivityStore。"""
+    if CACHE_BACKEND == "archive":
+        return _get_archive()
+    return _get_store()
+
+def _load_file_sync_base(window_start: datetime) -> Optional[Dict[str, Any]]:
+    """
+    找到最近一份来自 MineContext 的文件缓存，作为增量同步的基线。
+
+    只有当缓存覆盖的时间窗口起点不晚于 window_start 时才可用，
+    否则增量同步会漏掉窗口前段的数据。
+
+    Returns:
+        {"activities": [...], "watermark": {...}}，没有可用基线时返回 None
+    """
+    cache_dir = pathlib.Path(CACHE_DIR)
+    if not cache_dir.exists():
+        return None
+
+    extension = CACHE_FILE_EXTENSIONS.get(CACHE_BACKEND, ".json")
+    for cache_path in sorted(cache_dir.glob(f"cache_activities_*{extension}"), reverse=True):
+        try:
+            cached_data = _read_cache_file(cache_path, window_start)
+        except Exception:
+            continue
+        if cached_data.get("source") != "minecontext":
+            continue
+
+        try:
+            if cached_data.get("window_start"):
+                covered_from = datetime.fromisoformat(cached_data["window_start"])
+            else:
+                # 旧格式缓存没有 window_start，用 fetch_time - days 推算
+                covered_from = datetime.fromisoformat(cached_data["fetch_time"]) - timedelta(
+                    days=cached_data.get("days", 0)
+                )
+        except (KeyError, TypeError, ValueError):
+            continue
+        if covered_from > window_start:
+            continue
+
+        activities = cached_data.get("activities") or []
+        watermark = cached_data.get("watermark") or _activity_watermark(activities)
+        if not watermark:
+            continue
+        return {"activities": activities, "watermark": watermark, "covered_from": covered_from}
+
+    return None
+
+def _load_sync_base(window_start: datetime) -> Optional[Dict[str, Any]]:
+    """
+    返回增量同步的基线：{"watermark": {...}, "covered_from": datetime, ...}。
+
+    SQLite / 归档后端直接读存储里的水位和已覆盖的窗口起点；文件后端扫描缓存文件。
+    """
+    if CACHE_BACKEND not in STORE_BACKENDS:
+        return _load_file_sync_base(window_start)
+
+    store = _get_activity_store()
+    covered = store.get_state("window_start")
+    if not covered or datetime.fromisoformat(covered) > window_start:
+        return None
+    watermark = store.watermark()
+    if not watermark:
+        return None
+    return {"watermark": watermark, "covered_from": datetime.fromisoformat(covered)}
+
+def _load_fresh_cache(days: int, window_start: datetime) -> Optional[List[Dict[str, Any]]]:
+    """
+    读取仍然有效的缓存，无效或读取失败时返回 None。
+
+    SQLite / 归档后端：今天已经同步过且覆盖了请求的窗口时，按窗口查询
+    （SQLite 走索引范围查询，归档只打开窗口内的分段）。
+    文件后端：今天的缓存文件存在且在有效期内时读取窗口内的记录。
+    """
+    if CACHE_BACKEND in STORE_BACKENDS:
+        try:
+            store = _get_activity_store()
+            fetch_time = store.get_state("fetch_time")
+            covered = store.get_state("window_start")
+            if not fetch_time or not covered:
+                return None
+            if datetime.fromisoformat(fetch_time).date() != datetime.now().date():
+                return None
+            if datetime.fromisoformat(covered) > window_start:
+                return None
+            activities = store.query_activities(window_start)
+            logger.info(f"使用缓存: {store.location}（{len(activities)} 条）")
+            return activities
+        except Exception as e:
+            logger.warning(f"读取缓存失败: {e}，将重新获取数据")
+            return None
+
+    cache_path = _get_cache_path(datetime.now())
+    if not _is_cache_valid(cache_path, days):
+        return None
+    try:
+        cached_data = _read_cache_file(cache_path, window_start)
+        logger.info(f"使用缓存: {cache_path}")
+        return cached_data.get("activities", [])
+    except Exception as e:
+        logger.warning(f"读取缓存失败: {e}，将重新获取数据")
+        return None
+
+def _save_to_cache(
+    fetched: List[Dict[str, Any]],
+    days: int,
+    window_start: datetime,
+    sync_base: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    把新拉取的 activities 合并进缓存，返回合并后窗口内的 activities（最新的在前）。
+
+    保存失败只打印警告，仍然返回合并结果。
+    """
+    covered_from = window_start
+    if sync_base is not None:
+        covered_from = min(covered_from, sync_base["covered_from"])
+
+    if CACHE_BACKEND in STORE_BACKENDS:
+        store = _get_activity_store()
+        try:
+            store.upsert_activities(fetched)
+            activities = store.query_activities(window_start)
+            if activities:
+                store.set_state(
+                    fetch_time=datetime.now().isoformat(),
+                    window_start=covered_from.isoformat(),
+                    source="minecontext",
+                )
+                logger.info(f"缓存已保存: {store.location}")
+            return activities
+        except Exception as e:
+            logger.warning(f"保存缓存失败: {e}")
+            return _merge_activities([], fetched, window_start)
+
+    existing = sync_base["activities"] if sync_base is not None else []
+    activities = _merge_activities(existing, fetched, window_start)
+    if activities:
+        cache_path = _get_cache_path(datetime.now())
+        try:
+            cache_data = {
+                "fetch_time": datetime.now().isoformat(),
+                "days": days,
+                "window_start": covered_from.isoformat(),
+                "watermark": _activity_watermark(activities),
+                "activities": activities,
+                "source": "minecontext"
+            }
+            _write_cache_file(cache_path, cache_data)
+            logger.info(f"缓存已保存: {cache_path}")
+        except Exception as e:
+            logger.warning(f"保存缓存失败: {e}")
+    return activities
+
+def _load_stale_cache(window_start: datetime) -> List[Dict[str, Any]]:
+    """MineContext 不可用时读取过期缓存（不检查有效期），没有时返回空列表。"""
+    try:
+        if CACHE_BACKEND in STORE_BACKENDS:
+            store = _get_activity_store()
+            if not store.location.exists():
+                return []
+            logger.info(f"尝试使用缓存: {store.location}")
+            return store.query_activities(window_start)
+
+        cache_path = _get_cache_path(datetime.now())
+        if not cache_path.exists():
+            return []
+        logger.info(f"尝试使用缓存: {cache_path}")
+        return _read_cache_file(cache_path).get("activities", [])
+    except Exception as e:
+        logger.warning(f"读取缓存失败: {e}")
+        return []
+
+def _load_samples(days: int, use_cache: bool) -> List[Dict[str, Any]]:
+    """从 samples 文件加载离线演示数据（文件后端会把它写入当天缓存）。"""
+    samples_path = pathlib.Path(SAMPLES_PATH)
+    if not samples_path.exists():
+        logger.warning(f"samples 文件不存在: {samples_path}")
+        return []
+
+    try:
+        logger.info(f"从 samples 加载数据: {samples_path}")
+        with open(samples_path, 'r', encoding='utf-8') as f:
+            activities = json.load(f).get("activities", [])
+        logger.info(f"从 samples 中加载 {len(activities)} 条 activities")
+    except Exception as e:
+        logger.warning(f"从 samples 加载数据失败: {e}")
+        return []
+
+    # 保存到缓存（标记为 samples 来源）；SQLite 存储和归档只保存真实数据，避免混入演示数据
+    if use_cache and activities and CACHE_BACKEND not in STORE_BACKENDS:
+        cache_path = _get_cache_path(datetime.now())
+        try:
+            cache_data = {
+                "fetch_time": datetime.now().isoformat(),
+                "days": days,
+                "activities": activities,
+                "source": "samples"
+            }
+            _write_cache_file(cache_path, cache_data)
+            logger.info(f"samples 数据已缓存: {cache_path}")
+        except Exception as e:
+            logger.warning(f"保存 samples 缓存失败: {e}")
+
+    return activities
+
+def _load_fallback_activities(days: int, window_start: datetime, use_cache: bool) -> List[Dict[str, Any]]:
+    """MineContext 不可用或返回空数据时的兜底：先用过期缓存，再用 samples。"""
+    logger.info(f"MineContext 不可用或返回空数据，尝试加载 samples...")
+
+    # 首先尝试使用过期缓存（如果有的话）
+    cached_activities = _load_stale_cache(window_start)
+    if cached_activities:
+        logger.info(f"从缓存中加载 {len(cached_activities)} 条 activities")
+        return cached_activities
+
+    # 如果缓存也不可用，使用 samples 数据
+    return _load_samples(days, use_cache)
+
+def get_activities(days: int = 7, use_cache: bool = True, sync: bool = True) -> List[Dict[str, Any]]:
+    """
+    获取指定天数内的所有 activities，通过 iter_activity_pages 分页拉取。
+
+    策略：
+    1. 如果启用缓存且缓存有效，优先使用缓存（SQLite 后端按时间窗口走索引查询）
+    2. 否则尝试从 MineContext API 获取；如果本地缓存已覆盖该窗口，
+       只增量拉取比缓存水位（最新 end_time / id）更新的记录并合并去重
+    3. 如果 MineContext 不可用，先尝试过期缓存，再 fallback 到 samples/sample_activities.json
+
+    缓存未命中时只有一个调用者真正拉取：同一进程内的并发调用等待并共享它的结果，
+    其他进程通过 data/.fetch.lock 排队，拿到锁后发现缓存已经更新就直接读取。
+
+    缓存后端由 CACHE_BACKEND 决定："sqlite"（默认，data/minecontext.db）、
+    "json" 或 "binary"（按天的 data/cache_activities_YYYYMMDD.json / .mcb）、
+    "archive"（data/archive/ 下按 activity 日期分段的归档）。
+
+    Args:
+        days: 获取多少天内的数据（默认7天）
+        use_cache: 是否使用本地缓存（默认启用）
+        sync: 是否基于已有缓存做增量同步（默认启用，仅在 use_cache 时生效）
+
+    Returns:
+        activities 列表（最新的在前）
+    """
+    with span("fetch.activities", days=days, use_cache=use_cache) as s:
+        _ensure_cache_dir()
+        window_start = datetime.now() - timedelta(days=days)
+
+        # 如果启用缓存且缓存有效，直接读取缓存
+        if use_cache:
+            cached = _load_fresh_cache(days, window_start)
+            if cached is not None:
+                s.set(source="cache")
+                s.count("items", len(cached))
+                return cached
+
+        # 缓存未命中：同一进程内的并发调用只拉取一次，跨进程由拉取锁协调
+        activities = _single_flight(
+            (days, use_cache, sync),
+            lambda: _fetch_activities_locked(days, use_cache, sync),
         )
+        s.count("items", len(activities))
+        return activities
+
+class _Flight:
+    """一次进行中的拉取，等待者在 done 上等待结果。"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[BaseException] = None
+
+def _single_flight(key: Tuple[int, bool, bool], fetch) -> List[Dict[str, Any]]:
+    """
+    同一个 key 同时只执行一次 fetch，其余调用者等待并共享它的结果。
+
+    等待者拿到的是结果列表的浅拷贝；fetch 抛出的异常同样传给所有等待者。
+    """
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(key)
+        leader = flight is None
+        if leader:
+            flight = _FLIGHTS[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return list(flight.result)
+
+    try:
+        flight.result = fetch()
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _FLIGHTS_LOCK:
+            del _FLIGHTS[key]
+        flight.done.set()
+
+def _get_fetch_lock() -> FileLock:
+    return FileLock(pathlib.Path(CACHE_DIR) / FETCH_LOCK_NAME, timeout=FETCH_LOCK_TIMEOUT)
+
+def _acquire_fetch_lock() -> Optional[FileLock]:
+    """获取跨进程拉取锁，超时返回 None（不再等待，直接拉取）。"""
+    lock = _get_fetch_lock()
+    try:
+        lock.acquire()
+        return lock
+    except (LockTimeout, OSError) as e:
+        logger.warning(f"获取拉取锁失败: {e}，直接从 MineContext 拉取")
+        return None
+
+async def _acquire_fetch_lock_async() -> Optional[FileLock]:
+    """_acquire_fetch_lock 的异步版本：非阻塞地轮询，不占用线程，可以被取消。"""
+    lock = _get_fetch_lock()
+    deadline = time.monotonic() + FETCH_LOCK_TIMEOUT
+    while True:
+        try:
+            lock.acquire(timeout=0)
+            return lock
+        except LockTimeout:
+            if time.monotonic() >= deadline:
+                logger.warning(f"获取拉取锁超时（{FETCH_LOCK_TIMEOUT}s），直接从 MineContext 拉取")
+                return None
+        except OSError as e:
+            logger.warning(f"获取拉取锁失败: {e}，直接从 MineContext 拉取")
+            return None
+        await asyncio.sleep(lock.poll_interval)
+
+def _fetch_activities_locked(days: int, use_cache: bool, sync: bool) -> List[Dict[str, Any]]:
+    """
+    持有跨进程拉取锁时拉取 activities。
+
+    拿到锁后先重新检查缓存：等锁期间其他进程可能已经拉取并写好了缓存。
+    窗口起点在拿到锁之后计算，保证不早于先拿到锁的调用者写入的覆盖范围。
+    不使用缓存时没有可以共享的结果，不加锁。
+    """
+    if not use_cache:
+        window_start = datetime.now() - timedelta(days=days)
+        return _fetch_activities(days, window_start, use_cache, sync)
+
+    lock = _acquire_fetch_lock()
+    try:
+        window_start = datetime.now() - timedelta(days=days)
+        cached = _load_fresh_cache(days, window_start)
+        if cached is not None:
+            return cached
+        return _fetch_activities(days, window_start, use_cache, sync)
+    finally:
+        if lock is not None:
+            lock.release()
+
+def _fetch_activities(
+    days: int,
+    window_start: datetime,
+    use_cache: bool,
+    sync: bool,
+) -> List[Dict[str, Any]]:
+    """从 MineContext 拉取（或增量同步）activities 并写入缓存，不可用时走 fallback。"""
+    # 从 MineContext API 获取数据
+    logger.info(f"从 MineContext API 获取数据...")
+    all_activities: List[Dict[str, Any]] = []
+    minecontext_available = False
+
+    try:
+        sync_base = _load_sync_base(window_start) if (use_cache and sync) else None
+
+        fetched: List[Dict[str, Any]] = []
+        mode = "incremental" if sync_base is not None else "full"
+        with span("fetch.sync", mode=mode) as s:
+            if sync_base is not None:
+                # 增量同步：只拉取水位之后的记录
+                watermark = sync_base["watermark"]
+                logger.info(f"增量同步，水位: {watermark.get('end_time')} (id={watermark.get('id')})")
+                since = _parse_activity_time(watermark)
+                for page in iter_activity_pages(days=days, since=since):
+                    fetched.extend(page)
+                logger.info(f"增量拉取 {len(fetched)} 条 activities")
+            else:
+                # 全量拉取：分页拉取时间窗口内的 activities，越过窗口起点即停止
+                for page in iter_activity_pages(days=days):
+                    fetched.extend(page)
+            s.count("items", len(fetched))
+
+        if use_cache:
+            with span("cache.save", backend=CACHE_BACKEND) as s:
+                all_activities = _save_to_cache(fetched, days, window_start, sync_base)
+                s.count("items", len(all_activities))
+        else:
+            all_activities = _merge_activities([], fetched, window_start)
 
         # 标记 MineContext 可用
         minecontext_available = len(all_activities) > 0
 
-        # 保存到缓存
-        if use_cache and minecontext_available:
-            try:
-                cache_data = {
-                    "fetch_time": datetime.now().isoformat(),
-                    "days": days,
-                    "activities": all_activities,
-                    "source": "minecontext"
-                }
-                with open(cache_path, 'w', encoding='utf-8') as f:
-                    json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                print(f"[INFO] 缓存已保存: {cache_path}")
-            except Exception as e:
-                print(f"[WARN] 保存缓存失败: {e}")
-
     except Exception as e:
-        print(f"[WARN] 从 MineContext API 获取数据失败: {e}")
-        print(f"[INFO] 将尝试 fallback 到 samples 数据...")
+        logger.warning(f"从 MineContext API 获取数据失败: {e}")
+        logger.info(f"将尝试 fallback 到 samples 数据...")
         minecontext_available = False
 
     # **Fallback 策略**：如果 MineContext 不可用或返回空数据，使用 samples
     if not minecontext_available or len(all_activities) == 0:
-        print(f"[INFO] MineContext 不可用或返回空数据，尝试加载 samples...")
+        with span("fetch.fallback") as s:
+            all_activities = _load_fallback_activities(days, window_start, use_cache)
+            s.count("items", len(all_activities))
 
-        # 首先尝试使用过期缓存（如果有的话）
-        if cache_path.exists():
-            try:
-                print(f"[INFO] 尝试使用缓存: {cache_path}")
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    cached_activities = cached_data.get("activities", [])
-                    if cached_activities:
-                        print(f"[INFO] 从缓存中加载 {len(cached_activities)} 条 activities")
-                        return cached_activities
-            except Exception as e:
-                print(f"[WARN] 读取缓存失败: {e}")
+    return all_activities
 
-        # 如果缓存也不可用，使用 samples 数据
-        samples_path = pathlib.Path("samples/sample_activities.json")
-        if samples_path.exists():
-            try:
-                print(f"[INFO] 从 samples 加载数据: {samples_path}")
-                with open(samples_path, 'r', encoding='utf-8') as f:
-                    samples_data = json.load(f)
-                    all_activities = samples_data.get("activities", [])
-                    print(f"[INFO] 从 samples 中加载 {len(all_activities)} 条 activities")
-
-                    # 保存到缓存（标记为 samples 来源）
-                    if use_cache and all_activities:
-                        try:
-                            cache_data = {
-                                "fetch_time": datetime.now().isoformat(),
-                                "days": days,
-                                "activities": all_activities,
-                                "source": "samples"
-                            }
-                            with open(cache_path, 'w', encoding='utf-8') as f:
-                                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                            print(f"[INFO] samples 数据已缓存: {cache_path}")
-                        except Exception as e:
-                            print(f"[WARN] 保存 samples 缓存失败: {e}")
+def get_cache_revision() -> str:
+    """
+    返回本地 activities 缓存的数据版本标识。
 
-            except Exception as e:
-                print(f"[WARN] 从 samples 加载数据失败: {e}")
-        else:
-            print(f"[WARN] samples 文件不存在: {samples_path}")
+    缓存内容变化（包括其他进程写入）时返回值随之变化，
+    长驻进程可以把它作为内存缓存 key 的一部分来判断失效。
+    """
+    if CACHE_BACKEND in STORE_BACKENDS:
+        store = _get_activity_store()
+        if not store.location.exists():
+            return f"{CACHE_BACKEND}:0"
+        return f"{CACHE_BACKEND}:{store.revision()}"
 
-    return all_activities
+    cache_path = _get_cache_path(datetime.now())
+    try:
+        return f"{CACHE_BACKEND}:{cache_path.name}:{cache_path.stat().st_mtime_ns}"
+    except OSError:
+        return f"{CACHE_BACKEND}:{cache_path.name}:missing"
 
 def clear_cache():
-    """清除所有缓存文件。"""
+    """清除所有缓存（JSON / 二进制缓存文件、SQLite 存储和归档中的数据以及内存中的摘要）。"""
     try:
         cache_dir = pathlib.Path(CACHE_DIR)
         if cache_dir.exists():
-            for cache_file in cache_dir.glob("cache_activities_*.json"):
-                cache_file.unlink()
-                print(f"[INFO] 已删除缓存: {cache_file}")
-        print("[INFO] 缓存清理完成")
+            for extension in CACHE_FILE_EXTENSIONS.values():
+                for cache_file in cache_dir.glob(f"cache_activities_*{extension}"):
+                    cache_file.unlink()
+                    logger.info(f"已删除缓存: {cache_file}")
+            if (cache_dir / CACHE_DB_NAME).exists():
+                _get_store().clear()
+                logger.info(f"已清空缓存: {cache_dir / CACHE_DB_NAME}")
+            if (cache_dir / CACHE_ARCHIVE_DIR).exists():
+                _get_archive().clear()
+                logger.info(f"已清空归档: {cache_dir / CACHE_ARCHIVE_DIR}")
+        with _SUMMARY_LOCK:
+            _SUMMARY_CACHE.clear()
+        _COMPRESSED_MEMO.clear()
+        logger.info("缓存清理完成")
     except Exception as e:
-        print(f"[ERROR] 清理缓存失败: {e}")
+        logger.error(f"清理缓存失败: {e}")
 
 def compress_home_context(raw: Dict[str, Any]) -> Dict[str, Any]:
     """把 /contexts 返回的 Home 类上下文压缩成简短摘要。"""
@@ -321,62 +1108,243 @@ def compress_home_context(raw: Dict[str, Any]) -> Dict[str, Any]:
         "tips_summary": tips_summary,
     }
 
+def _is_unavailable_error(e: BaseException) -> bool:
+    """是否是服务不可达类的错误（连接失败 / 超时），HTTP 错误码说明服务可达，不算。"""
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError)):
+        return True
+    return httpx is not None and isinstance(e, httpx.TransportError)
+
+def _record_request_error(e: BaseException) -> None:
+    """把请求异常报告给熔断器：不可达记为失败，其他异常（服务有响应）记为成功。"""
+    if isinstance(e, CircuitOpenError):
+        return
+    if _is_unavailable_error(e):
+        _BREAKER.record_failure()
+    else:
+        _BREAKER.record_success()
+
+def _record_context_outcome(unavailable: int, total: int) -> None:
+    """fetch_latest_context 的结果报告给熔断器：请求的端点都不可达才算一次失败。"""
+    if total and unavailable >= total:
+        _BREAKER.record_failure()
+    else:
+        _BREAKER.record_success()
+
+def get_breaker_state() -> Dict[str, Any]:
+    """返回熔断器状态（state / retry_after），便于排查。"""
+    return {"state": _BREAKER.state, "retry_after": round(_BREAKER.retry_after(), 1)}
+
+def reset_breaker() -> None:
+    """手动恢复熔断器（例如确认 MineContext 已重新启动后）。"""
+    _BREAKER.reset()
+
+def _get_session() -> requests.Session:
+    """
+    懒加载共享的 requests.Session。
+
+    Session 自带 keep-alive 连接池，四个 /api/debug/* 端点复用同一组连接，
+    避免每次调用都重新握手。
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=HTTP_POOL_SIZE,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _SESSION = session
+    return _SESSION
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """
+    懒加载并发抓取用的线程池。
+
+    线程池是模块级的：超过整体 deadline 仍未返回的请求会留在后台自行结束，
+    不会阻塞调用方（用 with 语句创建的线程池在退出时会等待它们）。
+    """
+    global _FETCH_EXECUTOR
+    if _FETCH_EXECUTOR is None:
+        with _SESSION_LOCK:
+            if _FETCH_EXECUTOR is None:
+                _FETCH_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=len(API_ENDPOINTS),
+                    thread_name_prefix="minecontext-fetch",
+                )
+    return _FETCH_EXECUTOR
+
+def _parse_section_payload(data_type: str, response_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    把单个端点的响应转换成 {"records": [...]}。
+
+    MineContext API 返回格式: {"code": 0, "status": "ok", "data": {...}}
+    code 不为 0 或缺少 data 时返回 None（该 section 不写入结果）。
+    """
+    if response_data.get("code") != 0 or "data" not in response_data:
+        return None
+
+    data = response_data["data"]
+    # 提取实际的数据列表和 records
+    if isinstance(data, dict) and data_type in data:
+        return {"records": data[data_type]}
+    # 通用处理
+    records = data if isinstance(data, list) else [data]
+    return {"records": records}
+
+def _fetch_section(data_type: str, limit: int, timeout: float) -> Optional[Dict[str, Any]]:
+    """请求单个 /api/debug/* 端点，异常直接抛给调用方处理。"""
+    resp = _get_session().get(
+        f"{MINECONTEXT_BASE_URL}{API_ENDPOINTS[data_type]}",
+        params={"limit": limit},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return _parse_section_payload(data_type, resp.json())
+
+def _fetch_section_in_budget(data_type: str, limit: int, budget: RequestBudget) -> Optional[Dict[str, Any]]:
+    """在预算内请求单个端点，超时随剩余预算缩短，可重试的错误按策略重试。"""
+    return budget.call(lambda timeout: _fetch_section(data_type, limit, timeout))
+
+def _normalize_sections(sections: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """校验要请求的 section，按 API_ENDPOINTS 的声明顺序返回；None 表示全部。"""
+    if sections is None:
+        return tuple(API_ENDPOINTS)
+    unknown = set(sections) - set(API_ENDPOINTS)
+    if unknown:
+        raise ValueError(f"未知的 section: {sorted(unknown)}")
+    return tuple(name for name in API_ENDPOINTS if name in sections)
+
+def get_fetch_plan(task_type: Optional[str], detail_level: str) -> Tuple[str, ...]:
+    """
+    返回摘要需要抓取的 section。
+
+    detail_level 为 low 时只抓取 todos；否则按 TASK_FETCH_PLANS，
+    未知的 task_type 使用 SUMMARY_SECTIONS。
+    """
+    if detail_level == "low":
+        return LOW_DETAIL_SECTIONS
+    return TASK_FETCH_PLANS.get(task_type or "unknown", SUMMARY_SECTIONS)
+
 def fetch_latest_context(
     limit: int = 1,
-    timeout: float = 5.0,
+    timeout: Optional[float] = None,
+    concurrent: bool = True,
+    deadline: Optional[float] = None,
+    sections: Optional[Sequence[str]] = None,
+    policy: Optional[RequestPolicy] = None,
 ) -> Dict[str, Any]:
     """
     调用 MineContext API 端点获取原始数据。
     注意：MineContext 的 /contexts 端点返回 HTML 页面，不能用于 API。
     需要使用独立的 /api/debug/* 端点。
-    """
 
-    api_endpoints = {
-        "reports": f"/api/debug/reports",
-        "todos": f"/api/debug/todos",
-        "activities": f"/api/debug/activities",
-        "tips": f"/api/debug/tips"
-    }
+    Args:
+        limit: 每个端点返回的记录数
+        timeout: 单个请求的超时上限（秒），默认使用策略中的值
+        concurrent: 是否并发请求各个端点（默认启用）
+        deadline: 所有端点共享的整体截止时间（秒）；只传 timeout 时等于 timeout，
+            都不传时使用策略中的值。到期仍未返回的端点按失败处理，返回空 records
+        sections: 要请求的 section（API_ENDPOINTS 的 key），默认全部
+        policy: 请求策略，默认 SUMMARY_REQUEST_POLICY；
+            可重试的错误（连接失败 / 超时 / 429 / 5xx）在剩余预算内带抖动重试
 
+    Returns:
+        {"timestamp": ..., "data": {section: {"records": [...]}}}，
+        单个端点失败不影响其他端点
+
+    Raises:
+        CircuitOpenError: MineContext 处于熔断状态，不会发出请求
+    """
+    sections = _normalize_sections(sections)
+    if deadline is None:
+        deadline = timeout
+    budget = _resolve_policy(SUMMARY_REQUEST_POLICY, policy, timeout, deadline).start()
+    _BREAKER.before_call()
     raw_data = {
         "timestamp": datetime.utcnow().isoformat(),
         "data": {}
     }
+    # 不可达（连接失败 / 超时）的端点数，全部不可达时熔断器记一次失败
+    unavailable = 0
 
-    for data_type, endpoint in api_endpoints.items():
-        try:
-            resp = requests.get(
-                f"{MINECONTEXT_BASE_URL}{endpoint}",
-                params={"limit": limit},
-                timeout=timeout,
-            )
-            resp.raise_for_status()
-            response_data = resp.json()
-
-            # MineContext API 返回格式: {"code": 0, "status": "ok", "data": {...}}
-            if response_data.get("code") == 0 and "data" in response_data:
-                data = response_data["data"]
-                # 提取实际的数据列表和 records
-                if data_type == "reports" and "reports" in data:
-                    raw_data["data"][data_type] = {"records": data["reports"]}
-                elif data_type == "todos" and "todos" in data:
-                    raw_data["data"][data_type] = {"records": data["todos"]}
-                elif data_type == "activities" and "activities" in data:
-                    raw_data["data"][data_type] = {"records": data["activities"]}
-                elif data_type == "tips" and "tips" in data:
-                    raw_data["data"][data_type] = {"records": data["tips"]}
-                else:
-                    # 通用处理
-                    records = data if isinstance(data, list) else [data]
-                    raw_data["data"][data_type] = {"records": records}
+    if not concurrent:
+        for data_type in sections:
+            try:
+                section = _fetch_section_in_budget(data_type, limit, budget)
+                if section is not None:
+                    raw_data["data"][data_type] = section
+            except Exception as e:
+                # 单个端点失败不影响其他端点，返回空 records
+                logger.warning(f"获取 {data_type} 失败: {e}")
+                raw_data["data"][data_type] = {"records": []}
+                unavailable += _is_unavailable_error(e)
+        _record_context_outcome(unavailable, len(sections))
+        return raw_data
+
+    overall = budget.policy.total_deadline
+    executor = _get_fetch_executor()
+    futures = {
+        executor.submit(_fetch_section_in_budget, data_type, limit, budget): data_type
+        for data_type in sections
+    }
+    done, not_done = wait(futures, timeout=budget.remaining())
 
+    # 按端点声明顺序组装结果，保持和串行模式一致的 key 顺序
+    results: Dict[str, Any] = {}
+    for future in done:
+        data_type = futures[future]
+        try:
+            results[data_type] = future.result()
         except Exception as e:
-            # 单个端点失败不影响其他端点，返回空 records
-            print(f"[WARN] 获取 {data_type} 失败: {e}")
-            raw_data["data"][data_type] = {"records": []}
+            logger.warning(f"获取 {data_type} 失败: {e}")
+            results[data_type] = {"records": []}
+            unavailable += _is_unavailable_error(e)
+    for future in not_done:
+        data_type = futures[future]
+        future.cancel()
+        logger.warning(f"获取 {data_type} 超过整体截止时间 {overall}s")
+        results[data_type] = {"records": []}
+        unavailable += 1
+    _record_context_outcome(unavailable, len(sections))
+
+    for data_type in sections:
+        section = results.get(data_type)
+        if section is not None:
+            raw_data["data"][data_type] = section
 
     return raw_data
 
+def _count_records(raw: Dict[str, Any]) -> int:
+    """fetch_latest_context 结果中各 section 的记录总数。"""
+    total = 0
+    for section in (raw.get("data") or {}).values():
+        records = section.get("records") if isinstance(section, dict) else None
+        if isinstance(records, list):
+            total += len(records)
+    return total
+
+def _persist_context_records(raw: Dict[str, Any]) -> None:
+    """
+    把 fetch_latest_context 拿到的 todos / tips 写入 SQLite 存储。
+
+    activities 不在这里写入：摘要只拉取最新一条，写入会推高水位，
+    导致增量同步漏掉中间的记录。
+    """
+    if CACHE_BACKEND != "sqlite":
+        return
+    try:
+        _ensure_cache_dir()
+        store = _get_store()
+        for kind in ("todos", "tips"):
+            records = _get_section(raw, kind).get("records") or []
+            if isinstance(records, list) and records:
+                store.upsert_records(kind, records)
+    except Exception as e:
+        logger.warning(f"保存 todos/tips 失败: {e}")
+
 def _error_summary(error_type: str, message: str, hint: str) -> Dict[str, Any]:
     """统一的错误返回结构，用于优雅降级。"""
     return {
@@ -395,53 +1363,80 @@ def _error_summary(error_type: str, message: str, hint: str) -> Dict[str, Any]:
         "meta": {},  # 统一字段结构，和成功情况保持一致
     }
 
-def get_minecontext_summary(
-    task_type: Optional[str] = None,
-    detail_level: str = "medium",
-) -> Dict[str, Any]:
-    """
-    对外暴露的主函数：
-    1. 调 /contexts 拿最新 raw JSON
-    2. 调 compress_home_context(raw) 做压缩
-    3. 出错时返回带 status=error 的结构，而不是抛异常
-    """
-    try:
-        raw = fetch_latest_context()
-    except requests.exceptions.ConnectionError as e:
+def _fetch_error_summary(e: Exception) -> Dict[str, Any]:
+    """把抓取阶段的异常（requests / httpx / JSON 解析）映射成统一的错误结构。"""
+    if isinstance(e, CircuitOpenError):
+        return _error_summary(
+            "MineContextUnavailable",
+            str(e),
+            "MineContext 连续多次不可达，已暂停请求；请确认服务已启动（http://localhost:1733），"
+            "熔断器会定期自动探测恢复。",
+        )
+    if isinstance(e, requests.exceptions.ConnectionError) or (
+        httpx is not None and isinstance(e, httpx.NetworkError)
+    ):
         return _error_summary(
             "MineContextUnavailable",
             f"无法连接 MineContext 本地服务: {e}",
             "请确认 MineContext 已启动，并监听在 http://localhost:1733。",
         )
-    except requests.exceptions.Timeout as e:
+    if isinstance(e, requests.exceptions.Timeout) or (
+        httpx is not None and isinstance(e, httpx.TimeoutException)
+    ):
         return _error_summary(
             "Timeout",
             f"请求 MineContext /contexts 超时: {e}",
             "请稍后重试，或减少调用频率。",
         )
-    except requests.exceptions.RequestException as e:
+    if isinstance(e, requests.exceptions.RequestException) or (
+        httpx is not None and isinstance(e, httpx.HTTPError)
+    ):
         return _error_summary(
             "HttpError",
             f"请求 MineContext /contexts 失败: {e}",
             "请检查 MineContext 服务状态和本地网络环境。",
         )
-    except ValueError as e:
-        # JSON 解析失败
-        return _error_summary(
-            "InvalidJSON",
-            f"MineContext 返回的数据无法解析为 JSON: {e}",
-            "请检查 MineContext 版本，或稍后重试。",
-        )
+    # JSON 解析失败
+    return _error_summary(
+        "InvalidJSON",
+        f"MineContext 返回的数据无法解析为 JSON: {e}",
+        "请检查 MineContext 版本，或稍后重试。",
+    )
 
-    try:
-        summary = compress_home_context(raw)
-    except Exception as e:
-        # 压缩逻辑自身异常，也不要把 Agent 弄崩
-        return _error_summary(
-            "CompressionError",
-            f"压缩 MineContext 上下文时出现错误: {e}",
-            "请检查 minecontext_wrapper.compress_home_context 的实现。",
-        )
+def _summarize_raw(
+    raw: Dict[str, Any],
+    task_type: Optional[str],
+    detail_level: str,
+    sections: Sequence[str] = SUMMARY_SECTIONS,
+) -> Dict[str, Any]:
+    """
+    保存 todos/tips、压缩 raw 数据并补齐通用字段（同步/异步版本共用）。
+
+    同一抓取计划下各 section 的指纹和上一次相同时，
+    直接复用上一次的压缩结果（meta.changed=False）。
+    """
+    plan = tuple(sections)
+    fingerprint = combine_fingerprints(fingerprint_sections(raw.get("data") or {}))
+    memo = _COMPRESSED_MEMO.get(plan)
+    changed = memo is None or memo[0] != fingerprint
+
+    if changed:
+        _persist_context_records(raw)
+        try:
+            with span("summary.compress"):
+                compressed = compress_home_context(raw)
+        except Exception as e:
+            # 压缩逻辑自身异常，也不要把 Agent 弄崩
+            return _error_summary(
+                "CompressionError",
+                f"压缩 MineContext 上下文时出现错误: {e}",
+                "请检查 minecontext_wrapper.compress_home_context 的实现。",
+            )
+        _COMPRESSED_MEMO[plan] = (fingerprint, copy.deepcopy(compressed))
+        summary = compressed
+    else:
+        summary = copy.deepcopy(memo[1])
+        summary["timestamp"] = raw.get("timestamp")
 
     # 给压缩结果补充一些通用字段，确保返回结构统一
     summary["status"] = "ok"  # 明确设置状态
@@ -452,9 +1447,403 @@ def get_minecontext_summary(
     summary.setdefault("meta", {})
     summary["meta"]["task_type"] = task_type
     summary["meta"]["detail_level"] = detail_level
+    summary["meta"]["sections"] = list(plan)
+    summary["meta"]["fingerprint"] = fingerprint
+    summary["meta"]["changed"] = changed
+
+    return summary
+
+def _build_summary(task_type: Optional[str], detail_level: str) -> Dict[str, Any]:
+    """按抓取计划同步抓取并压缩一次摘要。"""
+    sections = get_fetch_plan(task_type, detail_level)
+    try:
+        with span("fetch.context", sections=list(sections)) as s:
+            raw = fetch_latest_context(sections=sections)
+            s.count("records", _count_records(raw))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return _fetch_error_summary(e)
 
+    return _summarize_raw(raw, task_type, detail_level, sections)
+
+def _remember_summary(key: Any, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """记录成功的摘要供 stale-while-revalidate 使用，并标记 age_seconds=0。"""
+    summary.setdefault("meta", {})["age_seconds"] = 0.0
+    if summary.get("status") == "ok":
+        with _SUMMARY_LOCK:
+            _SUMMARY_CACHE[key] = (time.monotonic(), copy.deepcopy(summary))
+    return summary
+
+def _get_fresh_summary(key: Any, max_staleness: float) -> Optional[Dict[str, Any]]:
+    """返回不超过 max_staleness 秒的缓存摘要（副本，带 meta.age_seconds），否则返回 None。"""
+    with _SUMMARY_LOCK:
+        entry = _SUMMARY_CACHE.get(key)
+    if entry is None:
+        return None
+    created_at, summary = entry
+    age = time.monotonic() - created_at
+    if age > max_staleness:
+        return None
+    summary = copy.deepcopy(summary)
+    summary["meta"]["age_seconds"] = round(age, 3)
     return summary
 
+def _refresh_summary_in_background(key: Any) -> None:
+    """在后台线程刷新摘要；同一个 key 同时只有一个刷新在进行。"""
+    with _SUMMARY_LOCK:
+        if key in _SUMMARY_REFRESHING:
+            return
+        _SUMMARY_REFRESHING.add(key)
+
+    def refresh() -> None:
+        try:
+            _remember_summary(key, _build_summary(*key))
+        except Exception as e:
+            logger.warning(f"后台刷新摘要失败: {e}")
+        finally:
+            with _SUMMARY_LOCK:
+                _SUMMARY_REFRESHING.discard(key)
+
+    threading.Thread(target=refresh, name="minecontext-summary-refresh", daemon=True).start()
+
+def get_minecontext_summary(
+    task_type: Optional[str] = None,
+    detail_level: str = "medium",
+    max_staleness: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    对外暴露的主函数：
+    1. 调 /contexts 拿最新 raw JSON
+    2. 调 compress_home_context(raw) 做压缩
+    3. 出错时返回带 status=error 的结构，而不是抛异常
+
+    Args:
+        task_type: 任务类型，决定抓取哪些 section（见 TASK_FETCH_PLANS）
+        detail_level: 详细程度，low 时只抓取 todos
+        max_staleness: 允许的最大陈旧时间（秒）。上一次成功的摘要不超过这个时间时
+            直接返回它，同时在后台刷新（stale-while-revalidate）；默认每次都同步抓取
+
+    Returns:
+        压缩后的摘要，meta.age_seconds 表示摘要生成至今的秒数，
+        meta.sections 表示本次抓取的 section
+    """
+    key = (task_type, detail_level)
+    if max_staleness is not None:
+        cached = _get_fresh_summary(key, max_staleness)
+        if cached is not None:
+            _refresh_summary_in_background(key)
+            return cached
+
+    return _remember_summary(key, _build_summary(task_type, detail_level))
+
+# ---------- 异步 API ----------
+#
+# 基于 httpx.AsyncClient（每个事件循环一个连接池），返回结构与同步版本一致。
+# 本地缓存读写是阻塞的磁盘 IO，通过 asyncio.to_thread 放到线程池执行。
+# 未安装 httpx 时整体退化为在线程池中调用同步版本。
+
+def _get_async_client() -> "httpx.AsyncClient":
+    """
+    获取当前事件循环的 AsyncClient。
+
+    httpx 的连接池绑定在创建它的事件循环上，因此按事件循环缓存。
+    """
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+            ),
+        )
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+async def aclose_async_client() -> None:
+    """关闭当前事件循环的 AsyncClient（事件循环退出前调用）。"""
+    if httpx is None:
+        return
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+async def _fetch_section_async(data_type: str, limit: int, timeout: float) -> Optional[Dict[str, Any]]:
+    """异步请求单个 /api/debug/* 端点，异常直接抛给调用方处理。"""
+    resp = await _get_async_client().get(
+        f"{MINECONTEXT_BASE_URL}{API_ENDPOINTS[data_type]}",
+        params={"limit": limit},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return _parse_section_payload(data_type, resp.json())
+
+async def _fetch_section_in_budget_async(
+    data_type: str,
+    limit: int,
+    budget: RequestBudget,
+) -> Optional[Dict[str, Any]]:
+    """_fetch_section_in_budget 的异步版本。"""
+    return await budget.acall(lambda timeout: _fetch_section_async(data_type, limit, timeout))
+
+async def fetch_latest_context_async(
+    limit: int = 1,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    sections: Optional[Sequence[str]] = None,
+    policy: Optional[RequestPolicy] = None,
+) -> Dict[str, Any]:
+    """
+    fetch_latest_context 的异步版本：并发请求各个端点，共享一个整体 deadline。
+
+    Args:
+        limit: 每个端点返回的记录数
+        timeout: 单个请求的超时上限（秒），默认使用策略中的值
+        deadline: 整体截止时间（秒），只传 timeout 时等于 timeout
+        sections: 要请求的 section（API_ENDPOINTS 的 key），默认全部
+        policy: 请求策略，默认 SUMMARY_REQUEST_POLICY
+
+    Returns:
+        与 fetch_latest_context 相同的结构
+    """
+    if httpx is None:
+        return await asyncio.to_thread(
+            fetch_latest_context, limit, timeout, True, deadline, sections, policy
+        )
+
+    sections = _normalize_sections(sections)
+    if deadline is None:
+        deadline = timeout
+    budget = _resolve_policy(SUMMARY_REQUEST_POLICY, policy, timeout, deadline).start()
+    _BREAKER.before_call()
+    overall = budget.policy.total_deadline
+    tasks = {
+        asyncio.ensure_future(_fetch_section_in_budget_async(data_type, limit, budget)): data_type
+        for data_type in sections
+    }
+    done, pending = await asyncio.wait(tasks, timeout=budget.remaining())
+
+    results: Dict[str, Any] = {}
+    unavailable = 0
+    for task in done:
+        data_type = tasks[task]
+        try:
+            results[data_type] = task.result()
+        except Exception as e:
+            logger.warning(f"获取 {data_type} 失败: {e}")
+            results[data_type] = {"records": []}
+            unavailable += _is_unavailable_error(e)
+    for task in pending:
+        data_type = tasks[task]
+        task.cancel()
+        logger.warning(f"获取 {data_type} 超过整体截止时间 {overall}s")
+        results[data_type] = {"records": []}
+        unavailable += 1
+    _record_context_outcome(unavailable, len(sections))
+
+    raw_data = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": {},
+    }
+    for data_type in sections:
+        section = results.get(data_type)
+        if section is not None:
+            raw_data["data"][data_type] = section
+    return raw_data
+
+async def _aopen_activity_page(
+    client: "httpx.AsyncClient",
+    params: Dict[str, Any],
+    timeout: float,
+    stream: bool,
+) -> "httpx.Response":
+    """_open_activity_page 的异步版本。"""
+    request = client.build_request(
+        "GET",
+        f"{MINECONTEXT_BASE_URL}{API_ENDPOINTS['activities']}",
+        params=params,
+        timeout=timeout,
+    )
+    resp = await client.send(request, stream=stream)
+    try:
+        resp.raise_for_status()
+    except Exception:
+        await resp.aclose()
+        raise
+    return resp
+
+async def aiter_activity_pages(
+    days: int = 7,
+    page_size: int = ACTIVITY_PAGE_SIZE,
+    timeout: Optional[float] = None,
+    max_pages: Optional[int] = None,
+    since: Optional[datetime] = None,
+    stream: bool = True,
+    policy: Optional[RequestPolicy] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """iter_activity_pages 的异步版本，参数、预算和停止条件相同（需要 httpx）。"""
+    _BREAKER.before_call()
+    budget = _resolve_policy(ACTIVITY_REQUEST_POLICY, policy, timeout).start()
+    pager = _ActivityPager(days, page_size, max_pages=max_pages, since=since)
+    client = _get_async_client()
+    while not pager.done:
+        started = time.perf_counter()
+        params = pager.params()
+        try:
+            resp = await budget.acall(lambda t: _aopen_activity_page(client, params, t, stream))
+        except Exception as e:
+            _record_request_error(e)
+            raise
+        _BREAKER.record_success()
+        try:
+            if stream:
+                page = pager.stream_page()
+                async for chunk in resp.aiter_bytes(STREAM_CHUNK_SIZE):
+                    page.feed(chunk)
+                    if page.stopped:
+                        break
+                in_window = page.close()
+                parse_seconds, received = page.parse_seconds, page.received
+            else:
+                parse_started = time.perf_counter()
+                in_window = pager.consume(resp.json())
+                parse_seconds, received = time.perf_counter() - parse_started, len(resp.content)
+        finally:
+            await resp.aclose()
+        _record_page_spans(started, parse_seconds, received, in_window)
+        if in_window:
+            yield in_window
+
+async def get_activities_async(
+    days: int = 7,
+    use_cache: bool = True,
+    sync: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    get_activities 的异步版本，缓存、增量同步和 fallback 策略相同。
+
+    Args:
+        days: 获取多少天内的数据（默认7天）
+        use_cache: 是否使用本地缓存（默认启用）
+        sync: 是否基于已有缓存做增量同步（默认启用，仅在 use_cache 时生效）
+
+    Returns:
+        activities 列表（最新的在前）
+    """
+    if httpx is None:
+        return await asyncio.to_thread(get_activities, days, use_cache, sync)
+
+    with span("fetch.activities", days=days, use_cache=use_cache) as s:
+        _ensure_cache_dir()
+        window_start = datetime.now() - timedelta(days=days)
+
+        if not use_cache:
+            activities = await _fetch_activities_async(days, window_start, use_cache, sync)
+            s.count("items", len(activities))
+            return activities
+
+        cached = await asyncio.to_thread(_load_fresh_cache, days, window_start)
+        if cached is None:
+            # 与同步版本相同：持有拉取锁后重新检查缓存，同一时间只有一个调用者拉取
+            lock = await _acquire_fetch_lock_async()
+            try:
+                window_start = datetime.now() - timedelta(days=days)
+                cached = await asyncio.to_thread(_load_fresh_cache, days, window_start)
+                if cached is None:
+                    activities = await _fetch_activities_async(days, window_start, use_cache, sync)
+                    s.count("items", len(activities))
+                    return activities
+            finally:
+                if lock is not None:
+                    lock.release()
+
+        s.set(source="cache")
+        s.count("items", len(cached))
+        return cached
+
+async def _fetch_activities_async(
+    days: int,
+    window_start: datetime,
+    use_cache: bool,
+    sync: bool,
+) -> List[Dict[str, Any]]:
+    """_fetch_activities 的异步版本。"""
+    logger.info(f"从 MineContext API 获取数据...")
+    all_activities: List[Dict[str, Any]] = []
+    minecontext_available = False
+
+    try:
+        sync_base = None
+        if use_cache and sync:
+            sync_base = await asyncio.to_thread(_load_sync_base, window_start)
+
+        since = None
+        if sync_base is not None:
+            watermark = sync_base["watermark"]
+            logger.info(f"增量同步，水位: {watermark.get('end_time')} (id={watermark.get('id')})")
+            since = _parse_activity_time(watermark)
+
+        fetched: List[Dict[str, Any]] = []
+        mode = "incremental" if sync_base is not None else "full"
+        with span("fetch.sync", mode=mode) as s:
+            async for page in aiter_activity_pages(days=days, since=since):
+                fetched.extend(page)
+            s.count("items", len(fetched))
+
+        if use_cache:
+            with span("cache.save", backend=CACHE_BACKEND) as s:
+                all_activities = await asyncio.to_thread(
+                    _save_to_cache, fetched, days, window_start, sync_base
+                )
+                s.count("items", len(all_activities))
+        else:
+            all_activities = _merge_activities([], fetched, window_start)
+
+        minecontext_available = len(all_activities) > 0
+
+    except Exception as e:
+        logger.warning(f"从 MineContext API 获取数据失败: {e}")
+        minecontext_available = False
+
+    if not minecontext_available:
+        with span("fetch.fallback") as s:
+            all_activities = await asyncio.to_thread(
+                _load_fallback_activities, days, window_start, use_cache
+            )
+            s.count("items", len(all_activities))
+
+    return all_activities
+
+async def get_minecontext_summary_async(
+    task_type: Optional[str] = None,
+    detail_level: str = "medium",
+    max_staleness: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    get_minecontext_summary 的异步版本，参数和返回结构相同，出错时同样返回 status=error。
+
+    命中 max_staleness 时后台刷新在线程中进行，不占用事件循环。
+    """
+    if httpx is None:
+        return await asyncio.to_thread(get_minecontext_summary, task_type, detail_level, max_staleness)
+
+    key = (task_type, detail_level)
+    if max_staleness is not None:
+        cached = _get_fresh_summary(key, max_staleness)
+        if cached is not None:
+            _refresh_summary_in_background(key)
+            return cached
+
+    sections = get_fetch_plan(task_type, detail_level)
+    try:
+        with span("fetch.context", sections=list(sections)) as s:
+            raw = await fetch_latest_context_async(sections=sections)
+            s.count("records", _count_records(raw))
+    except (httpx.HTTPError, CircuitOpenError, ValueError) as e:
+        return _remember_summary(key, _fetch_error_summary(e))
+
+    summary = await asyncio.to_thread(_summarize_raw, raw, task_type, detail_level, sections)
+    return _remember_summary(key, summary)
+
 # 方便你命令行测试
 if __name__ == "__main__":
     # 假设你把 JSON 存成了 samples/20251208_latest.json
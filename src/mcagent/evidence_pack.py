@@ -14,26 +14,33 @@ from typing import Any, Dict, List, Optional
 from datetime import datetime
 import random
 
+try:
+    from .activity import Activity, ActivityLike, to_activities
+    from .telemetry import span
+except ImportError:
+    from activity import Activity, ActivityLike, to_activities
+    from telemetry import span
+
 
 class EvidencePack:
     """
     证据包类，用于生成和管理证据
     """
 
-    def __init__(self, candidate: Dict[str, Any], activities: List[Dict[str, Any]]):
+    def __init__(self, candidate: Dict[str, Any], activities: List[ActivityLike]):
         """
         初始化
 
         Args:
             candidate: 候选行为（来自 behavior_miner）
-            activities: 所有相关 activities
+            activities: 所有相关 activities（dict 会在这里转换成 Activity）
         """
         self.candidate = candidate
         self.candidate_id = candidate.get("candidate_id")
         self.title = candidate.get("title")
-        self.activities = activities
+        self.activities = to_activities(activities)
 
-    def _filter_candidate_activities(self) -> List[Dict[str, Any]]:
+    def _filter_candidate_activities(self) -> List[Activity]:
         """
         从所有 activities 中筛选出属于当前 candidate 的 activities
 
@@ -46,23 +53,24 @@ class EvidencePack:
         candidate_activities = []
 
         for activity in self.activities:
-            activity_id = activity.get("id")
-            if activity_id in sample_ids:
+            if activity.id in sample_ids:
                 candidate_activities.append(activity)
 
         # 如果通过 sample_ids 找不到足够的 activities，尝试通过标题匹配
         if len(candidate_activities) < 3:
             candidate_title = self.title.lower()
+            included = {id(activity) for activity in candidate_activities}
             for activity in self.activities:
-                activity_title = (activity.get("title") or "").lower()
+                activity_title = activity.title_lower
                 # 如果标题相似，也包含进来
                 if candidate_title in activity_title or activity_title in candidate_title:
-                    if activity not in candidate_activities:
+                    if id(activity) not in included:
+                        included.add(id(activity))
                         candidate_activities.append(activity)
 
         return candidate_activities
 
-    def _extract_excerpt(self, activity: Dict[str, Any], max_length: int = 200) -> str:
+    def _extract_excerpt(self, activity: Activity, max_length: int = 200) -> str:
         """
         从 activity 中提取 excerpt（摘要片段）
 
@@ -76,7 +84,7 @@ class EvidencePack:
             excerpt 文本
         """
         # 1. 优先使用 content
-        content = activity.get("content") or ""
+        content = activity.content
         if content and len(content.strip()) > 10:
             excerpt = content.strip()
             if len(excerpt) > max_length:
@@ -90,16 +98,25 @@ class EvidencePack:
             return excerpt
 
         # 2. 其次使用 title
-        title = activity.get("title") or ""
+        title = activity.title or ""
         if title:
             return title
 
         # 3. 最后返回默认值
         return "No excerpt available"
 
+    @staticmethod
+    def _occurred_ts(activity: Activity) -> float:
+        """排序用的发生时间：优先 start_ts，其次 end_ts，都没有时排在最后。"""
+        if activity.start_ts is not None:
+            return activity.start_ts
+        if activity.end_ts is not None:
+            return activity.end_ts
+        return float("inf")
+
     def _select_diverse_examples(
-        self, activities: List[Dict[str, Any]], min_examples: int = 3
-    ) -> List[Dict[str, Any]]:
+        self, activities: List[Activity], min_examples: int = 3
+    ) -> List[Activity]:
         """
         从 activities 中选择至少 min_examples 条样本，按时间分散
 
@@ -119,12 +136,7 @@ class EvidencePack:
             return []
 
         # 按时间排序
-        activities_sorted = sorted(
-            activities,
-            key=lambda x: x.get("start_time")
-            or x.get("end_time")
-            or "9999-12-31",
-        )
+        activities_sorted = sorted(activities, key=self._occurred_ts)
 
         total = len(activities_sorted)
 
@@ -151,10 +163,7 @@ class EvidencePack:
                     selected.append(activities_sorted[idx])
 
         # 按时间再次排序
-        selected_sorted = sorted(
-            selected,
-            key=lambda x: x.get("start_time") or x.get("end_time") or "9999-12-31",
-        )
+        selected_sorted = sorted(selected, key=self._occurred_ts)
 
         return selected_sorted
 
@@ -274,9 +283,9 @@ class EvidencePack:
         examples = []
         for activity in selected_activities:
             example = {
-                "occurred_at": activity.get("start_time")
-                or activity.get("end_time"),
-                "source_ref": activity.get("id"),
+                "occurred_at": activity.start_time
+                or activity.end_time,
+                "source_ref": activity.id,
                 "excerpt": self._extract_excerpt(activity),
             }
             examples.append(example)
@@ -311,7 +320,7 @@ class EvidencePack:
 
 
 def create_evidence_pack(
-    candidate: Dict[str, Any], activities: List[Dict[str, Any]], min_examples: int = 3
+    candidate: Dict[str, Any], activities: List[ActivityLike], min_examples: int = 3
 ) -> Dict[str, Any]:
     """
     生成证据包的便捷函数
@@ -324,8 +333,12 @@ def create_evidence_pack(
     Returns:
         证据包
     """
-    pack = EvidencePack(candidate, activities)
-    return pack.generate_pack(min_examples=min_examples)
+    with span("evidence", candidate_id=candidate.get("candidate_id")) as s:
+        pack = EvidencePack(candidate, activities)
+        evidence_pack = pack.generate_pack(min_examples=min_examples)
+        s.count("items", len(activities))
+        s.count("examples", len(evidence_pack["examples"]))
+        return evidence_pack
 
 
 if __name__ == "__main__":
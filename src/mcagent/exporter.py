@@ -5,13 +5,18 @@
 整合行为挖掘、证据生成和 PRD 生成的全流程导出
 """
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from .activity import ActivityLike, to_activities
 from .behavior_miner import mine_behaviors
 from .evidence_pack import create_evidence_pack
 from .prd_generator import generate_prd
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
 
 
 def export_candidate_3piece(
@@ -19,6 +24,8 @@ def export_candidate_3piece(
     output_dir: str = "exports",
     days: int = 30,
     verbose: bool = False,
+    clusters: Optional[List[Dict[str, Any]]] = None,
+    activities: Optional[List[ActivityLike]] = None,
 ) -> Dict[str, str]:
     """
     导出 3 件套: PRD + SPEC(证据包) + EVIDENCE_PACK
@@ -28,6 +35,8 @@ def export_candidate_3piece(
         output_dir: 输出目录
         days: 分析天数
         verbose: 显示详细信息
+        clusters: 已挖掘的候选列表（传入时跳过重新挖掘）
+        activities: 已获取的 activities（传入时跳过重新读取）
 
     Returns:
         导出的文件路径字典: {"prd": "...", "spec": "...", "evidence": "..."}
@@ -37,10 +46,10 @@ def export_candidate_3piece(
     output_path.mkdir(parents=True, exist_ok=True)
 
     # 1. 获取所有候选行为
-    if verbose:
-        print(f"[信息] 获取行为数据（{days} 天）...")
-
-    clusters = mine_behaviors(days=days, top_n=10, use_cache=True)
+    if clusters is None:
+        if verbose:
+            logger.info(f"获取行为数据（{days} 天）...")
+        clusters = mine_behaviors(days=days, top_n=10, use_cache=True)
 
     if not clusters:
         raise ValueError("未找到任何行为模式")
@@ -59,21 +68,25 @@ def export_candidate_3piece(
         )
 
     if verbose:
-        print(f"[信息] 找到 candidate: {candidate['title']}")
+        logger.info(f"找到 candidate: {candidate['title']}")
 
     # 2. 获取 activities
-    from .context_wrapper import get_activities
+    if activities is None:
+        from .context_wrapper import get_activities
+
+        activities = get_activities(days=days, use_cache=True)
 
-    activities = get_activities(days=days, use_cache=True)
+    # 转换一次，证据包和 PRD 共用
+    activities = to_activities(activities)
 
     # 3. 生成证据包
     if verbose:
-        print("[信息] 生成证据包...")
+        logger.info("生成证据包...")
     evidence_pack = create_evidence_pack(candidate, activities, min_examples=3)
 
     # 4. 生成 PRD
     if verbose:
-        print("[信息] 生成 PRD...")
+        logger.info("生成 PRD...")
     prd = generate_prd(candidate, evidence_pack, activities)
 
     # 5. 生成文件名
@@ -86,39 +99,42 @@ def export_candidate_3piece(
     # 6. 导出三个文件
     exported_files = {}
 
-    # 导出 PRD (JSON)
-    if verbose:
-        print("[信息] 导出 PRD...")
-    prd_file = output_path / f"{filename_base}_prd.json"
-    with open(prd_file, "w", encoding="utf-8") as f:
-        json.dump(prd, f, ensure_ascii=False, indent=2)
-    exported_files["prd"] = str(prd_file)
+    with span("export", candidate_id=candidate_id) as export_span:
+        # 导出 PRD (JSON)
+        if verbose:
+            logger.info("导出 PRD...")
+        prd_file = output_path / f"{filename_base}_prd.json"
+        with open(prd_file, "w", encoding="utf-8") as f:
+            json.dump(prd, f, ensure_ascii=False, indent=2)
+        exported_files["prd"] = str(prd_file)
 
-    # 导出 SPEC (简化版，只包含关键信息)
-    if verbose:
-        print("[信息] 导出 SPEC...")
-    spec = {
-        "candidate": candidate,
-        "evidence_pack": evidence_pack,
-        "generated_at": datetime.now().isoformat(),
-    }
-    spec_file = output_path / f"{filename_base}_spec.json"
-    with open(spec_file, "w", encoding="utf-8") as f:
-        json.dump(spec, f, ensure_ascii=False, indent=2)
-    exported_files["spec"] = str(spec_file)
-
-    # 导出 EVIDENCE_PACK (单独的证据包)
-    if verbose:
-        print("[信息] 导出 EVIDENCE_PACK...")
-    evidence_file = output_path / f"{filename_base}_evidence_pack.json"
-    with open(evidence_file, "w", encoding="utf-8") as f:
-        json.dump(evidence_pack, f, ensure_ascii=False, indent=2)
-    exported_files["evidence"] = str(evidence_file)
+        # 导出 SPEC (简化版，只包含关键信息)
+        if verbose:
+            logger.info("导出 SPEC...")
+        spec = {
+            "candidate": candidate,
+            "evidence_pack": evidence_pack,
+            "generated_at": datetime.now().isoformat(),
+        }
+        spec_file = output_path / f"{filename_base}_spec.json"
+        with open(spec_file, "w", encoding="utf-8") as f:
+            json.dump(spec, f, ensure_ascii=False, indent=2)
+        exported_files["spec"] = str(spec_file)
+
+        # 导出 EVIDENCE_PACK (单独的证据包)
+        if verbose:
+            logger.info("导出 EVIDENCE_PACK...")
+        evidence_file = output_path / f"{filename_base}_evidence_pack.json"
+        with open(evidence_file, "w", encoding="utf-8") as f:
+            json.dump(evidence_pack, f, ensure_ascii=False, indent=2)
+        exported_files["evidence"] = str(evidence_file)
+
+        export_span.count("files", len(exported_files))
 
     if verbose:
-        print(f"[成功] 导出完成:")
+        logger.info(f"导出完成:")
         for file_type, filepath in exported_files.items():
-            print(f"  - {file_type}: {filepath}")
+            logger.info(f"  - {file_type}: {filepath}")
 
     return exported_files
 
@@ -143,7 +159,7 @@ def export_all_3piece(
     """
     # 获取所有候选行为
     if verbose:
-        print(f"[信息] 获取 Top {top_n} 候选行为（{days} 天）...")
+        logger.info(f"获取 Top {top_n} 候选行为（{days} 天）...")
 
     clusters = mine_behaviors(days=days, top_n=top_n, use_cache=True)
 
@@ -157,7 +173,7 @@ def export_all_3piece(
         candidate_id = candidate.get("candidate_id")
 
         if verbose:
-            print(f"\n[{i}/{len(clusters)}] 处理 {candidate_id}: {candidate['title']}")
+            logger.info(f"[{i}/{len(clusters)}] 处理 {candidate_id}: {candidate['title']}")
 
         try:
             exported_files = export_candidate_3piece(
@@ -168,17 +184,18 @@ def export_all_3piece(
             )
             exported_all.append(exported_files)
         except Exception as e:
-            print(f"[警告] 导出 {candidate_id} 失败: {e}")
+            logger.warning(f"导出 {candidate_id} 失败: {e}")
             continue
 
     if verbose:
-        print(f"\n[成功] 总计导出 {len(exported_all)} 个候选的 3 件套")
+        logger.info(f"总计导出 {len(exported_all)} 个候选的 3 件套")
 
     return exported_all
 
 
 if __name__ == "__main__":
     # 测试
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     print("=" * 70)
     print("导出器测试")
     print("=" * 70)
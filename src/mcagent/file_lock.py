@@ -0,0 +1,137 @@
+# file_lock.py
+"""
+跨进程的文件锁和原子写入。
+
+CLI、MCP server 和 failure inspector 可能同时运行并读写 data/ 下的缓存：
+- FileLock：基于 flock（Unix）/ msvcrt.locking（Windows）的排他锁，
+  进程退出时由操作系统自动释放，不会因为进程崩溃留下死锁
+- atomic_write_bytes / atomic_write_text：先写同目录下的临时文件再 os.replace，
+  读者要么看到旧文件，要么看到完整的新文件，不会读到写了一半的内容
+"""
+import os
+import pathlib
+import tempfile
+import time
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+class LockTimeout(TimeoutError):
+    """在超时时间内没有拿到文件锁。"""
+
+
+class FileLock:
+    """
+    跨进程排他锁
+
+    同一进程内的不同线程各自创建 FileLock 时同样互斥（锁绑定在各自打开的文件上）；
+    同一个 FileLock 实例不可重入。
+    """
+
+    def __init__(self, path: PathLike, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        """
+        初始化
+
+        Args:
+            path: 锁文件路径（不存在时自动创建，父目录需要存在）
+            timeout: 默认的等待时间（秒），None 表示一直等待
+            poll_interval: 等待时的轮询间隔（秒）
+        """
+        self.path = pathlib.Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    @property
+    def locked(self) -> bool:
+        """当前实例是否持有锁。"""
+        return self._fd is not None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout: Optional[float] = -1) -> None:
+        """
+        获取锁。
+
+        Args:
+            timeout: 等待时间（秒），None 表示一直等待，默认使用初始化时的 timeout
+
+        Raises:
+            LockTimeout: 超时仍未拿到锁
+        """
+        if self._fd is not None:
+            raise RuntimeError(f"FileLock 不可重入: {self.path}")
+        if timeout == -1:
+            timeout = self.timeout
+
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"等待文件锁超时（{timeout}s）: {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self) -> None:
+        """释放锁（未持有时什么都不做）。"""
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def atomic_write_bytes(path: PathLike, data: bytes) -> None:
+    """
+    原子地写入文件：先写同目录下的临时文件并 fsync，再 os.replace 到目标路径。
+
+    写入失败时删除临时文件，目标文件保持不变。
+    """
+    path = pathlib.Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: PathLike, text: str, encoding: str = "utf-8") -> None:
+    """atomic_write_bytes 的文本版本。"""
+    atomic_write_bytes(path, text.encode(encoding))
@@ -0,0 +1,72 @@
+# fingerprint.py
+"""
+MineContext 数据的内容指纹。
+
+轮询时大部分结果和上一次完全相同。对每条记录的完整内容（按 key 排序的 JSON）
+做哈希，指纹不变就说明数据没有变化，压缩、聚类等下游步骤可以直接复用上一次的结果。
+只看 id 和更新时间不够：MineContext 修改 todo 的状态、紧急程度或内容时不一定
+更新时间字段，而这些字段正是摘要和聚类读取的内容。
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Mapping
+
+_RECORD_END = b"\x1e"
+
+
+def _new_hash() -> Any:
+    return hashlib.blake2b(digest_size=16)
+
+
+def _update_record(digest: Any, record: Any) -> None:
+    """
+    把一条记录的完整内容写入 digest。
+
+    Activity 先用 to_dict() 还原成 dict，和对应的原始 dict 得到相同的指纹。
+    """
+    if hasattr(record, "to_dict"):
+        record = record.to_dict()
+    digest.update(json.dumps(record, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(_RECORD_END)
+
+
+def fingerprint_records(records: Iterable[Any]) -> str:
+    """
+    计算记录列表的指纹（记录顺序也会影响结果）。
+
+    Args:
+        records: dict 或 Activity 列表（其他可 JSON 序列化的元素同样按内容计算）
+
+    Returns:
+        32 位十六进制字符串
+    """
+    digest = _new_hash()
+    for record in records:
+        _update_record(digest, record)
+    return digest.hexdigest()
+
+
+def fingerprint_sections(data: Mapping[str, Any]) -> Dict[str, str]:
+    """
+    分别计算 fetch_latest_context 返回的各个 section 的指纹。
+
+    Args:
+        data: raw["data"]，{section: {"records": [...]}}
+
+    Returns:
+        {section: 指纹}
+    """
+    fingerprints = {}
+    for name, section in data.items():
+        records = section.get("records") if isinstance(section, dict) else None
+        fingerprints[name] = fingerprint_records(records or [])
+    return fingerprints
+
+
+def combine_fingerprints(fingerprints: Mapping[str, str]) -> str:
+    """把多个 section 的指纹合并成一个（与 section 顺序无关）。"""
+    digest = _new_hash()
+    for name in sorted(fingerprints):
+        digest.update(f"{name}={fingerprints[name]}".encode("utf-8"))
+        digest.update(_RECORD_END)
+    return digest.hexdigest()
@@ -0,0 +1,103 @@
+# ingest.py
+"""
+挖掘前的入库阶段：去重并折叠近似重复的 activities。
+
+MineContext 会连续产生大量几乎相同的 activity（例如同一个窗口的多次截屏），
+samples 兜底和过期缓存也可能返回重叠的记录。聚类的开销随条数平方增长，
+因此在聚类之前：
+
+1. 按 id 去重：同一个 id 只保留第一次出现的记录
+2. 折叠连续的近似重复：按输入顺序（get_activities 返回的是时间倒序）滚动比较
+   相邻记录的内容哈希，哈希相同的一段记录折叠成一条，count 记为这段的条数，
+   时间范围扩展到整段的最早开始 / 最晚结束
+
+内容哈希基于小写标题 + 正文，忽略空白差异和数字（截屏中的时间、计数等易变部分）。
+没有标题的记录不参与聚类（相似度恒为 0），也不折叠。
+"""
+import hashlib
+import re
+from typing import Iterable, List, Optional
+
+try:
+    from .activity import Activity, ActivityLike, to_activities
+except ImportError:
+    from activity import Activity, ActivityLike, to_activities
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+def content_hash(activity: Activity) -> bytes:
+    """activity 归一化后的标题 + 正文的哈希（8 字节）。"""
+    text = activity.title_lower + "\0" + activity.content.lower()
+    text = _SPACES.sub(" ", _DIGITS.sub("0", text)).strip()
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def _collapse(run: List[Activity]) -> Activity:
+    """把一段近似重复的 activities 折叠成一条：保留第一条的内容，累加 count，扩展时间范围。"""
+    if len(run) == 1:
+        return run[0]
+
+    head = run[0]
+    starts = [act for act in run if act.start_ts is not None]
+    ends = [act for act in run if act.end_ts is not None]
+    earliest = min(starts, key=lambda act: act.start_ts) if starts else head
+    latest = max(ends, key=lambda act: act.end_ts) if ends else head
+
+    collapsed = Activity(
+        id=head.id,
+        title=head.title,
+        content=head.content,
+        start_time=earliest.start_time,
+        end_time=latest.end_time,
+        metadata=head.metadata_raw,
+        extra=head.extra,
+        count=sum(act.count for act in run),
+    )
+    # 输出的字段和第一条保持一致
+    collapsed._present = head._present
+    return collapsed
+
+
+def dedupe_activities(activities: Iterable[ActivityLike], collapse: bool = True) -> List[Activity]:
+    """
+    按 id 去重，并把连续的近似重复 activities 折叠成带 count 的一条记录。
+
+    输入中的 Activity 不会被修改；折叠产生的是新的 Activity。
+
+    Args:
+        activities: dict 或 Activity 列表（按时间排序，get_activities 的返回值即可）
+        collapse: 是否折叠连续的近似重复（False 时只按 id 去重）
+
+    Returns:
+        Activity 列表，保持输入顺序；所有记录的 count 之和等于去重后的条数
+    """
+    seen_ids = set()
+    result: List[Activity] = []
+    run: List[Activity] = []
+    run_hash: Optional[bytes] = None
+
+    for activity in to_activities(activities):
+        if activity.id is not None:
+            if activity.id in seen_ids:
+                continue
+            seen_ids.add(activity.id)
+
+        if not collapse:
+            result.append(activity)
+            continue
+
+        digest = content_hash(activity) if activity.title_lower else None
+        if run and (digest is None or digest != run_hash):
+            result.append(_collapse(run))
+            run = []
+        if digest is None:
+            result.append(activity)
+            continue
+        run.append(activity)
+        run_hash = digest
+
+    if run:
+        result.append(_collapse(run))
+    return result
@@ -0,0 +1,205 @@
+# json_stream.py
+"""
+增量解析 JSON 响应中的大数组。
+
+MineContext 的 activities 响应形如 {"code": 0, "data": {"activities": [...]}}，
+一页可能有上千条、每条带很长的 content。resp.json() 会先把整个响应读进内存并
+构建完整的对象树；JSONArrayStream 按块喂入字节，用 C 实现的
+JSONDecoder.raw_decode 逐个解码目标数组的元素并立即交给调用方，
+调用方丢弃的元素马上就能被回收，内存中只保留当前块和被保留的记录。
+
+只支持解析路径上的对象嵌套（如 ("data", "activities")），路径外的值整体跳过；
+根对象上的标量字段（如 code / status）会被记录在 fields 中。
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+# 解析状态
+_ROOT = "root"
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_ITEMS = "items"
+_DONE = "done"
+
+_INCOMPLETE = object()
+
+
+def _decode_value(buf: str, pos: int, eof: bool) -> Tuple[Any, int]:
+    """
+    解码从 pos 开始的一个 JSON 值。
+
+    Returns:
+        (值, 结束位置)；值在 buf 中还不完整时返回 (_INCOMPLETE, pos)
+
+    Raises:
+        ValueError: 输入已经结束但值仍然无法解析
+    """
+    try:
+        value, end = _DECODER.raw_decode(buf, pos)
+    except json.JSONDecodeError:
+        if eof:
+            raise
+        return _INCOMPLETE, pos
+    # 数字等标量可能被截断在 buf 末尾（"12" 之后还可能有 "3"）
+    if end == len(buf) and not eof:
+        return _INCOMPLETE, pos
+    return value, end
+
+
+class JSONArrayStream:
+    """
+    推送式的 JSON 数组流解析器
+
+    用法：
+        stream = JSONArrayStream(("data", "activities"))
+        for chunk in resp.iter_content(65536):
+            for item in stream.feed(chunk):
+                ...
+        for item in stream.close():
+            ...
+
+    路径上某个 key 的值直接是数组时（如 {"data": [...]}），也把它当作目标数组。
+    """
+
+    def __init__(self, path: Sequence[str]):
+        """
+        初始化
+
+        Args:
+            path: 从根对象到目标数组的 key 路径
+        """
+        self.path = tuple(path)
+        # 根对象上的标量字段
+        self.fields: Dict[str, Any] = {}
+        # 根对象上出现过的 key
+        self.root_keys: Set[str] = set()
+        # 是否找到了目标数组
+        self.found = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._state = _ROOT
+        self._depth = 0
+        self._key = None
+
+    @property
+    def done(self) -> bool:
+        """根对象是否已经解析完毕。"""
+        return self._state == _DONE
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        喂入一块字节，返回这一块中解析完成的数组元素。
+
+        Raises:
+            ValueError: 响应不是 JSON 对象
+        """
+        self._buf = self._buf[self._pos:] + self._decoder.decode(data)
+        self._pos = 0
+        return self._advance()
+
+    def close(self) -> List[Any]:
+        """
+        输入结束，返回剩余的数组元素。
+
+        Raises:
+            ValueError: JSON 不完整
+        """
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        items = self._advance()
+        if self._state != _DONE:
+            raise ValueError("JSON 响应不完整")
+        return items
+
+    def _advance(self) -> List[Any]:
+        """在当前缓冲区上尽量向前解析。"""
+        items: List[Any] = []
+        buf = self._buf
+        pos = self._pos
+
+        while self._state != _DONE:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            state = self._state
+
+            if state == _ROOT:
+                if ch != "{":
+                    raise ValueError("JSON 响应不是对象")
+                pos += 1
+                self._state = _KEY
+
+            elif state == _KEY:
+                if ch == ",":
+                    pos += 1
+                elif ch == "}":
+                    pos += 1
+                    if self._depth == 0:
+                        self._state = _DONE
+                    else:
+                        # 路径上的嵌套对象结束，回到上一层继续读 key
+                        self._depth -= 1
+                elif ch == '"':
+                    key, end = _decode_value(buf, pos, self._eof)
+                    if key is _INCOMPLETE:
+                        break
+                    self._key = key
+                    if self._depth == 0:
+                        self.root_keys.add(self._key)
+                    pos = end
+                    self._state = _COLON
+                else:
+                    raise ValueError(f"无效的 JSON（位置 {pos}）")
+
+            elif state == _COLON:
+                if ch != ":":
+                    raise ValueError(f"无效的 JSON（位置 {pos}）")
+                pos += 1
+                self._state = _VALUE
+
+            elif state == _VALUE:
+                on_path = self._depth < len(self.path) and self._key == self.path[self._depth]
+                if on_path and ch == "[" and not self.found:
+                    pos += 1
+                    self.found = True
+                    self._state = _ITEMS
+                    continue
+                if on_path and ch == "{" and self._depth + 1 < len(self.path):
+                    pos += 1
+                    self._depth += 1
+                    self._state = _KEY
+                    continue
+
+                value, end = _decode_value(buf, pos, self._eof)
+                if value is _INCOMPLETE:
+                    break
+                if self._depth == 0 and ch not in "{[":
+                    self.fields[self._key] = value
+                pos = end
+                self._state = _KEY
+
+            elif state == _ITEMS:
+                if ch == ",":
+                    pos += 1
+                elif ch == "]":
+                    pos += 1
+                    self._state = _KEY
+                else:
+                    item, end = _decode_value(buf, pos, self._eof)
+                    if item is _INCOMPLETE:
+                        break
+                    items.append(item)
+                    pos = end
+
+        self._pos = pos
+        return items
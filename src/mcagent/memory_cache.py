@@ -0,0 +1,111 @@
+# memory_cache.py
+"""
+进程内的 TTL + LRU 内存缓存。
+
+供长驻进程（如 MCP server）使用：同一份数据在有效期内直接从内存返回，
+超过容量时淘汰最久未使用的条目。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    线程安全的 TTL + LRU 缓存
+
+    - 每个条目写入后 ttl 秒过期
+    - 条目数超过 maxsize 时淘汰最久未访问的条目
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化
+
+        Args:
+            maxsize: 最多保留的条目数
+            ttl: 条目有效期（秒）
+            clock: 时间函数（测试时可替换）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的条目，命中时刷新其 LRU 位置。"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入条目，必要时淘汰最久未使用的条目。"""
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        命中则直接返回，否则调用 factory() 计算并写入缓存。
+
+        factory 在锁外执行，慢计算不会阻塞其他 key 的读取。
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        删除条目。
+
+        Args:
+            predicate: 返回 True 的 key 会被删除；为 None 时清空全部
+
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._data)
+                self._data.clear()
+                return removed
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存。"""
+        self.invalidate()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,132 @@
+# minhash.py
+"""
+MinHash 签名和 LSH 分桶：近似地找出相似的记录对。
+
+90 天或多用户的历史有几十万条 activities，即使按共享特征剪枝，常见的词
+（例如每个标题都有的应用名）也会让候选对接近平方级。MinHash 把每条记录的
+shingle 集合压缩成 num_perm 个最小哈希值，两条记录对应位置相等的概率等于
+shingle 集合的 Jaccard 相似度；LSH 把签名切成 bands 段，任意一段完全相同的
+记录落进同一个桶，只有同桶的记录才成为候选对。
+
+两条 Jaccard 相似度为 s 的记录成为候选对的概率是 1 - (1 - s^rows)^bands
+（rows = num_perm / bands），分界点大约在 (1/bands)^(1/rows)：
+- rows 越少（bands 越多），分界点越低，召回越高，候选对越多
+- num_perm 越大，签名越准确，计算签名越慢
+"""
+import hashlib
+import random
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+# 置换哈希 (a * x + b) mod p 使用的梅森素数
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHashParams(NamedTuple):
+    """
+    MinHash / LSH 参数（不可变，可以作为缓存 key）
+
+    Attributes:
+        num_perm: 签名长度（置换个数），必须是 bands 的整数倍
+        bands: LSH 分段数
+        shingle_size: 标题字符 shingle 的长度
+        max_bucket: 桶内成员超过这个数时只和桶内第一个成员组成候选对，避免大桶产生平方级的候选对
+        seed: 生成置换参数的随机种子
+    """
+
+    num_perm: int = 64
+    bands: int = 32
+    shingle_size: int = 3
+    max_bucket: int = 64
+    seed: int = 1
+
+    @property
+    def rows(self) -> int:
+        """每段的签名值个数。"""
+        return self.num_perm // self.bands
+
+    @property
+    def threshold(self) -> float:
+        """成为候选对的概率约为 50% 时的 Jaccard 相似度。"""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+
+def shingle_hash(shingle: str) -> int:
+    """shingle 的 32 位哈希（跨进程稳定，不受 PYTHONHASHSEED 影响）。"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """
+    计算 shingle 集合的 MinHash 签名
+
+    每个不同的 shingle 只计算一次全部置换并缓存，签名是这些置换值逐列取最小值。
+
+    Example:
+        hasher = MinHasher(MinHashParams(num_perm=64, bands=32))
+        signature = hasher.signature({"git", "ith", "thu", "hub"})
+    """
+
+    def __init__(self, params: MinHashParams = MinHashParams()):
+        if params.num_perm <= 0 or params.bands <= 0 or params.num_perm % params.bands:
+            raise ValueError(f"num_perm 必须是 bands 的正整数倍: num_perm={params.num_perm}, bands={params.bands}")
+        self.params = params
+        rng = random.Random(params.seed)
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(params.num_perm)
+        ]
+        self._cache: Dict[str, Tuple[int, ...]] = {}
+
+    def _permuted(self, shingle: str) -> Tuple[int, ...]:
+        values = self._cache.get(shingle)
+        if values is None:
+            x = shingle_hash(shingle)
+            values = tuple(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in self._permutations)
+            self._cache[shingle] = values
+        return values
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        """shingle 集合的签名；集合为空时返回空元组。"""
+        rows = [self._permuted(shingle) for shingle in shingles]
+        if not rows:
+            return ()
+        return tuple(map(min, zip(*rows)))
+
+
+def lsh_candidate_pairs(
+    signatures: Sequence[Tuple[int, ...]],
+    params: MinHashParams = MinHashParams(),
+) -> Iterator[Tuple[int, int]]:
+    """
+    按 LSH 分段分桶，生成同桶的记录对 (j, i)，j < i，每对只生成一次。
+
+    空签名的记录不参与分桶。桶内成员超过 params.max_bucket 时只生成
+    (桶内第一个成员, 其他成员) 的对。
+
+    Args:
+        signatures: 每条记录的签名（由同一个 MinHasher 计算）
+        params: 与签名一致的参数
+    """
+    rows = params.rows
+    seen = set()
+    for band in range(params.bands):
+        low, high = band * rows, (band + 1) * rows
+        buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature:
+                buckets[signature[low:high]].append(index)
+
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            if len(bucket) > params.max_bucket:
+                pairs: Iterable[Tuple[int, int]] = ((bucket[0], other) for other in bucket[1:])
+            else:
+                pairs = combinations(bucket, 2)
+            for pair in pairs:
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
@@ -11,6 +11,13 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 from pathlib import Path
 
+try:
+    from .activity import ActivityLike
+    from .telemetry import span
+except ImportError:
+    from activity import ActivityLike
+    from telemetry import span
+
 
 class PRDGenerator:
     """
@@ -158,7 +165,7 @@ class PRDGenerator:
         self,
         candidate: Dict[str, Any],
         evidence_pack: Dict[str, Any],
-        activities: List[Dict[str, Any]],
+        activities: List[ActivityLike],
     ) -> Dict[str, Any]:
         """
         生成 PRD
@@ -200,7 +207,7 @@ class PRDGenerator:
 def generate_prd(
     candidate: Dict[str, Any],
     evidence_pack: Dict[str, Any],
-    activities: List[Dict[str, Any]],
+    activities: List[ActivityLike],
 ) -> Dict[str, Any]:
     """
     生成 PRD 的便捷函数
@@ -213,8 +220,11 @@ def generate_prd(
     Returns:
         PRD 文档
     """
-    generator = PRDGenerator()
-    return generator.generate_prd(candidate, evidence_pack, activities)
+    with span("prd", candidate_id=candidate.get("candidate_id")) as s:
+        generator = PRDGenerator()
+        prd = generator.generate_prd(candidate, evidence_pack, activities)
+        s.count("items", len(activities))
+        return prd
 
 
 if __name__ == "__main__":
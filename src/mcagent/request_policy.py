@@ -0,0 +1,214 @@
+# request_policy.py
+"""
+MineContext 请求的超时预算和重试策略。
+
+一次摘要要请求多个端点，一次同步要请求多页。每个请求单独设置超时时，
+整体耗时没有上限；失败又没有重试，偶发的 5xx 或连接重置就会让整次调用降级。
+
+RequestPolicy 描述策略（整体预算、单个请求的超时上限、最多尝试次数、退避参数），
+每次调用通过 policy.start() 得到一个 RequestBudget：
+- 同一次调用的所有请求共享同一个截止时间
+- 每个请求的超时 = min(单个请求上限, 剩余预算)，预算用完后不再发出请求
+- 可重试的错误（连接失败 / 超时 / 429 / 5xx）按 full jitter 指数退避重试，
+  退避时间放不进剩余预算时直接放弃
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # 可选依赖
+    httpx = None
+
+try:
+    from .circuit_breaker import CircuitOpenError
+except ImportError:
+    from circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 可以重试的 HTTP 状态码
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """整体预算已经用完；继承 Timeout，现有的超时处理逻辑可以直接复用。"""
+
+
+def is_transient_error(e: BaseException) -> bool:
+    """是否是值得重试的错误：连接失败、超时、429 和 5xx。熔断和预算耗尽不重试。"""
+    if isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if isinstance(e, requests.exceptions.HTTPError):
+        return e.response is not None and e.response.status_code in TRANSIENT_STATUS_CODES
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if httpx is not None:
+        if isinstance(e, httpx.HTTPStatusError):
+            return e.response.status_code in TRANSIENT_STATUS_CODES
+        if isinstance(e, httpx.TransportError):
+            return True
+    return False
+
+
+class RequestPolicy:
+    """
+    请求策略（不可变，可以在线程之间共享）
+
+    Example:
+        policy = RequestPolicy(total_deadline=5.0, request_timeout=2.5)
+        budget = policy.start()
+        data = budget.call(lambda timeout: session.get(url, timeout=timeout))
+    """
+
+    def __init__(
+        self,
+        total_deadline: float = 5.0,
+        request_timeout: Optional[float] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 0.05,
+        backoff_max: float = 0.5,
+        min_timeout: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        初始化
+
+        Args:
+            total_deadline: 一次调用的整体预算（秒）
+            request_timeout: 单个请求的超时上限（秒），None 表示只受剩余预算限制
+            max_attempts: 每个请求最多尝试几次（1 表示不重试）
+            backoff_base: 第一次重试的退避上限（秒），之后每次翻倍
+            backoff_max: 退避上限的最大值（秒）
+            min_timeout: 剩余预算少于这个值时不再发出请求（秒）
+            clock: 时间函数（测试时可替换）
+            rng: 随机数生成器（测试时可固定种子）
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts 至少为 1")
+        self.total_deadline = total_deadline
+        self.request_timeout = request_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_timeout = min_timeout
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+    def replace(self, **changes: Any) -> "RequestPolicy":
+        """返回修改了部分参数的新策略。"""
+        params = {
+            "total_deadline": self.total_deadline,
+            "request_timeout": self.request_timeout,
+            "max_attempts": self.max_attempts,
+            "backoff_base": self.backoff_base,
+            "backoff_max": self.backoff_max,
+            "min_timeout": self.min_timeout,
+            "clock": self.clock,
+            "rng": self.rng,
+        }
+        params.update(changes)
+        return RequestPolicy(**params)
+
+    def start(self) -> "RequestBudget":
+        """开始一次调用，从现在开始计算整体预算。"""
+        return RequestBudget(self)
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestPolicy(total_deadline={self.total_deadline}, "
+            f"request_timeout={self.request_timeout}, max_attempts={self.max_attempts})"
+        )
+
+
+class RequestBudget:
+    """一次调用的剩余预算，线程安全（只读截止时间）。"""
+
+    __slots__ = ("policy", "deadline")
+
+    def __init__(self, policy: RequestPolicy):
+        self.policy = policy
+        self.deadline = policy.clock() + policy.total_deadline
+
+    def remaining(self) -> float:
+        """剩余预算（秒），不小于 0。"""
+        return max(0.0, self.deadline - self.policy.clock())
+
+    def timeout(self) -> float:
+        """
+        下一个请求可以使用的超时时间。
+
+        Raises:
+            DeadlineExceeded: 剩余预算不足 min_timeout
+        """
+        remaining = self.remaining()
+        if remaining < self.policy.min_timeout:
+            raise DeadlineExceeded(f"MineContext 请求超过整体预算 {self.policy.total_deadline}s")
+        if self.policy.request_timeout is not None:
+            return min(self.policy.request_timeout, remaining)
+        return remaining
+
+    def backoff(self, attempt: int) -> Optional[float]:
+        """
+        第 attempt 次重试前的等待时间（full jitter）。
+
+        Returns:
+            等待秒数；等待之后剩余预算不够再发一次请求时返回 None
+        """
+        policy = self.policy
+        cap = min(policy.backoff_max, policy.backoff_base * (2 ** (attempt - 1)))
+        delay = policy.rng.uniform(0, cap)
+        if delay + policy.min_timeout > self.remaining():
+            return None
+        return delay
+
+    def _next_delay(self, attempt: int, e: Exception) -> Optional[float]:
+        """失败后决定是否重试，返回等待时间；不重试时返回 None。"""
+        if attempt >= self.policy.max_attempts or not is_transient_error(e):
+            return None
+        delay = self.backoff(attempt)
+        if delay is not None:
+            logger.info(f"请求失败: {e}，{delay:.2f}s 后重试（第 {attempt + 1}/{self.policy.max_attempts} 次）")
+        return delay
+
+    def call(self, fn: Callable[[float], T]) -> T:
+        """
+        在预算内调用 fn(timeout)，可重试的错误按策略重试。
+
+        Raises:
+            DeadlineExceeded: 发出请求前预算已经用完
+            Exception: 最后一次尝试的异常
+        """
+        attempt = 0
+        while True:
+            timeout = self.timeout()
+            attempt += 1
+            try:
+                return fn(timeout)
+            except Exception as e:
+                delay = self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def acall(self, fn: Callable[[float], Awaitable[T]]) -> T:
+        """call 的异步版本。"""
+        attempt = 0
+        while True:
+            timeout = self.timeout()
+            attempt += 1
+            try:
+                return await fn(timeout)
+            except Exception as e:
+                delay = self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
@@ -0,0 +1,366 @@
+# standin_server.py
+"""
+本地 MineContext 替身服务（stand-in server）。
+
+在没有真实 MineContext 的环境里提供 /api/debug/{reports,todos,activities,tips}，
+响应格式与 MineContext 相同：{"code": 0, "status": "ok", "data": {<section>: [...]}}。
+
+- activities 按配置的数量和时间跨度生成（中文 / 英文 / 混合），最新的在前，
+  支持 limit / offset 分页
+- 可注入延迟、HTTP 错误和超时，用于离线压测抓取、缓存和 fallback 路径
+- 相同 seed 生成相同的数据和故障序列
+
+用法：
+    with StandinServer(activities=5000, days=30) as server:
+        context_wrapper.MINECONTEXT_BASE_URL = server.url
+        ...
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+SECTIONS = ("reports", "todos", "activities", "tips")
+# 未传 limit 时每个端点返回的条数
+DEFAULT_LIMIT = 10
+
+# 活动主题模板：同一主题会重复出现，便于行为挖掘聚类
+_TOPICS = [
+    {
+        "zh": ("开发 MineContext 集成", "使用 VSCode 编写 Python 包装器，调用 https://github.com/volcengine/MineContext 的 API 获取活动数据。"),
+        "en": ("Develop MineContext integration", "Writing the Python wrapper in VSCode against https://github.com/volcengine/MineContext APIs."),
+        "focus_areas": ["Python", "API Integration"],
+        "key_entities": ["MineContext", "Wrapper"],
+    },
+    {
+        "zh": ("调试失败的单元测试", "在 Terminal 中运行 pytest，定位 Traceback 中的 KeyError，并在 PyCharm 里打断点排查。"),
+        "en": ("Debug failing unit tests", "Running pytest in Terminal, tracking down a KeyError in the Traceback with PyCharm breakpoints."),
+        "focus_areas": ["Testing", "Debugging"],
+        "key_entities": ["Pytest", "Traceback"],
+    },
+    {
+        "zh": ("阅读技术文档", "在 Chrome 中浏览 https://docs.python.org/3/library/asyncio.html 和 https://www.python-httpx.org 的文档。"),
+        "en": ("Read technical documentation", "Browsing https://docs.python.org/3/library/asyncio.html and https://www.python-httpx.org in Chrome."),
+        "focus_areas": ["Learning", "Documentation"],
+        "key_entities": ["Asyncio", "Httpx"],
+    },
+    {
+        "zh": ("代码评审", "在 https://github.com 上评审 Pull Request，讨论 Docker 镜像构建和 Git 分支策略。"),
+        "en": ("Code review", "Reviewing pull requests on https://github.com, discussing the Docker build and Git branching."),
+        "focus_areas": ["Code Review", "Collaboration"],
+        "key_entities": ["GitHub", "Docker"],
+    },
+    {
+        "zh": ("团队沟通", "在 Slack 和 Teams 中同步项目进度，整理会议纪要到 Notion。"),
+        "en": ("Team communication", "Syncing project status on Slack and Teams, writing meeting notes in Notion."),
+        "focus_areas": ["Communication"],
+        "key_entities": ["Slack", "Notion"],
+    },
+    {
+        "zh": ("设计界面原型", "在 Figma 中调整 Dashboard 原型的布局和配色。"),
+        "en": ("Design UI prototype", "Adjusting the Dashboard prototype layout and colors in Figma."),
+        "focus_areas": ["Design"],
+        "key_entities": ["Figma", "Dashboard"],
+    },
+    {
+        "zh": ("编写项目文档", "使用 Obsidian 编写 README 和使用指南，上传到 https://github.com 仓库。"),
+        "en": ("Write project documentation", "Writing the README and user guide in Obsidian, pushed to https://github.com."),
+        "focus_areas": ["Documentation"],
+        "key_entities": ["Readme", "Obsidian"],
+    },
+    {
+        "zh": ("部署到 Kubernetes", "编写 Kubernetes Deployment 配置，排查 Pod 启动失败的问题。"),
+        "en": ("Deploy to Kubernetes", "Writing Kubernetes Deployment manifests and debugging Pod startup failures."),
+        "focus_areas": ["DevOps", "Deployment"],
+        "key_entities": ["Kubernetes", "Pod"],
+    },
+]
+# 标题后缀：制造同一主题下的近似标题
+_TITLE_SUFFIXES = {
+    "zh": ["", "", "", "（续）", " - 第二部分", "（收尾）"],
+    "en": ["", "", "", " (cont.)", " - part 2", " (wrap-up)"],
+}
+_TODOS = {
+    "zh": ["完成 MineContext 行为挖掘模块", "修复缓存过期判断的 bug", "整理本周工作日志", "补充单元测试", "评审同事的 PR"],
+    "en": ["Finish the behavior mining module", "Fix the cache expiry bug", "Write up this week's log", "Add unit tests", "Review a teammate's PR"],
+}
+_TIPS = {
+    "zh": ["最近频繁切换窗口，建议集中处理同类任务。", "调试时间较长，可以先写最小复现用例。", "文档阅读较多，可以整理成笔记。"],
+    "en": ["You switch windows often; try batching similar tasks.", "Debugging is taking long; write a minimal repro first.", "Lots of reading lately; consider taking notes."],
+}
+_REPORTS = {
+    "zh": "今日工作报告：主要时间花在 {topic} 上。",
+    "en": "Daily report: most of the time went into {topic}.",
+}
+
+
+def _pick_lang(rng: random.Random, lang: str) -> str:
+    if lang == "mixed":
+        return rng.choice(("zh", "en"))
+    return lang
+
+
+def _fmt(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat()
+
+
+def generate_activities(
+    count: int,
+    days: float = 7,
+    lang: str = "mixed",
+    seed: int = 0,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    生成 count 条 activities，均匀分布在最近 days 天内，最新的在前。
+
+    Args:
+        count: 条数
+        days: 时间跨度（天）
+        lang: "zh" / "en" / "mixed"
+        seed: 随机种子
+        now: 最新一条的结束时间（默认当前时间）
+
+    Returns:
+        与 MineContext 相同结构的 activity dict 列表（id 越大越新）
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    step = timedelta(days=days) / max(count, 1)
+
+    activities = []
+    for index in range(count):
+        record_lang = _pick_lang(rng, lang)
+        topic = rng.choice(_TOPICS)
+        title, content = topic[record_lang]
+        end_time = now - step * index
+        start_time = end_time - min(step, timedelta(minutes=rng.randint(10, 90)))
+        activities.append({
+            "id": count - index,
+            "title": title + rng.choice(_TITLE_SUFFIXES[record_lang]),
+            "content": content,
+            "start_time": _fmt(start_time),
+            "end_time": _fmt(end_time),
+            "metadata": json.dumps(
+                {"focus_areas": topic["focus_areas"], "key_entities": topic["key_entities"]},
+                ensure_ascii=False,
+            ),
+        })
+    return activities
+
+
+def generate_todos(count: int, lang: str = "mixed", seed: int = 0, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """生成 count 条 todos（urgency 0-3，截止时间在未来几天内）。"""
+    rng = random.Random(seed + 1)
+    now = now or datetime.now()
+    return [
+        {
+            "id": index + 1,
+            "content": rng.choice(_TODOS[_pick_lang(rng, lang)]),
+            "urgency": rng.randint(0, 3),
+            "status": rng.choice((0, 0, 0, 1)),
+            "end_time": _fmt(now + timedelta(hours=rng.randint(1, 72))),
+        }
+        for index in range(count)
+    ]
+
+
+def generate_tips(count: int, lang: str = "mixed", seed: int = 0, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """生成 count 条 tips，最新的在前。"""
+    rng = random.Random(seed + 2)
+    now = now or datetime.now()
+    return [
+        {
+            "id": count - index,
+            "content": rng.choice(_TIPS[_pick_lang(rng, lang)]),
+            "created_at": _fmt(now - timedelta(hours=index * 6)),
+        }
+        for index in range(count)
+    ]
+
+
+def generate_reports(count: int, lang: str = "mixed", seed: int = 0, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """生成 count 条日报，最新的在前。"""
+    rng = random.Random(seed + 3)
+    now = now or datetime.now()
+    reports = []
+    for index in range(count):
+        record_lang = _pick_lang(rng, lang)
+        topic = rng.choice(_TOPICS)[record_lang][0]
+        reports.append({
+            "id": count - index,
+            "content": _REPORTS[record_lang].format(topic=topic),
+            "created_at": _fmt(now - timedelta(days=index)),
+        })
+    return reports
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """把请求转交给 StandinServer 处理。"""
+
+    server: "_HTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 压测时请求量很大，不输出访问日志
+        pass
+
+    def do_GET(self) -> None:
+        status, body = self.server.standin.handle(self.path)
+        if status is None:
+            # 模拟超时：不返回任何内容直接断开
+            self.close_connection = True
+            return
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    standin: "StandinServer"
+
+
+class StandinServer:
+    """
+    MineContext 替身服务
+
+    数据在初始化时一次性生成；故障注入按请求随机触发（由 seed 决定序列）。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        activities: int = 1000,
+        days: float = 7,
+        todos: int = 10,
+        tips: int = 5,
+        reports: int = 3,
+        lang: str = "mixed",
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0,
+        seed: int = 0,
+    ):
+        """
+        初始化（不会立即监听，调用 start() 或 serve_forever()）
+
+        Args:
+            host / port: 监听地址，port=0 时自动分配
+            activities / todos / tips / reports: 各 section 生成的记录数
+            days: activities 的时间跨度（天）
+            lang: "zh" / "en" / "mixed"
+            latency: 每个请求的固定延迟（秒）
+            latency_jitter: 额外的随机延迟上限（秒）
+            error_rate: 返回 HTTP 500 的概率
+            timeout_rate: 模拟超时的概率（等待 timeout_seconds 后不返回内容直接断开）
+            timeout_seconds: 模拟超时的等待时间（秒）
+            seed: 随机种子
+        """
+        now = datetime.now()
+        self.data: Dict[str, List[Dict[str, Any]]] = {
+            "activities": generate_activities(activities, days, lang, seed, now),
+            "todos": generate_todos(todos, lang, seed, now),
+            "tips": generate_tips(tips, lang, seed, now),
+            "reports": generate_reports(reports, lang, seed, now),
+        }
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "timeouts": 0}
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.standin = self
+        self._thread: Optional[threading.Thread] = None
+        self._serving = False
+
+    @property
+    def url(self) -> str:
+        """服务地址，可直接赋给 context_wrapper.MINECONTEXT_BASE_URL。"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, path: str) -> tuple:
+        """
+        处理一个请求。
+
+        Returns:
+            (HTTP 状态码, 响应 dict)；状态码为 None 表示模拟超时
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self._rng.uniform(0, self.latency_jitter)
+            roll = self._rng.random()
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if roll < self.timeout_rate:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            time.sleep(self.timeout_seconds)
+            return None, None
+        if roll < self.timeout_rate + self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 500, {"code": 500, "status": "error", "message": "injected error"}
+
+        url = urlparse(path)
+        prefix, _, section = url.path.rpartition("/")
+        if prefix != "/api/debug" or section not in SECTIONS:
+            return 404, {"code": 404, "status": "error", "message": f"unknown path: {url.path}"}
+
+        query = parse_qs(url.query)
+        try:
+            limit = int(query.get("limit", [DEFAULT_LIMIT])[0])
+            offset = int(query.get("offset", [0])[0])
+        except ValueError:
+            return 400, {"code": 400, "status": "error", "message": "invalid limit/offset"}
+
+        records = self.data[section][max(offset, 0):max(offset, 0) + max(limit, 0)]
+        return 200, {"code": 0, "status": "ok", "data": {section: records}}
+
+    def start(self) -> "StandinServer":
+        """在后台线程中启动服务。"""
+        self._serving = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行服务（Ctrl+C 退出）。"""
+        self._serving = True
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._serving = False
+
+    def stop(self) -> None:
+        """停止服务并释放端口。"""
+        if self._serving:
+            # shutdown() 会等待服务循环退出，服务未运行时调用会一直阻塞
+            self._httpd.shutdown()
+            self._serving = False
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,243 @@
+# telemetry.py
+"""
+流水线各阶段的耗时统计（span）和日志配置。
+
+用法：
+    with span("mine", days=30) as s:
+        clusters = generate_behavior_clusters(activities, top_n=5)
+        s.count("items", len(activities))
+        s.count("clusters", len(clusters))
+
+每个 span 记录名称、开始时间、耗时、计数（items / pages / bytes 等，汇总时累加）
+和描述性属性；嵌套的 span 通过 parent_id 关联（基于 contextvars，
+asyncio.to_thread 和协程中同样有效）。
+
+入口程序可以用 dump_spans(path) 把收集到的 span 和按名称的汇总写成 JSON；
+设置环境变量 MCAGENT_SPANS_FILE 时，dump_spans() 不传路径也会写入该文件。
+"""
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from .file_lock import atomic_write_bytes
+except ImportError:
+    from file_lock import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+# 最多保留的 span 条数（MCP server 是长驻进程，超出后丢弃最早的）
+MAX_SPANS = 10000
+# 未指定路径时 dump_spans 写入的文件
+SPANS_FILE_ENV = "MCAGENT_SPANS_FILE"
+# 日志格式：设为 json 时每行输出一个 JSON 对象
+LOG_FORMAT_ENV = "MCAGENT_LOG_FORMAT"
+LOG_FORMAT = "[%(levelname)s] %(message)s"
+
+_SPANS: deque = deque(maxlen=MAX_SPANS)
+_SPANS_LOCK = threading.Lock()
+_SPAN_IDS = itertools.count(1)
+_CURRENT_SPAN: contextvars.ContextVar = contextvars.ContextVar("mcagent_span", default=None)
+
+
+class Span:
+    """一个阶段的一次执行。"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "duration", "counts", "attrs", "status")
+
+    def __init__(self, name: str, parent_id: Optional[int] = None, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = next(_SPAN_IDS)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = 0.0
+        self.counts: Dict[str, int] = {}
+        self.attrs: Dict[str, Any] = dict(attrs or {})
+        self.status = "ok"
+
+    def count(self, key: str, n: int = 1) -> None:
+        """累加一个计数（如处理的条数）。"""
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def set(self, **attrs: Any) -> None:
+        """设置描述性属性（如数据来源、是否命中缓存）。"""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": datetime.fromtimestamp(self.start).isoformat(),
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "counts": dict(self.counts),
+            "attrs": dict(self.attrs),
+        }
+
+
+def _record(s: Span) -> None:
+    with _SPANS_LOCK:
+        _SPANS.append(s)
+    logger.debug(f"span {s.name}: {s.duration * 1000:.1f}ms {s.counts} {s.attrs}")
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    记录一个阶段的耗时。
+
+    块内抛出异常时 span 的 status 为 "error"，异常照常向外抛出。
+
+    Args:
+        name: 阶段名称（如 "fetch.activities"、"cluster"）
+        **attrs: 描述性属性
+    """
+    parent = _CURRENT_SPAN.get()
+    s = Span(name, parent.span_id if parent is not None else None, attrs)
+    token = _CURRENT_SPAN.set(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        s.duration = time.perf_counter() - started
+        _CURRENT_SPAN.reset(token)
+        _record(s)
+
+
+def record_span(name: str, duration: float, **counts: int) -> Span:
+    """
+    直接记录一个已经计好时的 span。
+
+    用于和其他工作交织在一起、只能分段累计耗时的阶段（如边下载边解析）。
+    """
+    parent = _CURRENT_SPAN.get()
+    s = Span(name, parent.span_id if parent is not None else None)
+    s.start -= duration
+    s.duration = duration
+    for key, n in counts.items():
+        s.count(key, n)
+    _record(s)
+    return s
+
+
+def current_span() -> Optional[Span]:
+    """当前上下文中正在进行的 span。"""
+    return _CURRENT_SPAN.get()
+
+
+def get_spans() -> List[Dict[str, Any]]:
+    """返回已经结束的 span（按结束顺序）。"""
+    with _SPANS_LOCK:
+        return [s.to_dict() for s in _SPANS]
+
+
+def clear_spans() -> None:
+    """清空已收集的 span。"""
+    with _SPANS_LOCK:
+        _SPANS.clear()
+
+
+def summarize_spans(spans: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    按名称汇总 span：调用次数、总耗时、最长耗时、出错次数和累加的计数。
+
+    Args:
+        spans: get_spans() 的结果，默认使用当前收集的 span
+
+    Returns:
+        {name: {"calls", "errors", "total_seconds", "max_seconds", "counts"}}，按总耗时降序
+    """
+    if spans is None:
+        spans = get_spans()
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        entry = summary.setdefault(
+            s["name"],
+            {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "counts": {}},
+        )
+        entry["calls"] += 1
+        if s["status"] != "ok":
+            entry["errors"] += 1
+        entry["total_seconds"] += s["duration"]
+        entry["max_seconds"] = max(entry["max_seconds"], s["duration"])
+        for key, n in s["counts"].items():
+            entry["counts"][key] = entry["counts"].get(key, 0) + n
+
+    for entry in summary.values():
+        entry["total_seconds"] = round(entry["total_seconds"], 6)
+    return dict(sorted(summary.items(), key=lambda item: item[1]["total_seconds"], reverse=True))
+
+
+def dump_spans(path: Optional[str] = None) -> Optional[str]:
+    """
+    把收集到的 span 和汇总写成 JSON 文件。
+
+    Args:
+        path: 输出路径，默认读取环境变量 MCAGENT_SPANS_FILE
+
+    Returns:
+        写入的路径；没有指定路径时返回 None
+    """
+    path = path or os.environ.get(SPANS_FILE_ENV)
+    if not path:
+        return None
+
+    spans = get_spans()
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "pid": os.getpid(),
+        "summary": summarize_spans(spans),
+        "spans": spans,
+    }
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    atomic_write_bytes(path, data.encode("utf-8"))
+    logger.info(f"span 统计已保存到: {path}（{len(spans)} 条）")
+    return path
+
+
+class JSONLogFormatter(logging.Formatter):
+    """每条日志输出一行 JSON：时间、级别、logger、消息，以及当前 span 名称。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        current = _CURRENT_SPAN.get()
+        if current is not None:
+            entry["span"] = current.name
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level: int = logging.INFO, json_lines: Optional[bool] = None) -> None:
+    """
+    给入口程序配置日志（输出到 stderr）。
+
+    Args:
+        level: 日志级别
+        json_lines: 是否输出 JSON 行，默认由环境变量 MCAGENT_LOG_FORMAT=json 决定
+    """
+    if json_lines is None:
+        json_lines = os.environ.get(LOG_FORMAT_ENV, "").lower() == "json"
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONLogFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
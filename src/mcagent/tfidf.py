@@ -0,0 +1,130 @@
+# tfidf.py
+"""
+稀疏 TF-IDF 矩阵和分块的余弦相似度近邻。
+
+逐对计算相似度是纯 Python 的标量代码。这里一次性把所有记录的词项
+（标题词、标题字符 n-gram、关键词）构建成 CSR 稀疏矩阵，每行按 TF-IDF
+加权并做 L2 归一化，余弦相似度就是行向量的内积。按 chunk_size 行分块计算
+block @ matrix.T，只保留上三角中达到阈值的元素，每行最多保留相似度最高的
+max_neighbors 个近邻，内存和候选对数随块大小和近邻数而不是记录数的平方增长。
+
+依赖 numpy 和 scipy（可选依赖，未安装时调用会抛出 ImportError）。
+"""
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # 可选依赖
+    np = None
+    sparse = None
+
+
+class TfidfParams(NamedTuple):
+    """
+    TF-IDF 近邻参数（不可变，可以作为缓存 key）
+
+    Attributes:
+        min_cosine: 余弦相似度达到这个值的记录对才成为近邻，越低召回越高、候选对越多
+        ngram_size: 标题字符 n-gram 的长度
+        chunk_size: 每块计算的行数，越大越快、占用内存越多
+        max_neighbors: 每行最多保留的近邻数（None 表示不限制），越多召回越高、候选对越多
+    """
+
+    min_cosine: float = 0.1
+    ngram_size: int = 3
+    chunk_size: int = 512
+    max_neighbors: Optional[int] = 32
+
+
+def require_sparse() -> None:
+    """numpy / scipy 未安装时抛出 ImportError。"""
+    if np is None or sparse is None:
+        raise ImportError("TF-IDF 相似度需要 numpy 和 scipy：pip install numpy scipy")
+
+
+def build_tfidf_matrix(documents: Sequence[Iterable[str]]) -> "sparse.csr_matrix":
+    """
+    把每条记录的词项构建成 L2 归一化的 TF-IDF 稀疏矩阵。
+
+    tf 使用 1 + log(次数)，idf 使用平滑的 log((1 + n) / (1 + df)) + 1。
+    没有词项的记录对应全零行，与任何记录的余弦相似度都是 0。
+
+    Args:
+        documents: 每条记录的词项（可重复）
+
+    Returns:
+        形状为 (记录数, 词项数) 的 csr_matrix
+    """
+    require_sparse()
+
+    vocabulary: Dict[str, int] = {}
+    indptr: List[int] = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for terms in documents:
+        row: Dict[int, int] = {}
+        for term in terms:
+            column = vocabulary.setdefault(term, len(vocabulary))
+            row[column] = row.get(column, 0) + 1
+        indices.extend(row)
+        counts.extend(row.values())
+        indptr.append(len(indices))
+
+    n_rows = len(indptr) - 1
+    indices_array = np.asarray(indices, dtype=np.int64)
+    indptr_array = np.asarray(indptr, dtype=np.int64)
+
+    document_frequency = np.bincount(indices_array, minlength=len(vocabulary))
+    idf = np.log((1.0 + n_rows) / (1.0 + document_frequency)) + 1.0
+    data = (1.0 + np.log(np.asarray(counts, dtype=np.float64))) * idf[indices_array]
+
+    row_ids = np.repeat(np.arange(n_rows), np.diff(indptr_array))
+    norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n_rows))
+    if data.size:
+        data /= norms[row_ids]
+
+    return sparse.csr_matrix((data, indices_array, indptr_array), shape=(n_rows, len(vocabulary)))
+
+
+def cosine_neighbor_pairs(
+    matrix: "sparse.csr_matrix",
+    min_cosine: float,
+    chunk_size: int = 512,
+    max_neighbors: Optional[int] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    分块计算余弦相似度，生成达到阈值的记录对 (j, i)，j < i。
+
+    第 k 块只和它之后的行相乘（block @ matrix[start:].T），每对只计算一次。
+
+    Args:
+        matrix: build_tfidf_matrix 返回的 L2 归一化矩阵
+        min_cosine: 余弦相似度阈值
+        chunk_size: 每块的行数
+        max_neighbors: 每行只保留相似度最高的前几个（排在它之后的）近邻，None 表示全部保留
+    """
+    require_sparse()
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size 必须是正整数: {chunk_size}")
+
+    # 浮点误差会让完全相同的向量内积略小于 1
+    threshold = min_cosine - 1e-9
+    n_rows = matrix.shape[0]
+    for start in range(0, n_rows, chunk_size):
+        end = min(start + chunk_size, n_rows)
+        block = (matrix[start:end] @ matrix[start:].T).tocoo()
+        mask = (block.data >= threshold) & (block.col > block.row)
+        rows, columns, scores = block.row[mask], block.col[mask], block.data[mask]
+
+        if max_neighbors is not None and rows.size:
+            # 每行按相似度从高到低排序，只保留前 max_neighbors 个：
+            # 余弦相似度在 [0, 1] 内，row - score / 2 先按行、行内按相似度降序排列
+            order = np.argsort(rows - scores * 0.5, kind="stable")
+            rows, columns = rows[order], columns[order]
+            rank = np.arange(rows.size) - np.searchsorted(rows, rows, side="left")
+            keep = rank < max_neighbors
+            rows, columns = rows[keep], columns[keep]
+
+        yield from zip((rows + start).tolist(), (columns + start).tolist())
+
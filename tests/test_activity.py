@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试 activity.py
+
+验证：
+1. 入库时解析时间和小写标题
+2. to_dict() 能还原原始 dict（包括值为 None 或空字符串的字段）
+3. 使用 __slots__，不能随意添加属性
+4. metadata 延迟解析且只解析一次
+"""
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import Activity, activities_to_dicts, parse_epoch, to_activities
+
+
+def load_sample_data():
+    """加载示例数据"""
+    sample_file = Path("samples/sample_activities.json")
+    with open(sample_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["activities"]
+
+
+def test_parse_once_at_ingestion():
+    """测试时间和标题的预处理"""
+    activity = Activity.from_dict({
+        "id": "act_x",
+        "title": "开发 MineContext 集成",
+        "start_time": "2025-12-25T09:00:00",
+        "end_time": "2025-12-25T12:00:00Z",
+    })
+
+    assert activity.title_lower == "开发 minecontext 集成"
+    assert activity.start_ts == int(datetime(2025, 12, 25, 9).timestamp())
+    assert activity.end_ts == parse_epoch("2025-12-25T12:00:00+00:00")
+    assert activity.sort_ts == activity.end_ts
+    assert activity.content == ""
+
+
+def test_round_trip_to_dict():
+    """测试转换回 dict"""
+    activities = load_sample_data()
+    extra = dict(activities[0], resources=[{"type": "image", "path": "/tmp/a.png"}])
+
+    converted = to_activities(activities + [extra, "not a dict"])
+    assert len(converted) == len(activities) + 1
+    assert activities_to_dicts(converted) == activities + [extra]
+    assert converted[-1].get("resources") == extra["resources"]
+
+    # 已经是 Activity 的元素直接复用
+    assert to_activities(converted)[0] is converted[0]
+
+
+def test_to_dict_keeps_present_fields():
+    """测试输入中出现过的字段原样输出，没有出现的字段不输出"""
+    records = [
+        {"id": "a", "title": None, "content": "", "end_time": None, "count": 1},
+        {"id": "b", "content": None, "metadata": "{}"},
+        {"id": "c", "count": "3", "start_time": "2025-12-25T09:00:00"},
+    ]
+    for record in records:
+        activity = Activity.from_dict(record)
+        assert activity.to_dict() == record
+        assert activity.content == ""
+
+    assert Activity.from_dict(records[2]).count == 1
+
+    # 直接构造的记录省略值为 None 的字段和空 content
+    assert Activity(id="d", content="").to_dict() == {"id": "d"}
+    assert Activity(id="e", count=2).to_dict() == {"id": "e", "count": 2}
+
+
+def test_slots():
+    """测试 __slots__"""
+    activity = Activity(id="a", title="t")
+    with pytest.raises(AttributeError):
+        activity.unknown_field = 1
+    assert parse_epoch("not a time") is None
+    assert Activity(end_time="bad").sort_ts is None
+
+
+def test_metadata_parsed_lazily_once(monkeypatch):
+    """测试 metadata 延迟解析"""
+    import mcagent.activity as activity_module
+
+    samples = load_sample_data()
+    calls = []
+    real_loads = json.loads
+
+    def counting_loads(text, *args, **kwargs):
+        calls.append(text)
+        return real_loads(text, *args, **kwargs)
+
+    monkeypatch.setattr(activity_module.json, "loads", counting_loads)
+
+    activities = to_activities(samples)
+    assert calls == []
+
+    first = activities[0]
+    assert first.focus_areas == ["Python", "API Integration"]
+    assert first.key_entities == ["MineContext", "Wrapper"]
+    assert first.metadata["focus_areas"] == ["Python", "API Integration"]
+    assert len(calls) == 1
+
+    # 批量预解析
+    to_activities(samples, parse_metadata=True)
+    assert len(calls) == 1 + len(activities)
+
+    nested = Activity(metadata=json.dumps({"extracted_insights": {"focus_areas": ["A"]}, "focus_areas": ["B"]}))
+    assert nested.focus_areas == ["A"]
+    assert Activity(metadata="{broken").metadata == {}
+    assert Activity(metadata={"key_entities": ["X"]}).key_entities == ["X"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
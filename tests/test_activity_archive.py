@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+测试 activity_archive.py
+
+验证：
+1. activities 按日期写入各自的分段，按时间窗口查询只打开窗口内的分段，且最新的在前
+2. 写入只重写涉及到的分段，相同 id 以新版本为准，内容未变化时不重写
+3. 压缩把旧的按天分段合并成按月分段，过期删除旧分段并前移已覆盖的窗口起点
+4. CACHE_BACKEND = "archive" 时 get_activities 使用归档缓存和增量同步
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import activity_archive, context_wrapper
+from mcagent.activity_archive import ActivityArchive, RetentionPolicy
+from mcagent.circuit_breaker import CircuitBreaker
+from mcagent.standin_server import StandinServer
+
+NOW = datetime(2025, 6, 20, 12, 0, 0)
+
+
+def _make_activities(now: datetime, days: int, per_day: int = 4):
+    """生成最近 days 天、每天 per_day 条的 activities，act_0 最新"""
+    activities = []
+    for i in range(days * per_day):
+        end = now - timedelta(hours=i * 24 / per_day)
+        activities.append({
+            "id": f"act_{i}",
+            "title": f"活动 {i}",
+            "start_time": (end - timedelta(minutes=30)).isoformat(),
+            "end_time": end.isoformat(),
+        })
+    return activities
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """记录查询时打开的分段文件"""
+    paths = []
+    original = activity_archive.BinaryActivityCache
+
+    def tracking(path):
+        paths.append(Path(path).name)
+        return original(path)
+
+    monkeypatch.setattr(activity_archive, "BinaryActivityCache", tracking)
+    return paths
+
+
+def test_query_opens_only_window_segments(tmp_path, opened):
+    """测试查询最近 N 天只打开 N 个分段"""
+    archive = ActivityArchive(str(tmp_path / "archive"))
+    archive.upsert_activities(_make_activities(NOW, 60))
+
+    assert len(archive.segments()) == 61
+    assert archive.count_activities() == 240
+
+    opened.clear()
+    window_start = NOW.replace(hour=0) - timedelta(days=2)
+    recent = archive.query_activities(window_start)
+    assert len(opened) == 3
+    assert [a["id"] for a in recent] == [f"act_{i}" for i in range(11)]
+
+    older = archive.query_activities(NOW - timedelta(days=10), NOW - timedelta(days=9, hours=1))
+    assert [a["id"] for a in older] == ["act_37", "act_38", "act_39", "act_40"]
+
+
+def test_upsert_rewrites_only_touched_days(tmp_path):
+    """测试写入只替换涉及到的分段，相同 id 覆盖，未变化时不重写"""
+    archive = ActivityArchive(str(tmp_path / "archive"))
+    activities = _make_activities(NOW, 5)
+    archive.upsert_activities(activities)
+    before = {entry["first_day"]: entry["file"] for entry in archive.segments()}
+    revision = archive.revision()
+
+    archive.upsert_activities([activities[0]])
+    assert archive.revision() == revision
+
+    archive.upsert_activities([dict(activities[0], title="更新后的标题")])
+    after = {entry["first_day"]: entry["file"] for entry in archive.segments()}
+    changed = [day for day in before if before[day] != after[day]]
+    assert changed == [NOW.strftime("%Y%m%d")]
+    assert archive.revision() == revision + 1
+    assert archive.count_activities() == 20
+
+    latest = archive.query_activities(NOW - timedelta(minutes=1))
+    assert latest[0]["title"] == "更新后的标题"
+    assert archive.watermark() == {"end_time": NOW.isoformat(), "id": "act_0"}
+    # 被替换的旧分段文件已删除
+    assert sorted(p.name for p in (tmp_path / "archive").glob("*.mcb")) == sorted(after.values())
+
+
+def test_compact_and_expire(tmp_path, opened):
+    """测试保留策略：旧的按天分段合并成按月分段，超过保留天数的分段删除"""
+    archive = ActivityArchive(str(tmp_path / "archive"))
+    archive.set_state(window_start=(NOW - timedelta(days=90)).isoformat())
+    archive.upsert_activities(_make_activities(NOW, 90))
+    archive.retention = RetentionPolicy(max_days=60, compact_after_days=10)
+    result = archive.apply_retention(now=NOW)
+
+    cutoff = NOW.replace(hour=0) - timedelta(days=60)
+    assert result["expired"] > 0
+    assert result["compacted"] > 0
+    assert archive.get_state("window_start") == cutoff.isoformat()
+    remaining = archive.query_activities(cutoff)
+    assert archive.count_activities() == len(remaining) == 360 - result["expired"]
+
+    spans = [(entry["first_day"], entry["last_day"]) for entry in archive.segments()]
+    assert ("20250501", "20250531") in spans
+    assert ("20250610", "20250610") in spans
+    assert all(first[:6] == last[:6] for first, last in spans)
+
+    # 压缩后的分段仍然可以写入和查询
+    archive.retention = None
+    old = next(dict(a, title="补录") for a in remaining if a["end_time"].startswith("2025-05-15"))
+    archive.upsert_activities([old])
+    opened.clear()
+    may = archive.query_activities(datetime(2025, 5, 1), datetime(2025, 5, 31, 23, 59))
+    assert len(opened) == 1
+    assert "补录" in [a["title"] for a in may]
+
+
+def test_get_activities_with_archive_backend(tmp_path, monkeypatch):
+    """测试归档后端：首次全量拉取，之后同一天命中缓存，清理后重新拉取"""
+    monkeypatch.setattr(context_wrapper, "CACHE_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(context_wrapper, "CACHE_BACKEND", "archive")
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=80, days=7, seed=9) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        first = context_wrapper.get_activities(days=7)
+        requests_after_first = server.stats["requests"]
+        revision = context_wrapper.get_cache_revision()
+
+        second = context_wrapper.get_activities(days=3)
+        assert server.stats["requests"] == requests_after_first
+
+        context_wrapper.clear_cache()
+        third = context_wrapper.get_activities(days=7)
+        assert server.stats["requests"] > requests_after_first
+
+    assert len(first) == 80
+    assert revision.startswith("archive:")
+    assert second and all(a in first for a in second)
+    assert [a["id"] for a in third] == [a["id"] for a in first]
+    assert (tmp_path / "data" / "archive" / "manifest.json").exists()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
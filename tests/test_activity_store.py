@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+测试 activity_store.py
+
+验证：
+1. 按时间窗口查询只返回窗口内的 activities，且最新的在前
+2. 相同 id 重复写入会覆盖而不是重复
+3. watermark 返回最新一条记录
+4. todos / tips 的读写
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity_store import ActivityStore
+
+
+def _make_activities(now: datetime, count: int):
+    """生成每小时一条的 activities，act_0 最新"""
+    return [
+        {
+            "id": f"act_{i}",
+            "title": f"活动 {i}",
+            "start_time": (now - timedelta(hours=i, minutes=30)).isoformat(),
+            "end_time": (now - timedelta(hours=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def test_query_activities_by_window(tmp_path):
+    """测试按时间窗口查询"""
+    store = ActivityStore(str(tmp_path / "store.db"))
+    now = datetime.now()
+    store.upsert_activities(_make_activities(now, 48))
+
+    recent = store.query_activities(now - timedelta(hours=10, minutes=1))
+    assert [a["id"] for a in recent] == [f"act_{i}" for i in range(11)]
+
+    older = store.query_activities(now - timedelta(hours=30), now - timedelta(hours=20, minutes=1))
+    assert [a["id"] for a in older] == [f"act_{i}" for i in range(21, 31)]
+
+
+def test_upsert_deduplicates_by_id(tmp_path):
+    """测试相同 id 的记录被覆盖"""
+    store = ActivityStore(str(tmp_path / "store.db"))
+    now = datetime.now()
+    activities = _make_activities(now, 5)
+    store.upsert_activities(activities)
+
+    updated = dict(activities[0], title="更新后的标题")
+    store.upsert_activities([updated])
+
+    assert store.count_activities() == 5
+    latest = store.query_activities(now - timedelta(minutes=1))
+    assert latest[0]["title"] == "更新后的标题"
+
+
+def test_watermark_and_prune(tmp_path):
+    """测试水位和过期数据清理"""
+    store = ActivityStore(str(tmp_path / "store.db"))
+    assert store.watermark() is None
+
+    now = datetime.now()
+    activities = _make_activities(now, 10)
+    store.upsert_activities(activities)
+
+    watermark = store.watermark()
+    assert watermark == {"end_time": activities[0]["end_time"], "id": "act_0"}
+
+    removed = store.prune_activities(now - timedelta(hours=4, minutes=30))
+    assert removed == 5
+    assert store.count_activities() == 5
+
+
+def test_records_and_state(tmp_path):
+    """测试 todos / tips 和同步状态"""
+    store = ActivityStore(str(tmp_path / "store.db"))
+    store.upsert_records("todos", [
+        {"id": 1, "content": "A", "end_time": "2025-12-25 18:00:00"},
+        {"id": 2, "content": "B", "end_time": "2025-12-26 18:00:00"},
+    ])
+    store.upsert_records("tips", [{"id": 7, "content": "tip", "created_at": "2025-12-25T10:00:00"}])
+
+    assert [t["id"] for t in store.query_records("todos")] == [2, 1]
+    assert store.query_records("tips", limit=1)[0]["content"] == "tip"
+
+    store.set_state(fetch_time="2025-12-25T10:00:00", source="minecontext")
+    assert store.get_state("source") == "minecontext"
+    store.set_state(source=None)
+    assert store.get_state("source") is None
+
+    store.clear()
+    assert store.query_records("todos") == []
+    assert store.get_state("fetch_time") is None
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+测试 cache_codec.py
+
+验证：
+1. 编码后再读取，元信息和 activities 保持一致
+2. 按时间窗口读取只返回窗口内的记录
+3. 二进制格式比 indent=2 的 JSON 更小
+4. 非 .mcb 文件会被拒绝
+"""
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.cache_codec import BinaryActivityCache, encode_binary_cache, read_binary_cache
+
+
+def _make_activities(now: datetime, count: int):
+    """生成每小时一条的 activities，包含中文内容和缺失时间的记录"""
+    activities = [
+        {
+            "id": f"act_{i}",
+            "title": f"开发 MineContext 集成 {i}",
+            "content": "完成了 MineContext 包装器的开发，包括数据获取和处理功能。" * 3,
+            "start_time": (now - timedelta(hours=i, minutes=30)).isoformat(),
+            "end_time": (now - timedelta(hours=i)).isoformat(),
+            "metadata": json.dumps({"focus_areas": ["Python"]}),
+        }
+        for i in range(count)
+    ]
+    activities.append({"id": "no_time", "title": "没有时间的记录"})
+    return activities
+
+
+def test_round_trip(tmp_path):
+    """测试编码/解码往返"""
+    now = datetime.now()
+    activities = _make_activities(now, 20)
+    meta = {"fetch_time": now.isoformat(), "days": 7, "source": "minecontext"}
+
+    path = tmp_path / "cache.mcb"
+    path.write_bytes(encode_binary_cache(meta, activities))
+
+    data = read_binary_cache(str(path))
+    assert data["activities"] == activities
+    assert data["days"] == 7 and data["source"] == "minecontext"
+
+    with BinaryActivityCache(str(path)) as cache:
+        assert len(cache) == 21
+        assert cache[-1]["id"] == "no_time"
+        assert cache.end_ts(20) is None
+
+
+def test_window_only_decodes_matching_records(tmp_path):
+    """测试时间窗口过滤"""
+    now = datetime.now()
+    activities = _make_activities(now, 48)
+    path = tmp_path / "cache.mcb"
+    path.write_bytes(encode_binary_cache({}, activities))
+
+    data = read_binary_cache(str(path), start=now - timedelta(hours=5, minutes=1))
+    assert [a["id"] for a in data["activities"]] == [f"act_{i}" for i in range(6)]
+
+
+def test_smaller_than_pretty_json():
+    """测试二进制格式的体积"""
+    activities = _make_activities(datetime.now(), 200)
+    pretty = json.dumps({"activities": activities}, ensure_ascii=False, indent=2).encode("utf-8")
+    assert len(encode_binary_cache({}, activities)) < len(pretty)
+
+
+def test_rejects_invalid_file(tmp_path):
+    """测试无效文件"""
+    path = tmp_path / "cache.mcb"
+    path.write_bytes(b'{"activities": []}')
+    with pytest.raises(ValueError):
+        BinaryActivityCache(str(path))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试 circuit_breaker.py
+
+验证：
+1. 连续失败达到阈值后打开，打开后直接抛 CircuitOpenError
+2. 冷却结束后只放行一个半开探测
+3. 探测成功恢复 closed，探测失败重新打开
+4. 熔断时 get_minecontext_summary 立即返回结构化错误
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_threshold():
+    """测试连续失败达到阈值后打开"""
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10, clock=FakeClock())
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after == 10
+    # 继承 ConnectionError，原有的连接失败处理可以直接捕获
+    assert isinstance(exc_info.value, requests.exceptions.ConnectionError)
+
+
+def test_success_resets_failure_count():
+    """测试成功后重新计数"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe():
+    """测试冷却结束后的半开探测"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    # 探测进行中，其他请求继续被拒绝
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # 探测失败：重新打开并重新计时
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now = 15
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # 下一次探测成功：恢复
+    clock.now = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_summary_returns_error_while_open(monkeypatch):
+    """测试熔断时摘要立即返回错误，不发出请求"""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(context_wrapper, "_BREAKER", breaker)
+
+    def fail_fetch(*args, **kwargs):
+        raise AssertionError("熔断时不应该发出请求")
+
+    monkeypatch.setattr(context_wrapper, "_fetch_section", fail_fetch)
+
+    summary = context_wrapper.get_minecontext_summary(task_type="debug_error")
+
+    assert summary["status"] == "error"
+    assert summary["error"]["type"] == "MineContextUnavailable"
+
+
+def test_unreachable_endpoints_trip_breaker(monkeypatch):
+    """测试所有端点都不可达时记一次失败，HTTP 错误不算"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    monkeypatch.setattr(context_wrapper, "_BREAKER", breaker)
+
+    def refuse(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(context_wrapper, "_fetch_section", refuse)
+    context_wrapper.fetch_latest_context(concurrent=False)
+    assert breaker.state == "closed"
+    context_wrapper.fetch_latest_context(concurrent=False)
+    assert breaker.state == "open"
+
+    breaker.reset()
+
+    def server_error(*args, **kwargs):
+        raise requests.exceptions.HTTPError("500")
+
+    monkeypatch.setattr(context_wrapper, "_fetch_section", server_error)
+    for _ in range(3):
+        context_wrapper.fetch_latest_context(concurrent=False)
+    assert breaker.state == "closed"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+测试 behavior_miner 的聚类引擎
+
+验证：
+1. 并查集引擎和原始凝聚聚类的结果完全一致（cluster id、成员及其顺序）
+2. 阈值 <= 0 时所有 activity 在同一个 cluster
+3. generate_behavior_clusters 按 engine 选择引擎，未知引擎抛出 ValueError
+4. 每条 activity 的特征（关键词等）只提取一次
+5. 倒排索引生成的候选对覆盖所有相似度大于 0 的 activity 对
+"""
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import Activity, to_activities
+from mcagent import behavior_miner
+from mcagent.behavior_miner import (
+    _candidate_pairs,
+    _cluster_activities,
+    _extract_features,
+    _feature_similarity,
+    generate_behavior_clusters,
+)
+from mcagent.standin_server import generate_activities
+
+NOW = datetime(2025, 12, 25, 18, 0, 0)
+
+
+def load_sample_data():
+    """加载示例数据"""
+    with open(Path("samples/sample_activities.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["activities"]
+
+
+def _member_ids(clusters):
+    return {cluster_id: [act.id for act in members] for cluster_id, members in clusters.items()}
+
+
+def _assert_same_clusters(activities, threshold):
+    expected = _cluster_activities(activities, threshold, engine="agglomerative")
+    actual = _cluster_activities(activities, threshold, engine="union_find")
+    assert list(actual) == list(expected)
+    assert _member_ids(actual) == _member_ids(expected)
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.6, 0.8, 1.0])
+def test_union_find_matches_agglomerative(threshold):
+    """测试并查集引擎和原始实现的输出完全一致"""
+    _assert_same_clusters(to_activities(load_sample_data()), threshold)
+    synthetic = to_activities(generate_activities(60, days=7, seed=11, now=NOW))
+    _assert_same_clusters(synthetic, threshold)
+
+
+def test_member_order_follows_merge_order():
+    """测试成员顺序和原始实现的合并顺序一致（不是简单的下标顺序）"""
+    activities = [
+        Activity(id="a", title="alpha"),
+        Activity(id="b", title="beta"),
+        Activity(id="c", title="alpha beta"),
+        Activity(id="d", title="delta"),
+        Activity(id="e", title="delta beta"),
+    ]
+    expected = _cluster_activities(activities, 0.4, engine="agglomerative")
+    assert _member_ids(expected) == {0: ["a", "c", "b", "e", "d"]}
+    assert _member_ids(_cluster_activities(activities, 0.4)) == _member_ids(expected)
+
+
+def test_threshold_zero_and_empty():
+    """测试阈值为 0 和空输入"""
+    activities = to_activities(load_sample_data())
+    _assert_same_clusters(activities, 0.0)
+    assert len(_cluster_activities(activities, 0.0)) == 1
+    assert _cluster_activities([], 0.6) == {}
+
+
+def test_generate_behavior_clusters_engine():
+    """测试 generate_behavior_clusters 的 engine 参数"""
+    activities = generate_activities(40, days=3, seed=2, now=NOW)
+    default = generate_behavior_clusters(activities, top_n=10)
+    legacy = generate_behavior_clusters(activities, top_n=10, engine="agglomerative")
+    assert default == legacy
+
+    with pytest.raises(ValueError):
+        generate_behavior_clusters(activities, engine="unknown")
+
+
+@pytest.mark.parametrize("engine", ["union_find", "agglomerative"])
+def test_features_extracted_once(monkeypatch, engine):
+    """测试聚类和生成标题时每条 activity 只提取一次关键词"""
+    activities = to_activities(generate_activities(30, days=3, seed=5, now=NOW))
+    calls = []
+    original = behavior_miner._extract_keywords
+
+    def counting(text, top_k=3):
+        calls.append(text)
+        return original(text, top_k)
+
+    monkeypatch.setattr(behavior_miner, "_extract_keywords", counting)
+    generate_behavior_clusters(activities, top_n=10, similarity_threshold=0.55, dedupe=False, engine=engine)
+    assert len(calls) == len(activities)
+
+
+def _random_activities(seed):
+    """随机生成标题有重复、子串和共同词的 activities（部分没有标题或关键词）"""
+    rnd = random.Random(seed)
+    words = ["git", "github", "push", "Docker build", "notes", "Slack chat", "review code", "x"]
+    contents = ["", "Using Docker and Git", "https://github.com/x Chrome", "Notion Figma", "Slack Terminal"]
+    titles = [None, ""] + [" ".join(rnd.sample(words, rnd.randint(1, 2))) for _ in range(4)]
+    return [
+        Activity(id=f"act_{k}", title=rnd.choice(titles), content=rnd.choice(contents))
+        for k in range(rnd.randint(1, 25))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_candidate_pairs_cover_similar_pairs(seed):
+    """测试候选对覆盖所有相似度大于 0 的对，且每对只生成一次"""
+    features = _extract_features(_random_activities(seed))
+    pairs = list(_candidate_pairs(features))
+    assert len(pairs) == len(set(pairs))
+    assert all(j < i for j, i in pairs)
+
+    candidates = set(pairs)
+    for i in range(len(features)):
+        for j in range(i):
+            if _feature_similarity(features[j], features[i]) > 0:
+                assert (j, i) in candidates
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_blocked_union_find_matches_agglomerative(seed):
+    """测试分组 + 候选对的并查集引擎在各种阈值下与原始实现一致"""
+    activities = _random_activities(seed)
+    for threshold in (0.2, 0.5, 0.6, 0.7, 1.0):
+        _assert_same_clusters(activities, threshold)
+
+
+def test_substring_titles_without_shared_tokens():
+    """测试只满足子串规则（没有共同的词）的标题也会被比较"""
+    activities = [Activity(id="a", title="github"), Activity(id="b", title="notes"), Activity(id="c", title="git")]
+    assert list(_candidate_pairs(_extract_features(activities))) == [(0, 2)]
+    assert _member_ids(_cluster_activities(activities, 0.4)) == {0: ["a", "c"], 1: ["b"]}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
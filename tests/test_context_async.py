@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试 context_wrapper 的异步 API
+
+验证：
+1. 未安装 httpx 时异步 API 退化为调用同步版本
+2. 抓取异常统一映射成 status=error 的结构
+3. fetch_latest_context_async 在连接失败时返回空 section，而不是抛异常
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+
+
+def test_async_falls_back_to_sync_without_httpx(monkeypatch):
+    """测试未安装 httpx 时调用同步版本"""
+    calls = []
+
+    def fake_get_activities(days, use_cache, sync):
+        calls.append((days, use_cache, sync))
+        return [{"id": "act_0"}]
+
+    monkeypatch.setattr(context_wrapper, "httpx", None)
+    monkeypatch.setattr(context_wrapper, "get_activities", fake_get_activities)
+
+    result = asyncio.run(context_wrapper.get_activities_async(days=3, use_cache=False))
+
+    assert result == [{"id": "act_0"}]
+    assert calls == [(3, False, True)]
+
+
+def test_fetch_error_summary_mapping():
+    """测试异常到错误类型的映射"""
+    cases = [
+        (requests.exceptions.ConnectionError("refused"), "MineContextUnavailable"),
+        (requests.exceptions.Timeout("slow"), "Timeout"),
+        (requests.exceptions.HTTPError("500"), "HttpError"),
+        (ValueError("bad json"), "InvalidJSON"),
+    ]
+    for error, expected_type in cases:
+        summary = context_wrapper._fetch_error_summary(error)
+        assert summary["status"] == "error"
+        assert summary["error"]["type"] == expected_type
+
+
+def test_fetch_latest_context_async_unreachable(monkeypatch):
+    """测试服务不可达时各 section 为空"""
+    if context_wrapper.httpx is None:
+        pytest.skip("httpx 未安装")
+    monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", "http://127.0.0.1:1")
+
+    async def run():
+        try:
+            return await context_wrapper.fetch_latest_context_async(timeout=2.0)
+        finally:
+            await context_wrapper.aclose_async_client()
+            context_wrapper.reset_breaker()
+
+    raw = asyncio.run(run())
+
+    assert set(raw["data"]) == set(context_wrapper.API_ENDPOINTS)
+    assert all(section == {"records": []} for section in raw["data"].values())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试按 task_type / detail_level 的抓取计划
+
+验证：
+1. 摘要从不请求 reports；debug_error 只请求 activities + todos；low 只请求 todos
+2. fetch_latest_context 只请求指定的 section
+3. meta.sections 记录本次抓取的 section
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def requested(monkeypatch):
+    """记录实际请求的端点"""
+    calls = []
+
+    def fake_fetch(data_type, limit, timeout):
+        calls.append(data_type)
+        return {"records": [{"id": 1, "content": data_type, "end_time": "2025-12-25T12:00:00"}]}
+
+    monkeypatch.setattr(context_wrapper, "_fetch_section", fake_fetch)
+    monkeypatch.setattr(context_wrapper, "_persist_context_records", lambda raw: None)
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    return calls
+
+
+def test_get_fetch_plan():
+    """测试抓取计划"""
+    assert context_wrapper.get_fetch_plan("debug_error", "medium") == ("todos", "activities")
+    assert context_wrapper.get_fetch_plan("debug_error", "low") == ("todos",)
+    assert context_wrapper.get_fetch_plan(None, "high") == ("todos", "activities", "tips")
+    assert context_wrapper.get_fetch_plan("something_new", "medium") == context_wrapper.SUMMARY_SECTIONS
+    for task_type in context_wrapper.TASK_FETCH_PLANS:
+        assert "reports" not in context_wrapper.get_fetch_plan(task_type, "high")
+
+
+def test_fetch_only_requested_sections(requested):
+    """测试 fetch_latest_context 的 sections 参数"""
+    raw = context_wrapper.fetch_latest_context(sections=["tips", "todos"], concurrent=False)
+
+    assert requested == ["todos", "tips"]
+    assert list(raw["data"]) == ["todos", "tips"]
+
+    with pytest.raises(ValueError):
+        context_wrapper.fetch_latest_context(sections=["nope"])
+
+
+@pytest.mark.parametrize(
+    "task_type, detail_level, expected",
+    [
+        ("debug_error", "medium", ["todos", "activities"]),
+        ("refactor", "low", ["todos"]),
+        ("unknown", "high", ["todos", "activities", "tips"]),
+    ],
+)
+def test_summary_uses_plan(requested, task_type, detail_level, expected):
+    """测试摘要只请求计划内的 section"""
+    summary = context_wrapper.get_minecontext_summary(task_type=task_type, detail_level=detail_level)
+
+    assert sorted(requested) == sorted(expected)
+    assert summary["status"] == "ok"
+    assert summary["meta"]["sections"] == expected
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+测试 fingerprint.py 以及基于指纹跳过重复计算
+
+验证：
+1. 相同数据指纹相同，id、更新时间或记录内容变化时指纹变化
+2. dict 和 Activity 得到相同的指纹
+3. 数据未变化时 _summarize_raw 不再调用 compress_home_context，todo 状态变化时重新压缩
+4. activities 未变化时 generate_behavior_clusters 不再重新聚类，标题变化时重新聚类
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import behavior_miner, context_wrapper
+from mcagent.activity import to_activities
+from mcagent.fingerprint import combine_fingerprints, fingerprint_records, fingerprint_sections
+
+
+def load_sample_data():
+    """加载示例 activities 数据"""
+    sample_file = Path(__file__).parent.parent / "samples" / "sample_activities.json"
+    with open(sample_file, "r", encoding="utf-8") as f:
+        return json.load(f)["activities"]
+
+
+def test_fingerprint_detects_changes():
+    """测试指纹对 id / 更新时间 / 内容敏感"""
+    activities = load_sample_data()
+    base = fingerprint_records(activities)
+
+    assert fingerprint_records(json.loads(json.dumps(activities))) == base
+    assert fingerprint_records(to_activities(activities)) == base
+
+    changed = [dict(a) for a in activities]
+    changed[0]["end_time"] = "2099-01-01T00:00:00"
+    assert fingerprint_records(changed) != base
+
+    assert fingerprint_records(activities[1:]) != base
+
+    # 只改内容、不改更新时间
+    retitled = [dict(a) for a in activities]
+    retitled[0]["title"] = retitled[0]["title"] + " v2"
+    assert fingerprint_records(retitled) != base
+    assert fingerprint_records(to_activities(retitled)) == fingerprint_records(retitled)
+
+
+def test_section_fingerprints():
+    """测试按 section 计算指纹"""
+    data = {"todos": {"records": [{"id": 1, "end_time": "t1"}]}, "tips": {"records": []}}
+    fingerprints = fingerprint_sections(data)
+
+    assert set(fingerprints) == {"todos", "tips"}
+    assert combine_fingerprints(fingerprints) == combine_fingerprints(dict(reversed(list(fingerprints.items()))))
+
+    data["todos"]["records"][0]["end_time"] = "t2"
+    assert fingerprint_sections(data)["todos"] != fingerprints["todos"]
+    assert fingerprint_sections(data)["tips"] == fingerprints["tips"]
+
+
+def test_summary_skips_recompression(monkeypatch):
+    """测试数据未变化时复用压缩结果"""
+    calls = []
+    original = context_wrapper.compress_home_context
+
+    def counting_compress(raw):
+        calls.append(raw)
+        return original(raw)
+
+    monkeypatch.setattr(context_wrapper, "compress_home_context", counting_compress)
+    monkeypatch.setattr(context_wrapper, "_persist_context_records", lambda raw: None)
+    monkeypatch.setattr(context_wrapper, "_COMPRESSED_MEMO", {})
+
+    raw = {"timestamp": "t0", "data": {"todos": {"records": [{"id": 1, "content": "写测试", "urgency": 3}]}}}
+    first = context_wrapper._summarize_raw(raw, "debug_error", "medium")
+    second = context_wrapper._summarize_raw(dict(raw, timestamp="t1"), "refactor", "low")
+
+    assert len(calls) == 1
+    assert first["meta"]["changed"] is True
+    assert second["meta"]["changed"] is False
+    assert second["timestamp"] == "t1"
+    assert second["meta"]["task_type"] == "refactor"
+    assert second["user_intent_summary"] == first["user_intent_summary"]
+
+    raw["data"]["todos"]["records"].append({"id": 2, "content": "修 bug"})
+    third = context_wrapper._summarize_raw(raw, "debug_error", "medium")
+    assert len(calls) == 2
+    assert third["meta"]["changed"] is True
+
+
+def test_summary_recompressed_when_todo_status_changes(monkeypatch):
+    """测试 todo 的状态变化（id 和时间不变）时重新压缩"""
+    monkeypatch.setattr(context_wrapper, "_persist_context_records", lambda raw: None)
+    monkeypatch.setattr(context_wrapper, "_COMPRESSED_MEMO", {})
+
+    todo = {"id": 1, "content": "写测试", "urgency": 3, "status": 0, "end_time": "2025-01-01T10:00:00"}
+    raw = {"timestamp": "t0", "data": {"todos": {"records": [todo]}}}
+    first = context_wrapper._summarize_raw(raw, "debug_error", "medium")
+    assert first["user_intent_summary"]["top_todos"][0]["status"] == "pending"
+
+    done = {"timestamp": "t1", "data": {"todos": {"records": [dict(todo, status=1)]}}}
+    second = context_wrapper._summarize_raw(done, "debug_error", "medium")
+    assert second["meta"]["changed"] is True
+    assert second["user_intent_summary"]["top_todos"][0]["status"] == "done"
+
+
+def test_clusters_reused_when_unchanged(monkeypatch):
+    """测试 activities 未变化时复用聚类结果"""
+    calls = []
+    original = behavior_miner._cluster_activities
+
+    def counting_cluster(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(behavior_miner, "_cluster_activities", counting_cluster)
+    behavior_miner._CLUSTER_MEMO.clear()
+
+    activities = load_sample_data()
+    first = behavior_miner.generate_behavior_clusters(activities, top_n=3)
+    first[0]["title"] = "被调用方修改"
+    second = behavior_miner.generate_behavior_clusters(activities, top_n=3)
+
+    assert len(calls) == 1
+    # 返回的是副本，调用方修改不会影响缓存
+    assert second[0]["title"] != "被调用方修改"
+
+    behavior_miner.generate_behavior_clusters(activities, top_n=5)
+    assert len(calls) == 2
+
+
+def test_clusters_recomputed_when_title_changes():
+    """测试 activity 标题变化（id 和时间不变）时重新聚类"""
+    behavior_miner._CLUSTER_MEMO.clear()
+
+    activities = load_sample_data()
+    first = behavior_miner.generate_behavior_clusters(activities, top_n=3)
+
+    retitled = [dict(a, title=f"重命名 {i}") for i, a in enumerate(activities)]
+    second = behavior_miner.generate_behavior_clusters(retitled, top_n=3)
+
+    assert second != first
+    assert all(cluster["title"].startswith("重命名") for cluster in second)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试 ingest.py
+
+验证：
+1. 相同 id 的记录只保留第一条
+2. 连续的近似重复（只有数字、空白、大小写不同）折叠成一条，count 累加，时间范围扩展
+3. 不相邻的重复和没有标题的记录不折叠
+4. generate_behavior_clusters 的 freq 按 count 计算，去重前后一致
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import Activity
+from mcagent.behavior_miner import generate_behavior_clusters
+from mcagent.ingest import content_hash, dedupe_activities
+
+
+def _capture(i: int, title: str = "VSCode - main.py", content: str = "editing main.py"):
+    """生成每分钟一次的截屏 activity，act_0 最新"""
+    return {
+        "id": f"act_{i}",
+        "title": title,
+        "content": f"{content} at 10:{59 - i:02d}",
+        "start_time": f"2025-12-25T10:{59 - i:02d}:00",
+        "end_time": f"2025-12-25T10:{59 - i:02d}:30",
+    }
+
+
+def test_dedupe_by_id():
+    """测试按 id 去重"""
+    activities = [_capture(0), _capture(1, title="Chrome"), _capture(0)]
+    result = dedupe_activities(activities, collapse=False)
+    assert [a.id for a in result] == ["act_0", "act_1"]
+    assert all(a.count == 1 for a in result)
+
+
+def test_collapse_consecutive_near_duplicates():
+    """测试连续的近似重复折叠成一条"""
+    activities = [_capture(i) for i in range(5)]
+    activities[2]["title"] = "vscode -  MAIN.py"
+    activities.append(_capture(5, title="Slack"))
+    activities.append(_capture(6))
+
+    result = dedupe_activities(activities)
+    assert [(a.id, a.count) for a in result] == [("act_0", 5), ("act_5", 1), ("act_6", 1)]
+    assert result[0].start_time == "2025-12-25T10:55:00"
+    assert result[0].end_time == "2025-12-25T10:59:30"
+    assert result[0].to_dict()["count"] == 5
+    assert Activity.from_dict(result[0].to_dict()).count == 5
+
+    # 输入的 Activity 不被修改
+    originals = [Activity.from_dict(a) for a in activities]
+    dedupe_activities(originals)
+    assert all(a.count == 1 for a in originals)
+
+
+def test_untitled_records_not_collapsed():
+    """测试没有标题的记录保持原样"""
+    activities = [_capture(i, title="") for i in range(3)]
+    assert len(dedupe_activities(activities)) == 3
+    assert content_hash(Activity(title="A 1")) == content_hash(Activity(title="a  22"))
+
+
+@pytest.mark.parametrize("threshold", [0.6, 0.5])
+def test_cluster_freq_counts_collapsed_records(threshold):
+    """测试折叠后 cluster 的 freq 仍然等于原始条数"""
+    activities = [_capture(i) for i in range(6)]
+    activities += [_capture(i, title="Notion - 周报", content="writing report") for i in range(6, 10)]
+    activities.append(_capture(0))
+
+    clusters = generate_behavior_clusters(activities, top_n=5, similarity_threshold=threshold)
+    raw = generate_behavior_clusters(activities[:-1], top_n=5, similarity_threshold=threshold, dedupe=False)
+    assert [(c["title"], c["freq"]) for c in clusters] == [(c["title"], c["freq"]) for c in raw]
+    assert [c["freq"] for c in clusters] == [6, 4]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
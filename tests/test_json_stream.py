@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试 json_stream.py 以及 activities 的流式分页
+
+验证：
+1. 任意切块方式下都能逐个解码出数组元素
+2. 路径外的值被跳过，根对象上的标量字段被记录
+3. 流式分页与一次性解析的结果一致
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker
+from mcagent.json_stream import JSONArrayStream
+from mcagent.standin_server import StandinServer
+
+RESPONSE = {
+    "status": "ok",
+    "extra": {"activities": [{"id": "not-me"}], "text": '包含 ] } 和 " 的字符串 \\'},
+    "data": {
+        "total": 3,
+        "activities": [
+            {"id": 3, "title": "中文标题 [1]", "end_time": "2025-12-25T12:00:00", "metadata": "{\"end_time\": \"x\"}"},
+            {"id": 2, "title": "escape \\\" } ]", "end_time": "2025-12-24T12:00:00", "resources": [{"end_time": "y"}]},
+            {"id": 1, "score": -1.5e3, "flag": True, "end_time": None},
+        ],
+    },
+    "code": 0,
+}
+
+
+def _parse(payload: bytes, chunk_size: int):
+    stream = JSONArrayStream(("data", "activities"))
+    items = []
+    for start in range(0, len(payload), chunk_size):
+        items.extend(stream.feed(payload[start:start + chunk_size]))
+    items.extend(stream.close())
+    return stream, items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 100000])
+def test_split_items_for_any_chunking(chunk_size):
+    """测试逐字节到整块的各种切分方式"""
+    payload = json.dumps(RESPONSE, ensure_ascii=False, indent=1).encode("utf-8")
+    stream, items = _parse(payload, chunk_size)
+
+    assert items == RESPONSE["data"]["activities"]
+    assert stream.fields == {"status": "ok", "code": 0}
+    assert stream.root_keys == {"status", "extra", "data", "code"}
+    assert stream.found
+
+
+def test_data_as_list_and_incomplete():
+    """测试 data 直接是数组，以及不完整的 JSON"""
+    _, items = _parse(b'{"code": 0, "data": [{"id": 1}, {"id": 2}]}', 5)
+    assert items == [{"id": 1}, {"id": 2}]
+
+    stream = JSONArrayStream(("data", "activities"))
+    stream.feed(b'{"code": 0, "data": {"activities": [{"id": 1}')
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+def test_streaming_pages_match_buffered(monkeypatch):
+    """测试流式分页与 resp.json() 的结果一致"""
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=500, days=7, seed=3) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        streamed = list(context_wrapper.iter_activity_pages(days=3, page_size=100, stream=True))
+        buffered = list(context_wrapper.iter_activity_pages(days=3, page_size=100, stream=False))
+
+    assert streamed == buffered
+    assert sum(len(page) for page in streamed) > 100
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+测试 memory_cache.py
+
+验证：
+1. 条目在 ttl 后过期
+2. 超过 maxsize 时淘汰最久未使用的条目
+3. get_or_set 只在未命中时调用 factory
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.memory_cache import TTLCache
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    """测试 TTL 过期"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10.0, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 9.9
+    assert cache.get("a") == 1
+
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    """测试 LRU 淘汰"""
+    cache = TTLCache(maxsize=2, ttl=60.0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a 变为最近使用
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_get_or_set_and_invalidate():
+    """测试 get_or_set 和按条件失效"""
+    cache = TTLCache(maxsize=8, ttl=60.0)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return ["clusters"]
+
+    assert cache.get_or_set(("clusters", 7, "rev1"), factory) == ["clusters"]
+    assert cache.get_or_set(("clusters", 7, "rev1"), factory) == ["clusters"]
+    assert len(calls) == 1
+    assert cache.hits == 1
+
+    cache.set(("clusters", 30, "rev1"), [])
+    removed = cache.invalidate(lambda key: key[1] == 7)
+    assert removed == 1
+    assert cache.get(("clusters", 30, "rev1")) == []
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-v"]))
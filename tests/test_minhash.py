@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试 minhash 模块和 behavior_miner 的 minhash 引擎
+
+验证：
+1. 签名稳定，相同的 shingle 集合签名相同，签名相等的比例接近 Jaccard 相似度
+2. 参数校验和 LSH 候选对（去重、j < i、大桶只和第一个成员配对）
+3. minhash 引擎只会拆分、不会错误合并精确引擎的 cluster
+4. generate_behavior_clusters 和 mine_behaviors 可以选择 minhash 引擎
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import Activity, to_activities
+from mcagent.behavior_miner import _cluster_activities, generate_behavior_clusters
+from mcagent.minhash import MinHasher, MinHashParams, lsh_candidate_pairs
+from mcagent.standin_server import generate_activities
+
+NOW = datetime(2025, 12, 25, 18, 0, 0)
+
+
+def test_signature_is_deterministic():
+    """测试签名与 shingle 顺序无关，且不同的 MinHasher 实例结果相同"""
+    shingles = ["git", "ith", "thu", "hub"]
+    signature = MinHasher().signature(shingles)
+    assert len(signature) == MinHashParams().num_perm
+    assert signature == MinHasher().signature(reversed(shingles))
+    assert MinHasher().signature([]) == ()
+
+
+def test_signature_agreement_estimates_jaccard():
+    """测试签名相等的比例接近 Jaccard 相似度"""
+    hasher = MinHasher(MinHashParams(num_perm=256, bands=64))
+    a = {f"s{k}" for k in range(100)}
+    b = {f"s{k}" for k in range(50, 150)}
+    sig_a, sig_b = hasher.signature(a), hasher.signature(b)
+    agreement = sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+    assert abs(agreement - 50 / 150) < 0.1
+
+
+def test_params_validation():
+    """测试 num_perm 不是 bands 的整数倍时抛出 ValueError"""
+    with pytest.raises(ValueError):
+        MinHasher(MinHashParams(num_perm=64, bands=10))
+    with pytest.raises(ValueError):
+        MinHasher(MinHashParams(num_perm=0, bands=1))
+    assert MinHashParams(num_perm=64, bands=16).rows == 4
+    assert MinHashParams(num_perm=64, bands=16).threshold == pytest.approx(0.5)
+
+
+def test_lsh_candidate_pairs():
+    """测试同桶的记录成为候选对，空签名不参与，每对只生成一次"""
+    params = MinHashParams(num_perm=4, bands=2)
+    signatures = [(1, 2, 3, 4), (1, 2, 9, 9), (7, 7, 3, 4), (), (1, 2, 3, 4)]
+    pairs = list(lsh_candidate_pairs(signatures, params))
+    assert sorted(pairs) == [(0, 1), (0, 2), (0, 4), (1, 4), (2, 4)]
+    assert len(pairs) == len(set(pairs))
+
+
+def test_lsh_large_bucket_pairs_with_first_member():
+    """测试超过 max_bucket 的桶只生成 (第一个成员, 其他成员)"""
+    params = MinHashParams(num_perm=2, bands=1, max_bucket=3)
+    pairs = list(lsh_candidate_pairs([(1, 1)] * 5, params))
+    assert pairs == [(0, 1), (0, 2), (0, 3), (0, 4)]
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.6, 0.8])
+def test_minhash_engine_refines_exact_clusters(threshold):
+    """测试 minhash 引擎的每个 cluster 都包含在精确引擎的某个 cluster 中"""
+    activities = to_activities(generate_activities(200, days=30, seed=4, now=NOW))
+    exact = _cluster_activities(activities, threshold)
+    approx = _cluster_activities(activities, threshold, engine="minhash")
+
+    cluster_of = {}
+    for cluster_id, members in exact.items():
+        for act in members:
+            cluster_of[act.id] = cluster_id
+    for members in approx.values():
+        assert len({cluster_of[act.id] for act in members}) == 1
+    assert sum(len(members) for members in approx.values()) == len(activities)
+
+
+def test_minhash_engine_merges_near_duplicates():
+    """测试近似重复的标题被聚到一起，没有标题的 activity 单独成为 cluster"""
+    activities = [
+        Activity(id="a", title="Debug failing unit tests", content="pytest in Terminal"),
+        Activity(id="b", title="Team sync", content="Slack"),
+        Activity(id="c", title="Debug failing unit tests (cont.)", content="pytest in Terminal"),
+        Activity(id="d", title=None, content="pytest in Terminal"),
+    ]
+    clusters = _cluster_activities(activities, 0.6, engine="minhash")
+    assert {k: [act.id for act in v] for k, v in clusters.items()} == {0: ["a", "c"], 1: ["b"], 3: ["d"]}
+
+
+def test_generate_behavior_clusters_minhash():
+    """测试 generate_behavior_clusters 的 minhash 引擎和参数"""
+    activities = generate_activities(80, days=7, seed=9, now=NOW)
+    exact = generate_behavior_clusters(activities, top_n=100)
+    approx = generate_behavior_clusters(activities, top_n=100, engine="minhash",
+                                        minhash=MinHashParams(num_perm=128, bands=64))
+    assert sum(c["freq"] for c in approx) == sum(c["freq"] for c in exact) == len(activities)
+    assert len(exact) <= len(approx) < len(activities)
+
+    with pytest.raises(ValueError):
+        generate_behavior_clusters(activities, engine="minhash", minhash=MinHashParams(num_perm=64, bands=10))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+测试 request_policy.py
+
+验证：
+1. 单个请求的超时随剩余预算缩短，预算用完后不再发出请求
+2. 连接失败 / 超时 / 429 / 5xx 重试，其他错误和熔断不重试
+3. 退避时间带抖动且放不进剩余预算时放弃重试
+4. fetch_latest_context 在整体预算内返回，偶发的 5xx 通过重试恢复
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker, CircuitOpenError
+from mcagent.request_policy import DeadlineExceeded, RequestPolicy, is_transient_error
+from mcagent.standin_server import StandinServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _http_error(status: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+def test_timeout_shrinks_with_budget():
+    """测试超时取单个请求上限和剩余预算中较小的一个"""
+    clock = FakeClock()
+    budget = RequestPolicy(total_deadline=5.0, request_timeout=2.0, clock=clock).start()
+
+    assert budget.timeout() == 2.0
+    clock.now = 4.0
+    assert budget.timeout() == pytest.approx(1.0)
+    clock.now = 5.0
+    with pytest.raises(DeadlineExceeded):
+        budget.timeout()
+
+
+def test_transient_errors():
+    """测试可重试错误的分类"""
+    assert is_transient_error(requests.exceptions.ConnectionError("refused"))
+    assert is_transient_error(requests.exceptions.ReadTimeout("slow"))
+    assert is_transient_error(_http_error(503))
+    assert is_transient_error(_http_error(429))
+    assert not is_transient_error(_http_error(404))
+    assert not is_transient_error(requests.exceptions.HTTPError("no response"))
+    assert not is_transient_error(CircuitOpenError(10))
+    assert not is_transient_error(DeadlineExceeded("budget"))
+    assert not is_transient_error(ValueError("bad json"))
+
+
+def test_call_retries_transient_errors():
+    """测试可重试的错误被重试，超时随预算传入"""
+    policy = RequestPolicy(total_deadline=5.0, request_timeout=1.0, max_attempts=3, backoff_base=0.001)
+    calls = []
+
+    def flaky(timeout):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise _http_error(502)
+        return "ok"
+
+    assert policy.start().call(flaky) == "ok"
+    assert len(calls) == 3
+    assert all(0 < t <= 1.0 for t in calls)
+
+
+def test_call_stops_on_permanent_error_and_max_attempts():
+    """测试不可重试的错误立即抛出，可重试的错误最多尝试 max_attempts 次"""
+    policy = RequestPolicy(total_deadline=5.0, max_attempts=2, backoff_base=0.001)
+    calls = []
+
+    def not_found(timeout):
+        calls.append(timeout)
+        raise _http_error(404)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy.start().call(not_found)
+    assert len(calls) == 1
+
+    def refused(timeout):
+        calls.append(timeout)
+        raise requests.exceptions.ConnectionError("refused")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.start().call(refused)
+    assert len(calls) == 3
+
+
+def test_backoff_is_jittered_and_bounded_by_budget():
+    """测试退避时间在 [0, 上限) 内，放不进剩余预算时返回 None"""
+    clock = FakeClock()
+    policy = RequestPolicy(
+        total_deadline=1.0, backoff_base=0.1, backoff_max=0.3, clock=clock, rng=random.Random(1)
+    )
+    budget = policy.start()
+
+    delays = [budget.backoff(attempt) for attempt in (1, 2, 3, 4)]
+    assert 0 <= delays[0] <= 0.1
+    assert 0 <= delays[1] <= 0.2
+    assert all(0 <= d <= 0.3 for d in delays[2:])
+    assert len(set(delays)) == len(delays)
+
+    clock.now = 0.99
+    assert budget.backoff(1) is None
+
+
+def test_fetch_latest_context_respects_total_deadline(monkeypatch):
+    """测试端点挂起时 fetch_latest_context 在整体预算内返回"""
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=5, timeout_rate=1.0, timeout_seconds=2.0) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        policy = RequestPolicy(total_deadline=0.5, request_timeout=0.3)
+        started = time.monotonic()
+        raw = context_wrapper.fetch_latest_context(sections=["todos", "tips"], policy=policy)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert raw["data"] == {"todos": {"records": []}, "tips": {"records": []}}
+
+
+def test_fetch_latest_context_recovers_from_server_errors(monkeypatch):
+    """测试偶发的 HTTP 500 通过重试恢复"""
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=5, error_rate=0.5, seed=3) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        policy = RequestPolicy(total_deadline=5.0, max_attempts=5, backoff_base=0.01)
+        raw = context_wrapper.fetch_latest_context(concurrent=False, policy=policy)
+        errors = server.stats["errors"]
+
+    assert errors > 0
+    assert all(section["records"] for section in raw["data"].values())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
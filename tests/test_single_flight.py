@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+测试跨进程文件锁、原子写入和 get_activities 的 single-flight
+
+验证：
+1. FileLock 在线程之间、进程之间互斥
+2. atomic_write_bytes 写入失败时保留原文件，不留下临时文件
+3. 多个线程 / 协程 / 进程同时在缓存未命中时调用 get_activities，只向 MineContext 拉取一次
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker
+from mcagent.file_lock import FileLock, LockTimeout, atomic_write_bytes
+from mcagent.standin_server import StandinServer
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    """把缓存目录指向临时目录，并使用新的熔断器"""
+    monkeypatch.setattr(context_wrapper, "CACHE_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    return tmp_path / "data"
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    """测试同一个锁文件上的两个 FileLock 互斥"""
+    path = tmp_path / "test.lock"
+    with FileLock(path):
+        with pytest.raises(LockTimeout):
+            FileLock(path).acquire(timeout=0.1)
+    with FileLock(path, timeout=0.1) as lock:
+        assert lock.locked
+    assert not lock.locked
+
+
+def test_file_lock_across_processes(tmp_path):
+    """测试另一个进程持有锁时本进程拿不到锁，进程退出后锁被释放"""
+    path = tmp_path / "test.lock"
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(SRC_DIR)!r})
+        from mcagent.file_lock import FileLock
+        with FileLock({str(path)!r}):
+            print("locked", flush=True)
+            sys.stdin.read()
+    """)
+    child = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert child.stdout.readline().strip() == "locked"
+        with pytest.raises(LockTimeout):
+            FileLock(path).acquire(timeout=0.2)
+    finally:
+        child.stdin.close()
+        child.wait(timeout=10)
+
+    with FileLock(path, timeout=5):
+        pass
+
+
+def test_atomic_write_keeps_original_on_failure(tmp_path, monkeypatch):
+    """测试替换失败时原文件不变且没有残留的临时文件"""
+    path = tmp_path / "cache.json"
+    atomic_write_bytes(path, b"old")
+    atomic_write_bytes(path, b"new")
+    assert path.read_bytes() == b"new"
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        atomic_write_bytes(path, b"broken")
+
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_concurrent_threads_fetch_once(isolated_cache, monkeypatch):
+    """测试多个线程同时缓存未命中时只拉取一次，并拿到相同的结果"""
+    with StandinServer(activities=300, days=7, latency=0.05, seed=3) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        results = [None] * 8
+        barrier = threading.Barrier(len(results))
+
+        def worker(i):
+            barrier.wait()
+            results[i] = context_wrapper.get_activities(days=7)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(results))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        requests_made = server.stats["requests"]
+
+    # 300 条、每页 200 条：一次完整拉取需要 2 页
+    assert requests_made == 2
+    assert len(results[0]) == 300
+    assert all(r == results[0] for r in results)
+
+
+def test_concurrent_tasks_fetch_once(isolated_cache, monkeypatch):
+    """测试异步版本的并发调用同样只拉取一次"""
+    if context_wrapper.httpx is None:
+        pytest.skip("httpx 未安装")
+
+    async def run():
+        try:
+            return await asyncio.gather(*(context_wrapper.get_activities_async(days=7) for _ in range(5)))
+        finally:
+            await context_wrapper.aclose_async_client()
+
+    with StandinServer(activities=300, days=7, latency=0.05, seed=5) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        results = asyncio.run(run())
+        requests_made = server.stats["requests"]
+
+    assert requests_made == 2
+    assert all(len(r) == 300 for r in results)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json", "archive"])
+def test_concurrent_processes_fetch_once(isolated_cache, backend):
+    """测试多个进程同时缓存未命中时只有一个进程拉取，其他进程读取它写好的缓存"""
+    with StandinServer(activities=300, days=7, latency=0.2, seed=4) as server:
+        script = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(SRC_DIR)!r})
+            from mcagent import context_wrapper
+            context_wrapper.MINECONTEXT_BASE_URL = {server.url!r}
+            context_wrapper.CACHE_DIR = {str(isolated_cache)!r}
+            context_wrapper.CACHE_BACKEND = {backend!r}
+            print(len(context_wrapper.get_activities(days=7)))
+        """)
+        children = [
+            subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+            for _ in range(3)
+        ]
+        outputs = [child.communicate(timeout=60)[0] for child in children]
+        requests_made = server.stats["requests"]
+
+    assert all(child.returncode == 0 for child in children)
+    assert [out.strip().splitlines()[-1] for out in outputs] == ["300"] * 3
+    assert requests_made == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试 standin_server.py
+
+验证：
+1. 响应使用 MineContext 的 {"code": 0, "data": {...}} 格式，支持 limit / offset 分页
+2. get_activities 通过分页拿到时间窗口内的全部 activities，时间字段不是字符串的记录不会中断分页
+3. 注入的错误让 fetch_latest_context 按失败处理
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+from mcagent.circuit_breaker import CircuitBreaker
+from mcagent.request_policy import RequestPolicy
+from mcagent.standin_server import StandinServer, generate_activities
+
+
+def test_generate_activities():
+    """测试生成的数据：条数、时间倒序、可复现"""
+    now = datetime(2025, 12, 25, 18, 0, 0)
+    activities = generate_activities(50, days=5, lang="zh", seed=1, now=now)
+
+    assert len(activities) == 50
+    assert activities == generate_activities(50, days=5, lang="zh", seed=1, now=now)
+    assert activities[0]["end_time"] == "2025-12-25T18:00:00"
+    end_times = [a["end_time"] for a in activities]
+    assert end_times == sorted(end_times, reverse=True)
+    assert activities[0]["id"] == 50
+    assert all(a["title"] and a["metadata"] for a in activities)
+
+
+def test_envelope_and_pagination():
+    """测试响应格式和分页"""
+    with StandinServer(activities=25, seed=1) as server:
+        first = requests.get(f"{server.url}/api/debug/activities", params={"limit": 10}, timeout=5).json()
+        third = requests.get(f"{server.url}/api/debug/activities", params={"limit": 10, "offset": 20}, timeout=5).json()
+        todos = requests.get(f"{server.url}/api/debug/todos", timeout=5).json()
+        missing = requests.get(f"{server.url}/api/debug/unknown", timeout=5)
+
+    assert first["code"] == 0
+    assert [a["id"] for a in first["data"]["activities"]] == list(range(25, 15, -1))
+    assert [a["id"] for a in third["data"]["activities"]] == list(range(5, 0, -1))
+    assert len(todos["data"]["todos"]) == 10
+    assert missing.status_code == 404
+
+
+def test_get_activities_from_standin(monkeypatch):
+    """测试 get_activities 分页拉取时间窗口内的数据"""
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=700, days=7, seed=2) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        activities = context_wrapper.get_activities(days=3, use_cache=False)
+        requests_made = server.stats["requests"]
+
+    # 均匀分布在 7 天内，3 天窗口内约 300 条，需要 2 页
+    assert 290 <= len(activities) <= 310
+    assert requests_made == 2
+
+
+def test_non_string_time_does_not_abort_paging(monkeypatch):
+    """测试 end_time 为 epoch 整数的记录按无法解析处理，不会中断分页"""
+    assert context_wrapper._parse_activity_time({"end_time": 1735100000}) is None
+    assert context_wrapper._parse_activity_time({"start_time": 1735100000.5}) is None
+
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=700, days=7, seed=2) as server:
+        server.data["activities"][10]["end_time"] = 1735100000
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        activities = context_wrapper.get_activities(days=3, use_cache=False)
+
+    assert 290 <= len(activities) <= 310
+
+
+def test_injected_errors(monkeypatch):
+    """测试注入的错误被当作端点失败处理"""
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=10, error_rate=1.0) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        raw = context_wrapper.fetch_latest_context(policy=RequestPolicy(total_deadline=5, max_attempts=1))
+        errors = server.stats["errors"]
+
+    assert errors == len(context_wrapper.API_ENDPOINTS)
+    assert all(section == {"records": []} for section in raw["data"].values())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试 get_minecontext_summary 的 stale-while-revalidate 模式
+
+验证：
+1. 不超过 max_staleness 的摘要直接返回，带 meta.age_seconds，并触发后台刷新
+2. 超过 max_staleness 或没有缓存时同步抓取
+3. 错误结果不会被缓存
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    """替换真实抓取：每次调用返回递增的版本号"""
+    calls = []
+    refreshed = threading.Event()
+
+    def build(task_type, detail_level):
+        calls.append((task_type, detail_level))
+        if len(calls) > 1:
+            refreshed.set()
+        return {"status": "ok", "version": len(calls), "meta": {"task_type": task_type}}
+
+    monkeypatch.setattr(context_wrapper, "_build_summary", build)
+    monkeypatch.setattr(context_wrapper, "_SUMMARY_CACHE", {})
+    monkeypatch.setattr(context_wrapper, "_SUMMARY_REFRESHING", set())
+    return calls, refreshed
+
+
+def test_serves_cached_summary_and_refreshes(fake_build):
+    """测试命中时直接返回旧摘要并在后台刷新"""
+    calls, refreshed = fake_build
+
+    first = context_wrapper.get_minecontext_summary("debug_error", max_staleness=60)
+    assert first["version"] == 1
+    assert first["meta"]["age_seconds"] == 0.0
+
+    second = context_wrapper.get_minecontext_summary("debug_error", max_staleness=60)
+    assert second["version"] == 1
+    assert second["meta"]["age_seconds"] >= 0
+
+    # 后台刷新完成后，下一次返回新版本
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if not context_wrapper._SUMMARY_REFRESHING:
+            break
+        time.sleep(0.01)
+    third = context_wrapper.get_minecontext_summary("debug_error", max_staleness=60)
+    assert third["version"] == 2
+
+
+def test_fetches_when_too_old(fake_build):
+    """测试超过陈旧上限或未启用时同步抓取"""
+    calls, _ = fake_build
+
+    context_wrapper.get_minecontext_summary("refactor")
+    summary = context_wrapper.get_minecontext_summary("refactor", max_staleness=0)
+
+    assert summary["version"] == 2
+    assert len(calls) == 2
+
+
+def test_errors_are_not_cached(monkeypatch):
+    """测试错误结果不会被缓存"""
+    monkeypatch.setattr(context_wrapper, "_SUMMARY_CACHE", {})
+    monkeypatch.setattr(
+        context_wrapper,
+        "_build_summary",
+        lambda task_type, detail_level: context_wrapper._error_summary("Timeout", "slow", ""),
+    )
+
+    summary = context_wrapper.get_minecontext_summary(max_staleness=60)
+
+    assert summary["status"] == "error"
+    assert summary["meta"]["age_seconds"] == 0.0
+    assert context_wrapper._SUMMARY_CACHE == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+测试 telemetry.py
+
+验证：
+1. span 记录耗时、计数和嵌套关系，异常时标记为 error
+2. summarize_spans 按名称汇总调用次数和计数
+3. dump_spans 写出 JSON，未指定路径时读取 MCAGENT_SPANS_FILE
+4. get_activities + 聚类的流水线记录 fetch / parse / filter / ingest / cluster 阶段
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent import context_wrapper, telemetry
+from mcagent.behavior_miner import generate_behavior_clusters
+from mcagent.circuit_breaker import CircuitBreaker
+from mcagent.standin_server import StandinServer
+from mcagent.telemetry import (
+    SPANS_FILE_ENV,
+    clear_spans,
+    dump_spans,
+    get_spans,
+    record_span,
+    span,
+    summarize_spans,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_spans():
+    clear_spans()
+    yield
+    clear_spans()
+
+
+def test_span_nesting_and_counts():
+    """测试嵌套 span 的 parent_id 和计数"""
+    with span("outer", days=3) as outer:
+        with span("inner") as inner:
+            inner.count("items", 2)
+            inner.count("items", 3)
+        record_span("manual", 0.5, bytes=10)
+
+    spans = {s["name"]: s for s in get_spans()}
+    assert [s["name"] for s in get_spans()] == ["inner", "manual", "outer"]
+    assert spans["inner"]["parent_id"] == outer.span_id
+    assert spans["manual"]["parent_id"] == outer.span_id
+    assert spans["outer"]["parent_id"] is None
+    assert spans["inner"]["counts"] == {"items": 5}
+    assert spans["manual"]["duration"] == 0.5
+    assert spans["outer"]["attrs"] == {"days": 3}
+    assert telemetry.current_span() is None
+
+
+def test_span_marks_errors():
+    """测试块内异常时 span 状态为 error 且异常照常抛出"""
+    with pytest.raises(KeyError):
+        with span("broken"):
+            raise KeyError("x")
+
+    (broken,) = get_spans()
+    assert broken["status"] == "error"
+    assert broken["attrs"]["error"] == "KeyError"
+
+
+def test_summarize_and_dump(tmp_path, monkeypatch):
+    """测试汇总和 JSON 导出"""
+    for n in (1, 2):
+        with span("cluster") as s:
+            s.count("items", n)
+
+    summary = summarize_spans()
+    assert summary["cluster"]["calls"] == 2
+    assert summary["cluster"]["counts"] == {"items": 3}
+
+    assert dump_spans() is None
+    path = tmp_path / "spans.json"
+    monkeypatch.setenv(SPANS_FILE_ENV, str(path))
+    assert dump_spans() == str(path)
+
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert len(report["spans"]) == 2
+    assert report["summary"]["cluster"]["calls"] == 2
+
+
+def test_pipeline_stages(tmp_path, monkeypatch):
+    """测试拉取 + 聚类流水线记录的阶段"""
+    monkeypatch.setattr(context_wrapper, "CACHE_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(context_wrapper, "_BREAKER", CircuitBreaker())
+    with StandinServer(activities=60, days=7, seed=6) as server:
+        monkeypatch.setattr(context_wrapper, "MINECONTEXT_BASE_URL", server.url)
+        activities = context_wrapper.get_activities(days=7)
+    generate_behavior_clusters(activities, top_n=3, similarity_threshold=0.9)
+
+    summary = summarize_spans()
+    for name in ("fetch.activities", "fetch.sync", "fetch.page", "parse.activities",
+                 "cache.save", "filter.activities", "ingest", "cluster"):
+        assert name in summary, name
+    assert summary["fetch.activities"]["counts"]["items"] == 60
+    assert summary["parse.activities"]["counts"]["items"] == 60
+    assert summary["fetch.page"]["counts"]["bytes"] > 0
+    assert summary["ingest"]["counts"]["input"] == 60
+    assert summary["cluster"]["counts"]["items"] == summary["ingest"]["counts"]["items"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+测试 tfidf 模块和 behavior_miner 的 tfidf 引擎（需要 numpy 和 scipy）
+
+验证：
+1. TF-IDF 矩阵按行 L2 归一化，没有词项的记录是全零行
+2. 分块计算的近邻与不分块的结果一致，每对只生成一次，max_neighbors 限制每行的近邻数
+3. tfidf 引擎只会拆分、不会错误合并精确引擎的 cluster
+4. generate_behavior_clusters 可以选择 tfidf 引擎
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcagent.activity import Activity, to_activities
+from mcagent.behavior_miner import _cluster_activities, generate_behavior_clusters
+from mcagent.standin_server import generate_activities
+from mcagent.tfidf import TfidfParams, build_tfidf_matrix, cosine_neighbor_pairs
+
+NOW = datetime(2025, 12, 25, 18, 0, 0)
+
+DOCUMENTS = [
+    ["git", "push", "git"],
+    ["git", "push"],
+    [],
+    ["slack", "chat"],
+    ["slack", "notes"],
+    ["git", "review"],
+]
+
+
+def test_matrix_rows_are_normalized():
+    """测试每行 L2 归一化，空记录是全零行"""
+    matrix = build_tfidf_matrix(DOCUMENTS)
+    assert matrix.shape == (6, 6)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    assert norms == pytest.approx([1, 1, 0, 1, 1, 1])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4, 100])
+def test_neighbor_pairs_independent_of_chunk_size(chunk_size):
+    """测试分块大小不影响结果，且每对 (j, i) 满足 j < i、只出现一次"""
+    matrix = build_tfidf_matrix(DOCUMENTS)
+    expected = sorted(cosine_neighbor_pairs(matrix, 0.1, chunk_size=100))
+    pairs = list(cosine_neighbor_pairs(matrix, 0.1, chunk_size=chunk_size))
+    assert sorted(pairs) == expected
+    assert len(pairs) == len(set(pairs))
+    assert all(j < i for j, i in pairs)
+    assert (0, 1) in expected and (3, 4) in expected
+    assert not any(2 in pair for pair in expected)
+
+
+def test_max_neighbors_keeps_most_similar():
+    """测试 max_neighbors 只保留相似度最高的近邻"""
+    matrix = build_tfidf_matrix(DOCUMENTS)
+    pairs = list(cosine_neighbor_pairs(matrix, 0.01, chunk_size=2, max_neighbors=1))
+    assert [pair for pair in pairs if pair[0] == 0] == [(0, 1)]
+
+    with pytest.raises(ValueError):
+        list(cosine_neighbor_pairs(matrix, 0.1, chunk_size=0))
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.6, 0.8])
+def test_tfidf_engine_refines_exact_clusters(threshold):
+    """测试 tfidf 引擎的每个 cluster 都包含在精确引擎的某个 cluster 中"""
+    activities = to_activities(generate_activities(200, days=30, seed=4, now=NOW))
+    exact = _cluster_activities(activities, threshold)
+    approx = _cluster_activities(activities, threshold, engine="tfidf")
+
+    cluster_of = {}
+    for cluster_id, members in exact.items():
+        for act in members:
+            cluster_of[act.id] = cluster_id
+    for members in approx.values():
+        assert len({cluster_of[act.id] for act in members}) == 1
+    assert sum(len(members) for members in approx.values()) == len(activities)
+
+
+def test_tfidf_engine_merges_near_duplicates():
+    """测试近似重复的标题被聚到一起，没有标题的 activity 单独成为 cluster"""
+    activities = [
+        Activity(id="a", title="Debug failing unit tests", content="pytest in Terminal"),
+        Activity(id="b", title="Team sync", content="Slack"),
+        Activity(id="c", title="Debug failing unit tests (cont.)", content="pytest in Terminal"),
+        Activity(id="d", title=None, content="pytest in Terminal"),
+    ]
+    clusters = _cluster_activities(activities, 0.6, engine="tfidf")
+    assert {k: [act.id for act in v] for k, v in clusters.items()} == {0: ["a", "c"], 1: ["b"], 3: ["d"]}
+
+
+def test_generate_behavior_clusters_tfidf():
+    """测试 generate_behavior_clusters 的 tfidf 引擎和参数"""
+    activities = generate_activities(80, days=7, seed=9, now=NOW)
+    exact = generate_behavior_clusters(activities, top_n=100)
+    approx = generate_behavior_clusters(activities, top_n=100, engine="tfidf",
+                                        tfidf=TfidfParams(min_cosine=0.05, chunk_size=16))
+    assert sum(c["freq"] for c in approx) == sum(c["freq"] for c in exact) == len(activities)
+    assert len(exact) <= len(approx) < len(activities)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))